@@ -6,14 +6,16 @@ Financial Advisory for Healthcare Providers
 import os
 import logging
 from logging.handlers import RotatingFileHandler
-from flask import Flask
+from flask import Flask, request
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from flask_limiter import Limiter
+from flask_limiter import Limiter, RateLimitExceeded
 from flask_limiter.util import get_remote_address
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from .config import Config
 from .extensions import db, migrate, mail, csrf
+from .utils import ratelimit_storage  # noqa: F401 - registers the sqlite:// limiter storage
 
 jwt = JWTManager()
 limiter = Limiter(key_func=get_remote_address, default_limits=["200 per day", "50 per hour"])
@@ -24,6 +26,11 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Behind nginx, remote_addr is the proxy: take the client from X-Forwarded-*
+    if app.config.get('PROXY_FIX_X_FOR') or app.config.get('PROXY_FIX_X_PROTO'):
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config.get('PROXY_FIX_X_FOR', 0),
+                                x_proto=app.config.get('PROXY_FIX_X_PROTO', 0))
+    
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -31,12 +38,19 @@ def create_app(config_class=Config):
     jwt.init_app(app)
     limiter.init_app(app)
     
+    # Revoked tokens are checked against a per-worker copy of the revocation list
+    from .utils.token_revocation import revocation_list
+    
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        return revocation_list.is_revoked(jwt_payload)
+    
     # CORS configuration
     CORS(app, resources={
         r"/api/*": {
             "origins": app.config.get('CORS_ORIGINS', '*'),
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization", "X-CSRF-Token"],
+            "allow_headers": ["Content-Type", "Authorization", "X-CSRF-Token", "X-Profile"],
             "supports_credentials": True
         }
     })
@@ -52,6 +66,9 @@ def create_app(config_class=Config):
     from .api.leads import leads_bp
     from .api.admin import admin_bp
     from .api.settings import settings_bp
+    from .api.search import search_bp
+    from .api.feeds import feeds_bp
+    from .api.metrics import metrics_bp
     
     # Exempt all API blueprints from CSRF (using JWT instead)
     csrf.exempt(auth_bp)
@@ -61,6 +78,13 @@ def create_app(config_class=Config):
     csrf.exempt(leads_bp)
     csrf.exempt(admin_bp)
     csrf.exempt(settings_bp)
+    csrf.exempt(search_bp)
+    csrf.exempt(feeds_bp)
+    csrf.exempt(metrics_bp)
+    
+    # Crawlers poll feeds; they are static files, so don't count them
+    limiter.exempt(feeds_bp)
+    limiter.exempt(metrics_bp)
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(pages_bp, url_prefix='/api/pages')
@@ -69,6 +93,29 @@ def create_app(config_class=Config):
     app.register_blueprint(leads_bp, url_prefix='/api/contact')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
     app.register_blueprint(settings_bp, url_prefix='/api/settings')
+    app.register_blueprint(search_bp, url_prefix='/api/search')
+    app.register_blueprint(feeds_bp, url_prefix='/api/feeds')
+    app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+    
+    # Request, SQL and pool metrics
+    from .utils.metrics import init_metrics, metrics
+    init_metrics(app)
+    
+    # Slow query log
+    from .utils.slow_queries import init_slow_query_log
+    init_slow_query_log(app)
+    
+    # N+1 query detection (development and tests)
+    from .utils.n_plus_one import init_n_plus_one_detection
+    init_n_plus_one_detection(app)
+    
+    # Per-request profiler for admins and sampled endpoints
+    from .utils.profiler import init_profiler
+    init_profiler(app)
+    
+    # CLI commands
+    from .commands import register_commands
+    register_commands(app)
     
     # Setup logging
     if not app.debug and not app.testing:
@@ -87,6 +134,15 @@ def create_app(config_class=Config):
         app.logger.setLevel(logging.INFO)
         app.logger.info('FinanceClinics startup')
     
+    # Warm the public read model so the first visitors don't pay for it
+    if app.config.get('READ_MODEL_ENABLED') and not app.testing:
+        from .utils.read_model import read_model
+        with app.app_context():
+            try:
+                read_model.current()
+            except Exception as e:
+                app.logger.warning(f'Read model not loaded at startup: {e}')
+    
     # Health check endpoint
     @app.route('/api/health')
     def health_check():
@@ -107,4 +163,9 @@ def create_app(config_class=Config):
     def ratelimit_handler(e):
         return {'error': 'Rate limit exceeded. Please try again later.'}, 429
     
+    @app.errorhandler(RateLimitExceeded)
+    def limiter_rejection_handler(e):
+        metrics.inc('ratelimit_rejections_total', endpoint=request.endpoint or 'unmatched')
+        return ratelimit_handler(e)
+    
     return app
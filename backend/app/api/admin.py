@@ -3,12 +3,20 @@ FinanceClinics - Admin Dashboard API
 """
 
 from datetime import datetime, timedelta
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, Response, request, jsonify, send_file, send_from_directory, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func
+from sqlalchemy import func, insert
 from ..models import User, Page, Service, BlogPost, Lead
-from ..models import MISTemplate, MISData
+from ..models import MISTemplate, MISData, EmailOutbox
 from ..extensions import db
+from ..utils.lead_archive import archived_counts, archived_monthly, combine_counts
+from ..utils.login_throttle import login_throttle
+from ..utils.user_cache import users_changed
+from ..utils.token_revocation import revoke_user_tokens
+from ..utils.slow_queries import slow_query_log, slow_query_summary
+from ..utils.profiler import REPORT_NAME, list_profiles, profiles_dir
+from ..utils.n_plus_one import allow_repeated_queries
+from ..utils.memory_guard import memory_budget, check_memory, memory_reports, MemoryBudgetExceeded
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -18,7 +26,6 @@ admin_bp = Blueprint('admin', __name__)
 def dashboard():
     """Get dashboard statistics"""
     # Total counts
-    total_leads = Lead.query.count()
     total_pages = Page.query.count()
     total_services = Service.query.count()
     total_posts = BlogPost.query.count()
@@ -27,26 +34,35 @@ def dashboard():
     week_ago = datetime.utcnow() - timedelta(days=7)
     recent_leads = Lead.query.filter(Lead.created_at >= week_ago).count()
     
-    # New leads (unread)
-    new_leads = Lead.query.filter_by(status='new').count()
-    
-    # Leads by status
+    # Leads by status, hot table plus precomputed archive counts
     leads_by_status = db.session.query(
         Lead.status, func.count(Lead.id)
     ).group_by(Lead.status).all()
+    leads_by_status = combine_counts(dict(leads_by_status), archived_counts()[1])
+    total_leads = sum(leads_by_status.values())
+    
+    # New leads (unread)
+    new_leads = leads_by_status.get('new', 0)
     
     # Recent blog views
     total_views = db.session.query(func.sum(BlogPost.views)).scalar() or 0
     
     # Monthly leads (last 6 months)
     six_months_ago = datetime.utcnow() - timedelta(days=180)
+    if db.engine.dialect.name == 'mysql':
+        month = func.date_format(Lead.created_at, '%Y-%m')
+    else:
+        month = func.strftime('%Y-%m', Lead.created_at)
     monthly_leads = db.session.query(
-        func.date_format(Lead.created_at, '%Y-%m').label('month'),
+        month.label('month'),
         func.count(Lead.id)
     ).filter(Lead.created_at >= six_months_ago)\
      .group_by('month')\
      .order_by('month')\
      .all()
+    monthly_leads = sorted(combine_counts(
+        dict(monthly_leads), archived_monthly(six_months_ago.strftime('%Y-%m'))
+    ).items())
     
     # Recent activity
     recent_activity = []
@@ -84,7 +100,7 @@ def dashboard():
             'new_leads': new_leads,
             'total_views': total_views
         },
-        'leads_by_status': {status: count for status, count in leads_by_status},
+        'leads_by_status': leads_by_status,
         'monthly_leads': [{'month': month, 'count': count} for month, count in monthly_leads],
         'recent_activity': recent_activity[:10]
     }), 200
@@ -131,6 +147,8 @@ def create_user():
     
     db.session.add(user)
     db.session.commit()
+    users_changed()
+    login_throttle.forget_unknown(user.email)
     
     return jsonify({'message': 'User created', 'user': user.to_dict()}), 201
 
@@ -157,7 +175,12 @@ def update_user(user_id):
             return jsonify({'error': 'Password must be at least 8 characters'}), 400
         user.set_password(data['password'])
     
+    user.bump_version()
     db.session.commit()
+    users_changed(user.id)
+    login_throttle.forget_unknown(user.email)
+    if 'is_active' in data and not user.is_active:
+        revoke_user_tokens(user.id)
     
     return jsonify({'message': 'User updated', 'user': user.to_dict()}), 200
 
@@ -175,6 +198,8 @@ def delete_user(user_id):
     
     db.session.delete(user)
     db.session.commit()
+    users_changed(user_id)
+    revoke_user_tokens(user_id)
     
     return jsonify({'message': 'User deleted'}), 200
 
@@ -185,10 +210,69 @@ def approve_user(user_id):
     """Approve (activate) a user account"""
     user = User.query.get_or_404(user_id)
     user.is_active = True
+    user.bump_version()
     db.session.commit()
+    users_changed(user.id)
+    login_throttle.forget_unknown(user.email)
     return jsonify({'message': 'User approved', 'user': user.to_dict()}), 200
 
 
+# --- Email Outbox ---
+
+
+@admin_bp.route('/outbox', methods=['GET'])
+@jwt_required()
+def list_outbox():
+    """List queued, sent or dead-lettered emails"""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 20, type=int)
+    status = request.args.get('status')
+    
+    query = EmailOutbox.query
+    if status:
+        query = query.filter_by(status=status)
+    
+    pagination = query.order_by(EmailOutbox.created_at.desc())\
+        .paginate(page=page, per_page=per_page, error_out=False)
+    
+    counts = db.session.query(EmailOutbox.status, func.count(EmailOutbox.id))\
+        .group_by(EmailOutbox.status).all()
+    
+    return jsonify({
+        'emails': [e.to_dict() for e in pagination.items],
+        'counts': {s: c for s, c in counts},
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'current_page': page
+    }), 200
+
+
+@admin_bp.route('/outbox/<int:email_id>/retry', methods=['POST'])
+@jwt_required()
+def retry_outbox_email(email_id):
+    """Requeue a dead-lettered email for immediate delivery"""
+    from ..utils.outbox import outbox_worker
+    
+    entry = EmailOutbox.query.get_or_404(email_id)
+    
+    # Conditional reset, like the worker's claim: only a row that is still dead is requeued
+    requeued = EmailOutbox.query.filter(EmailOutbox.id == email_id, EmailOutbox.status == 'dead')\
+        .update({
+            EmailOutbox.status: 'pending',
+            EmailOutbox.attempts: 0,
+            EmailOutbox.next_attempt_at: datetime.utcnow(),
+        }, synchronize_session=False)
+    if not requeued:
+        db.session.rollback()
+        return jsonify({'error': 'Only dead-lettered emails can be retried'}), 400
+    
+    db.session.commit()
+    db.session.refresh(entry)
+    outbox_worker.notify()
+    
+    return jsonify({'message': 'Email requeued', 'email': entry.to_dict()}), 200
+
+
 # --- MIS Templates and Data ---
 
 
@@ -262,6 +346,8 @@ def list_mis_rows(tpl_id):
 
 @admin_bp.route('/mis/templates/<int:tpl_id>/import', methods=['POST'])
 @jwt_required()
+@memory_budget(413, 'Upload the data as CSV: CSV files are imported row by row without loading the whole file')
+@allow_repeated_queries
 def import_mis_data(tpl_id):
     tpl = MISTemplate.query.get_or_404(tpl_id)
     # Only accept file uploads
@@ -272,20 +358,26 @@ def import_mis_data(tpl_id):
     # support CSV import
     if filename.lower().endswith('.csv') or request.form.get('format') == 'csv':
         import csv, io, json
-        stream = io.StringIO(file.stream.read().decode('utf-8', errors='replace'))
+        # Read the upload row by row and insert in batches, in one transaction
+        stream = io.TextIOWrapper(file.stream, encoding='utf-8', errors='replace', newline='')
         reader = csv.DictReader(stream)
+        batch_size = current_app.config.get('MIS_IMPORT_BATCH_SIZE', 1000)
+        batch = []
         count = 0
         for row in reader:
-            # keep keys that match template columns if possible
-            try:
-                data_obj = {k: v for k, v in row.items()}
-                mis_row = MISData(template_id=tpl.id, data=json.dumps(data_obj))
-                db.session.add(mis_row)
-                count += 1
-            except Exception:
-                continue
+            batch.append({'template_id': tpl.id, 'data': json.dumps(row)})
+            count += 1
+            if len(batch) >= batch_size:
+                db.session.execute(insert(MISData), batch)
+                batch = []
+                check_memory()
+        if batch:
+            db.session.execute(insert(MISData), batch)
         db.session.commit()
         return jsonify({'imported': count}), 200
+    
+    # The other formats are parsed whole; each parser refuses uploads that cannot fit the budget
+    expected = (request.content_length or 0) * current_app.config.get('MEMORY_EXPANSION_FACTOR', 10)
     # Attempt DOCX import if python-docx available
     if filename.lower().endswith('.docx') or request.form.get('format') == 'docx':
         try:
@@ -294,6 +386,7 @@ def import_mis_data(tpl_id):
             Document = None
         if Document:
             import json
+            check_memory(expected)
             doc = Document(file)
             count = 0
             # iterate tables and import rows
@@ -309,6 +402,7 @@ def import_mis_data(tpl_id):
                         count += 1
                     except Exception:
                         continue
+                    check_memory()
             db.session.commit()
             return jsonify({'imported': count}), 200
 
@@ -319,6 +413,7 @@ def import_mis_data(tpl_id):
         pd = None
     if pd and (filename.lower().endswith(('.xls', '.xlsx')) or request.form.get('format') in ('xls', 'xlsx', 'excel')):
         import json
+        check_memory(expected)
         df = pd.read_excel(file)
         count = 0
         for _, row in df.iterrows():
@@ -326,6 +421,7 @@ def import_mis_data(tpl_id):
             mis_row = MISData(template_id=tpl.id, data=json.dumps(data_obj))
             db.session.add(mis_row)
             count += 1
+            check_memory()
         db.session.commit()
         return jsonify({'imported': count}), 200
 
@@ -336,11 +432,11 @@ def import_mis_data(tpl_id):
         except Exception:
             pdfplumber = None
         if pdfplumber:
-            import io, json
-            stream = io.BytesIO(file.stream.read())
+            import json
+            check_memory(expected)
             count = 0
             try:
-                with pdfplumber.open(stream) as pdf:
+                with pdfplumber.open(file.stream) as pdf:
                     for page in pdf.pages:
                         tables = page.extract_tables()
                         for table in tables:
@@ -355,8 +451,11 @@ def import_mis_data(tpl_id):
                                     count += 1
                                 except Exception:
                                     continue
+                            check_memory()
                 db.session.commit()
                 return jsonify({'imported': count}), 200
+            except MemoryBudgetExceeded:
+                raise
             except Exception:
                 return jsonify({'error': 'Failed to parse PDF'}), 500
 
@@ -365,35 +464,56 @@ def import_mis_data(tpl_id):
 
 @admin_bp.route('/mis/templates/<int:tpl_id>/export', methods=['GET'])
 @jwt_required()
+@memory_budget(503, 'Export as CSV (?format=csv): CSV exports are streamed row by row')
 def export_mis_data(tpl_id):
     tpl = MISTemplate.query.get_or_404(tpl_id)
     fmt = request.args.get('format', 'csv').lower()
-    rows = MISData.query.filter_by(template_id=tpl.id).all()
     import json, io, csv
     if fmt == 'csv':
-        output = io.StringIO()
         # determine headers from template columns keys if available
         try:
             cols = json.loads(tpl.columns or '[]')
             headers = [c.get('key') for c in cols if c.get('key')]
         except Exception:
             headers = []
-        writer = csv.writer(output)
-        if headers:
-            writer.writerow(headers)
-            for r in rows:
-                obj = json.loads(r.data or '{}')
-                writer.writerow([obj.get(h, '') for h in headers])
-        else:
-            # fallback: export each row as JSON string per line
-            writer.writerow(['data'])
-            for r in rows:
-                writer.writerow([r.data])
-        output.seek(0)
-        return (output.getvalue(), 200, {
-            'Content-Type': 'text/csv',
-            'Content-Disposition': f'attachment; filename="{tpl.name}.csv"'
-        })
+        data = db.session.query(MISData.data).filter(MISData.template_id == tpl.id)\
+            .order_by(MISData.id).yield_per(current_app.config.get('MIS_EXPORT_CHUNK_SIZE', 1000))
+        
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if headers:
+                writer.writerow(headers)
+                for (value,) in data:
+                    obj = json.loads(value or '{}')
+                    writer.writerow([obj.get(h, '') for h in headers])
+                    if buffer.tell() >= 65536:
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate()
+            else:
+                # fallback: export each row as JSON string per line
+                writer.writerow(['data'])
+                for (value,) in data:
+                    writer.writerow([value])
+                    if buffer.tell() >= 65536:
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate()
+            yield buffer.getvalue()
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename="{tpl.name}.csv"'}
+        )
+    
+    # The other formats are built in memory; refuse exports that cannot fit the budget
+    stored = db.session.query(func.coalesce(func.sum(func.length(MISData.data)), 0))\
+        .filter(MISData.template_id == tpl.id).scalar()
+    check_memory(int(stored) * current_app.config.get('MEMORY_EXPANSION_FACTOR', 10))
+    rows = MISData.query.filter_by(template_id=tpl.id).all()
+    check_memory()
 
     # Excel via pandas if available
     try:
@@ -407,13 +527,16 @@ def export_mis_data(tpl_id):
                 all_objs.append(json.loads(r.data or '{}'))
             except Exception:
                 all_objs.append({})
+        check_memory()
         df = pd.DataFrame(all_objs)
+        check_memory()
         output = io.BytesIO()
         # Use openpyxl engine if available
         try:
             df.to_excel(output, index=False, engine='openpyxl')
         except Exception:
             df.to_excel(output, index=False)
+        check_memory()
         output.seek(0)
         return send_file(
             output,
@@ -449,12 +572,14 @@ def export_mis_data(tpl_id):
                     row_cells = table.add_row().cells
                     for i, h in enumerate(headers):
                         row_cells[i].text = str(obj.get(h, '') or '')
+                    check_memory()
             else:
                 doc.add_paragraph('No structured headers; exported rows follow as JSON:')
                 for r in rows:
                     doc.add_paragraph(r.data)
             bio = io.BytesIO()
             doc.save(bio)
+            check_memory()
             bio.seek(0)
             return send_file(
                 bio,
@@ -501,7 +626,9 @@ def export_mis_data(tpl_id):
                 ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
                 ('GRID', (0,0), (-1,-1), 0.5, colors.black),
             ])
+            check_memory()
             doc.build([tbl])
+            check_memory()
             buf.seek(0)
             return send_file(
                 buf,
@@ -511,3 +638,45 @@ def export_mis_data(tpl_id):
             )
 
     return jsonify({'error': 'Export format not supported'}), 501
+
+
+# --- Diagnostics ---
+
+
+@admin_bp.route('/diagnostics/slow-queries', methods=['GET'])
+@jwt_required()
+def get_slow_queries():
+    """Slow statements seen by this worker, grouped by fingerprint"""
+    return jsonify(slow_query_summary()), 200
+
+
+@admin_bp.route('/diagnostics/slow-queries', methods=['DELETE'])
+@jwt_required()
+def clear_slow_queries():
+    """Empty this worker's slow query buffer"""
+    slow_query_log.clear()
+    return jsonify({'message': 'Slow query log cleared'}), 200
+
+
+@admin_bp.route('/diagnostics/profiles', methods=['GET'])
+@jwt_required()
+def get_profiles():
+    """Saved request profiles, newest first"""
+    return jsonify({'profiles': list_profiles(profiles_dir())}), 200
+
+
+@admin_bp.route('/diagnostics/profiles/<name>', methods=['GET'])
+@jwt_required()
+def download_profile(name):
+    """Download one saved request profile"""
+    if not REPORT_NAME.match(name):
+        return jsonify({'error': 'Profile not found'}), 404
+    
+    return send_from_directory(profiles_dir(), name, as_attachment=True)
+
+
+@admin_bp.route('/diagnostics/memory', methods=['GET'])
+@jwt_required()
+def get_memory_reports():
+    """Memory used by this worker's recent import and export requests"""
+    return jsonify({'reports': memory_reports.recent()}), 200
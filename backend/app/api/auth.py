@@ -6,10 +6,13 @@ from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import (
     create_access_token, create_refresh_token, 
-    jwt_required, get_jwt_identity, get_jwt
+    jwt_required, get_jwt_identity, get_jwt, decode_token
 )
 from ..models.user import User
 from ..extensions import db
+from ..utils.login_throttle import login_throttle
+from ..utils.user_cache import user_cache
+from ..utils.token_revocation import revoke_token
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -28,20 +31,39 @@ def login():
     if not email or not password:
         return jsonify({'error': 'Email and password are required'}), 400
     
-    user = User.query.filter_by(email=email, is_active=True).first()
-    
-    if not user or not user.check_password(password):
+    # Throttled emails and IPs are turned away before any hashing
+    retry_after = login_throttle.retry_after(email, request.remote_addr)
+    if retry_after:
+        response = jsonify({'error': 'Too many failed login attempts. Please try again later.'})
+        response.headers['Retry-After'] = str(retry_after)
+        return response, 429
+    
+    user = None
+    if not login_throttle.is_unknown(email):
+        user = User.query.filter_by(email=email, is_active=True).first()
+        if not user:
+            login_throttle.remember_unknown(email)
+    
+    if not (user.check_password(password) if user else login_throttle.dummy_check(password)):
+        login_throttle.failed(email, request.remote_addr)
         current_app.logger.warning(f'Failed login attempt for email: {email}')
         return jsonify({'error': 'Invalid email or password'}), 401
     
+    login_throttle.succeeded(email)
+    
+    # Upgrade the stored hash to the current policy while we have the password
+    if user.password_needs_rehash():
+        user.set_password(password)
+    
     # Update last login
     user.last_login = datetime.utcnow()
     db.session.commit()
+    user_cache.store(user)
     
     # Create tokens - identity must be a string
     access_token = create_access_token(
         identity=str(user.id),
-        additional_claims={'role': user.role, 'email': user.email}
+        additional_claims=user.token_claims()
     )
     refresh_token = create_refresh_token(identity=str(user.id))
     
@@ -60,14 +82,14 @@ def login():
 def refresh():
     """Refresh access token"""
     identity = get_jwt_identity()
-    user = User.query.get(int(identity))
+    user = user_cache.get(int(identity))
     
     if not user or not user.is_active:
         return jsonify({'error': 'User not found or inactive'}), 401
     
     access_token = create_access_token(
         identity=str(user.id),
-        additional_claims={'role': user.role, 'email': user.email}
+        additional_claims=user.token_claims()
     )
     
     return jsonify({'access_token': access_token}), 200
@@ -78,19 +100,31 @@ def refresh():
 def get_current_user():
     """Get current authenticated user"""
     user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
+    # Served from the cache while the token's user_version is current
+    user = user_cache.get(int(user_id), version=get_jwt().get('user_version'))
     
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    return jsonify({'user': user.to_dict()}), 200
+    return jsonify({'user': user.data}), 200
 
 
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    """Logout user (client should discard tokens)"""
-    # In a production app, you might want to blacklist the token
+    """Logout user by revoking the access token (and refresh token, if sent)"""
+    claims = get_jwt()
+    revoke_token(claims)
+    
+    data = request.get_json(silent=True) or {}
+    if data.get('refresh_token'):
+        try:
+            refresh_claims = decode_token(data['refresh_token'])
+        except Exception:
+            refresh_claims = None
+        if refresh_claims and refresh_claims.get('sub') == claims.get('sub'):
+            revoke_token(refresh_claims)
+    
     return jsonify({'message': 'Logout successful'}), 200
 
 
@@ -98,12 +132,6 @@ def logout():
 @jwt_required()
 def change_password():
     """Change user password"""
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
-    
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
-    
     data = request.get_json()
     current_password = data.get('current_password', '')
     new_password = data.get('new_password', '')
@@ -114,6 +142,13 @@ def change_password():
     if len(new_password) < 8:
         return jsonify({'error': 'New password must be at least 8 characters'}), 400
     
+    # Only a valid request needs the stored hash
+    user_id = get_jwt_identity()
+    user = db.session.get(User, int(user_id))
+    
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    
     if not user.check_password(current_password):
         return jsonify({'error': 'Current password is incorrect'}), 401
     
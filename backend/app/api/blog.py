@@ -3,15 +3,31 @@ FinanceClinics - Blog API
 """
 
 from datetime import datetime
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from slugify import slugify
-from ..models.blogpost import BlogPost
+from sqlalchemy import func
+from sqlalchemy.orm import defer, joinedload
+from ..models.blogpost import BlogPost, PostTag
+from ..models.user import User
 from ..extensions import db
 from ..utils.security import sanitize_html
+from ..utils.content import content_changed, content_deleted
+from ..utils.cache import TTLCache
+from ..utils.bulk import bulk_content, parse_ids, BulkRequestError
+from ..utils.read_model import read_model, json_response
 
 blog_bp = Blueprint('blog', __name__)
 
+# List views never serialize the body, and only need the author's name
+LIST_OPTIONS = (
+    defer(BlogPost.content),
+    joinedload(BlogPost.author).load_only(User.id, User.name),
+)
+
+# Tag counts change only when a post is saved, so cache them between writes
+_tag_counts = TTLCache(maxsize=1)
+
 
 @blog_bp.route('', methods=['GET'])
 def get_posts():
@@ -19,11 +35,19 @@ def get_posts():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     category = request.args.get('category')
+    tag = request.args.get('tag')
+    
+    if read_model.enabled():
+        return json_response(read_model.current().posts_page(page, per_page, category, tag))
     
-    query = BlogPost.query.filter_by(is_published=True)
+    query = BlogPost.query.options(*LIST_OPTIONS).filter_by(is_published=True)
     
     if category:
         query = query.filter_by(category=category)
+    if tag:
+        # Case-insensitive on every backend, like sync_tags and the read model
+        query = query.join(PostTag, PostTag.post_id == BlogPost.id)\
+            .filter(func.lower(PostTag.tag) == tag.lower())
     
     pagination = query.order_by(BlogPost.published_at.desc())\
         .paginate(page=page, per_page=per_page, error_out=False)
@@ -42,6 +66,9 @@ def get_posts():
 @blog_bp.route('/categories', methods=['GET'])
 def get_categories():
     """Get all blog categories"""
+    if read_model.enabled():
+        return json_response(read_model.current().categories)
+    
     categories = db.session.query(BlogPost.category)\
         .filter(BlogPost.is_published == True, BlogPost.category.isnot(None))\
         .distinct()\
@@ -51,11 +78,34 @@ def get_categories():
     }), 200
 
 
+@blog_bp.route('/tags', methods=['GET'])
+def get_tags():
+    """Get tags used by published posts with post counts"""
+    tags = _tag_counts.get('all')
+    
+    if tags is None:
+        rows = db.session.query(PostTag.tag, func.count(PostTag.post_id))\
+            .join(BlogPost, BlogPost.id == PostTag.post_id)\
+            .filter(BlogPost.is_published == True)\
+            .group_by(PostTag.tag)\
+            .order_by(func.count(PostTag.post_id).desc(), PostTag.tag.asc())\
+            .all()
+        tags = [{'tag': tag, 'count': count} for tag, count in rows]
+        _tag_counts.set('all', tags, ttl=current_app.config.get('BLOG_TAGS_CACHE_SECONDS', 300))
+    
+    return jsonify({'tags': tags}), 200
+
+
 @blog_bp.route('/recent', methods=['GET'])
 def get_recent_posts():
     """Get recent blog posts"""
     limit = request.args.get('limit', 5, type=int)
-    posts = BlogPost.query.filter_by(is_published=True)\
+    
+    if read_model.enabled():
+        return json_response(read_model.current().recent_posts(limit))
+    
+    posts = BlogPost.query.options(*LIST_OPTIONS)\
+        .filter_by(is_published=True)\
         .order_by(BlogPost.published_at.desc())\
         .limit(limit)\
         .all()
@@ -87,7 +137,8 @@ def admin_get_posts():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     
-    pagination = BlogPost.query.order_by(BlogPost.created_at.desc())\
+    pagination = BlogPost.query.options(*LIST_OPTIONS)\
+        .order_by(BlogPost.created_at.desc())\
         .paginate(page=page, per_page=per_page, error_out=False)
     
     return jsonify({
@@ -135,9 +186,12 @@ def create_post():
         published_at=datetime.utcnow() if data.get('is_published') else None,
         author_id=user_id
     )
+    post.sync_tags()
     
     db.session.add(post)
     db.session.commit()
+    _tag_counts.clear()
+    content_changed('post', post)
     
     return jsonify({'message': 'Post created', 'post': post.to_dict()}), 201
 
@@ -170,6 +224,7 @@ def update_post(post_id):
         post.category = data['category']
     if 'tags' in data:
         post.tags = data['tags']
+        post.sync_tags()
     if 'meta_title' in data:
         post.meta_title = data['meta_title']
     if 'meta_description' in data:
@@ -177,10 +232,12 @@ def update_post(post_id):
     if 'is_published' in data:
         was_published = post.is_published
         post.is_published = data['is_published']
-        if not was_published and data['is_published']:
+        if not was_published and data['is_published'] and not post.published_at:
             post.published_at = datetime.utcnow()
     
     db.session.commit()
+    _tag_counts.clear()
+    content_changed('post', post)
     
     return jsonify({'message': 'Post updated', 'post': post.to_dict()}), 200
 
@@ -193,5 +250,37 @@ def delete_post(post_id):
     
     db.session.delete(post)
     db.session.commit()
+    _tag_counts.clear()
+    content_deleted('post', post_id)
     
     return jsonify({'message': 'Post deleted'}), 200
+
+
+@blog_bp.route('/admin/bulk', methods=['POST'])
+@jwt_required()
+def bulk_posts():
+    """Publish, unpublish or delete several posts in one transaction"""
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    if data.get('action') == 'delete':
+        # Query.delete skips ORM cascades, so drop the tag rows explicitly
+        try:
+            ids = parse_ids(data)
+        except BulkRequestError as e:
+            return jsonify({'error': str(e)}), 400
+        PostTag.query.filter(PostTag.post_id.in_(ids)).delete(synchronize_session=False)
+    
+    try:
+        results = bulk_content(BlogPost, 'post', data, publish_values={
+            # A post keeps the date it was first published
+            BlogPost.published_at: func.coalesce(BlogPost.published_at, datetime.utcnow()),
+        })
+    except BulkRequestError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    _tag_counts.clear()
+    
+    return jsonify({'results': results}), 200
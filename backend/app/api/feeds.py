@@ -0,0 +1,29 @@
+"""
+FinanceClinics - Sitemap and Feeds API
+"""
+
+from flask import Blueprint, request, make_response
+from ..utils.feeds import FEED_FILES, load_feed
+
+feeds_bp = Blueprint('feeds', __name__)
+
+MIMETYPES = {
+    'sitemap.xml': 'application/xml',
+    'rss.xml': 'application/rss+xml',
+    'atom.xml': 'application/atom+xml',
+}
+
+
+@feeds_bp.route('/<name>', methods=['GET'])
+def get_feed(name):
+    """Serve a pre-generated sitemap or feed with a strong ETag"""
+    if name not in FEED_FILES:
+        return {'error': 'Feed not found'}, 404
+
+    body, etag = load_feed(name)
+
+    response = make_response(body)
+    response.mimetype = MIMETYPES[name]
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response.make_conditional(request)
@@ -3,15 +3,26 @@ FinanceClinics - Leads API (Contact Form)
 """
 
 import re
-from flask import Blueprint, request, jsonify, current_app
+import csv
+import io
+from datetime import datetime, time
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required
-from ..models.lead import Lead
+from ..models.lead import Lead, LeadSubmission
+from ..models.lead_archive import LeadArchive
 from ..extensions import db
-from ..utils.email import send_lead_notification, send_lead_acknowledgment
+from ..utils.outbox import queue_lead_emails, outbox_worker
+from ..utils.lead_search import search_leads
+from ..utils.lead_dedup import normalize_email, normalize_phone, find_open_lead, record_repeat
+from ..utils.spam import spam_filter, issue_form_token, SpamRejected, TOKEN_REASONS
+from ..utils.lead_archive import archived_counts, combine_counts
+from ..utils.bulk import parse_ids, bulk_update, bulk_delete, bulk_results, BulkRequestError
 from .. import limiter
 
 leads_bp = Blueprint('leads', __name__)
 
+LEAD_STATUSES = ('new', 'contacted', 'qualified', 'converted', 'closed')
+
 
 def validate_email(email):
     """Validate email format"""
@@ -19,6 +30,18 @@ def validate_email(email):
     return re.match(pattern, email) is not None
 
 
+def parse_date_arg(name, end_of_day=False):
+    """Parse a YYYY-MM-DD or ISO datetime query arg; raises ValueError if malformed"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        # A bare date as an upper bound includes that whole day
+        parsed = datetime.combine(parsed.date(), time.max)
+    return parsed
+
+
 def validate_phone(phone):
     """Validate phone format (basic)"""
     if not phone:
@@ -28,15 +51,33 @@ def validate_phone(phone):
     return len(cleaned) >= 10 and cleaned.lstrip('+').isdigit()
 
 
+SUBMITTED_MESSAGE = 'Thank you for contacting us! We will get back to you soon.'
+
+
+@leads_bp.route('/token', methods=['GET'])
+def get_form_token():
+    """Signed timestamp the contact form must send back"""
+    return jsonify({'token': issue_form_token()}), 200
+
+
 @leads_bp.route('', methods=['POST'])
 @limiter.limit("5 per 10 minutes")
 def submit_contact():
     """Submit contact form / lead"""
-    data = request.get_json()
+    data = request.get_json(silent=True)
     
-    if not data:
+    if not data or not isinstance(data, dict):
         return jsonify({'error': 'No data provided'}), 400
     
+    # Shed bots before any database or email work
+    try:
+        spam_filter.check(data)
+    except SpamRejected as e:
+        if e.reason in TOKEN_REASONS:
+            return jsonify({'error': 'This form has expired. Please reload the page and try again.'}), 400
+        # Look like a success so bots learn nothing
+        return jsonify({'message': SUBMITTED_MESSAGE}), 201
+    
     # Required fields
     name = data.get('name', '').strip()
     email = data.get('email', '').strip().lower()
@@ -67,11 +108,34 @@ def submit_contact():
     if not privacy_accepted:
         return jsonify({'error': 'You must accept the privacy policy'}), 400
     
+    email_normalized = normalize_email(email)
+    phone_e164 = normalize_phone(phone)
+    
+    # Repeat submissions of an open lead are recorded on it, without new emails
+    existing = find_open_lead(email_normalized, phone_e164, name)
+    if existing:
+        record_repeat(existing, LeadSubmission(
+            name=name,
+            email=email,
+            phone=phone if phone else None,
+            organization=organization if organization else None,
+            message=message,
+            service_interest=service_interest if service_interest else None,
+            ip_address=request.remote_addr,
+        ))
+        current_app.logger.info(f'Repeat submission for lead {existing.id}: {email}')
+        return jsonify({
+            'message': SUBMITTED_MESSAGE,
+            'lead_id': existing.id
+        }), 200
+    
     # Create lead
     lead = Lead(
         name=name,
         email=email,
+        email_normalized=email_normalized,
         phone=phone if phone else None,
+        phone_e164=phone_e164,
         organization=organization if organization else None,
         message=message,
         preferred_contact_time=preferred_contact_time if preferred_contact_time else None,
@@ -83,21 +147,17 @@ def submit_contact():
     )
     
     db.session.add(lead)
-    db.session.commit()
+    db.session.flush()
     
-    # Send email notifications
-    try:
-        send_lead_notification(lead)
-        send_lead_acknowledgment(lead)
-        lead.email_sent = True
-        db.session.commit()
-    except Exception as e:
-        current_app.logger.error(f'Failed to send lead emails: {e}')
+    # Queue email notifications in the same transaction; the outbox worker sends them
+    queue_lead_emails(lead)
+    db.session.commit()
+    outbox_worker.notify()
     
     current_app.logger.info(f'New lead submitted: {email}')
     
     return jsonify({
-        'message': 'Thank you for contacting us! We will get back to you soon.',
+        'message': SUBMITTED_MESSAGE,
         'lead_id': lead.id
     }), 201
 
@@ -127,12 +187,88 @@ def get_leads():
     }), 200
 
 
+@leads_bp.route('/admin/search', methods=['GET'])
+@jwt_required()
+def search_leads_admin():
+    """Search leads by email/name/phone prefix or organization/message text"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    status = request.args.get('status')
+    
+    if not query:
+        return jsonify({'error': 'Search query is required'}), 400
+    if len(query) > 200:
+        return jsonify({'error': 'Search query is too long'}), 400
+    
+    try:
+        hits, next_cursor = search_leads(query, limit=limit, cursor=request.args.get('cursor'), status=status)
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    return jsonify({
+        'leads': [dict(lead.to_dict(), match=match, score=score) for lead, match, score in hits],
+        'next_cursor': next_cursor
+    }), 200
+
+
+@leads_bp.route('/admin/spam-stats', methods=['GET'])
+@jwt_required()
+def get_spam_stats():
+    """Contact submissions shed by the spam filter in this worker"""
+    return jsonify(spam_filter.stats()), 200
+
+
+@leads_bp.route('/admin/archive', methods=['GET'])
+@jwt_required()
+def get_archived_leads():
+    """Query archived leads"""
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 20, type=int), 100)
+    status = request.args.get('status')
+    email = request.args.get('email', '').strip().lower()
+    try:
+        date_from = parse_date_arg('date_from')
+        date_to = parse_date_arg('date_to', end_of_day=True)
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD or ISO 8601'}), 400
+    
+    query = LeadArchive.query
+    if status:
+        query = query.filter(LeadArchive.status == status)
+    if email:
+        query = query.filter(LeadArchive.email == email)
+    if date_from:
+        query = query.filter(LeadArchive.created_at >= date_from)
+    if date_to:
+        query = query.filter(LeadArchive.created_at <= date_to)
+    
+    pagination = query.order_by(LeadArchive.created_at.desc())\
+        .paginate(page=page, per_page=per_page, error_out=False)
+    
+    return jsonify({
+        'leads': [l.to_dict() for l in pagination.items],
+        'total': pagination.total,
+        'pages': pagination.pages,
+        'current_page': page
+    }), 200
+
+
+@leads_bp.route('/admin/archive/<int:lead_id>', methods=['GET'])
+@jwt_required()
+def get_archived_lead(lead_id):
+    """Get archived lead by ID"""
+    lead = LeadArchive.query.get_or_404(lead_id)
+    submissions = [s.to_dict() for s in LeadSubmission.for_lead(lead.id)]
+    return jsonify({'lead': dict(lead.to_dict(), submissions=submissions)}), 200
+
+
 @leads_bp.route('/admin/<int:lead_id>', methods=['GET'])
 @jwt_required()
 def get_lead(lead_id):
     """Get lead by ID"""
     lead = Lead.query.get_or_404(lead_id)
-    return jsonify({'lead': lead.to_dict()}), 200
+    submissions = [s.to_dict() for s in LeadSubmission.for_lead(lead.id)]
+    return jsonify({'lead': dict(lead.to_dict(), submissions=submissions)}), 200
 
 
 @leads_bp.route('/admin/<int:lead_id>', methods=['PUT'])
@@ -143,7 +279,7 @@ def update_lead(lead_id):
     data = request.get_json()
     
     if 'status' in data:
-        if data['status'] not in ['new', 'contacted', 'qualified', 'converted', 'closed']:
+        if data['status'] not in LEAD_STATUSES:
             return jsonify({'error': 'Invalid status'}), 400
         lead.status = data['status']
     
@@ -161,40 +297,83 @@ def delete_lead(lead_id):
     """Delete lead"""
     lead = Lead.query.get_or_404(lead_id)
     
+    LeadSubmission.query.filter_by(lead_id=lead.id).delete(synchronize_session=False)
     db.session.delete(lead)
     db.session.commit()
     
     return jsonify({'message': 'Lead deleted'}), 200
 
 
-@leads_bp.route('/admin/export', methods=['GET'])
+@leads_bp.route('/admin/bulk', methods=['POST'])
 @jwt_required()
-def export_leads():
-    """Export leads to CSV"""
-    import csv
-    import io
-    from flask import Response
+def bulk_leads():
+    """Set the status of, or delete, several leads in one transaction"""
+    data = request.get_json()
     
-    status = request.args.get('status')
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
     
-    query = Lead.query
-    if status:
-        query = query.filter_by(status=status)
+    action = data.get('action')
+    try:
+        ids = parse_ids(data)
+    except BulkRequestError as e:
+        return jsonify({'error': str(e)}), 400
     
-    leads = query.order_by(Lead.created_at.desc()).all()
+    if action == 'set_status':
+        if data.get('status') not in LEAD_STATUSES:
+            return jsonify({'error': 'Invalid status'}), 400
+        found = bulk_update(Lead, ids, {Lead.status: data['status']})
+        outcome = 'updated'
+    elif action == 'delete':
+        found = bulk_delete(Lead, ids)
+        LeadSubmission.query.filter(LeadSubmission.lead_id.in_(found))\
+            .delete(synchronize_session=False)
+        outcome = 'deleted'
+    else:
+        return jsonify({'error': 'Invalid action'}), 400
     
-    # Create CSV
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(Lead.csv_headers())
+    db.session.commit()
     
-    for lead in leads:
-        writer.writerow(lead.to_csv_row())
+    return jsonify({'results': bulk_results(ids, found, outcome)}), 200
+
+
+@leads_bp.route('/admin/export', methods=['GET'])
+@jwt_required()
+def export_leads():
+    """Export leads to CSV, streamed from a server-side cursor"""
+    status = request.args.get('status')
+    try:
+        date_from = parse_date_arg('date_from')
+        date_to = parse_date_arg('date_to', end_of_day=True)
+    except ValueError:
+        return jsonify({'error': 'Dates must be YYYY-MM-DD or ISO 8601'}), 400
     
-    output.seek(0)
+    # Plain tuples of the exported columns, no ORM objects
+    query = db.session.query(*Lead.csv_columns())
+    if status:
+        query = query.filter(Lead.status == status)
+    if date_from:
+        query = query.filter(Lead.created_at >= date_from)
+    if date_to:
+        query = query.filter(Lead.created_at <= date_to)
+    
+    rows = query.order_by(Lead.created_at.desc())\
+        .yield_per(current_app.config.get('LEADS_EXPORT_CHUNK_SIZE', 1000))
+    
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(Lead.csv_headers())
+        for row in rows:
+            writer.writerow(Lead.format_csv_row(row))
+            if buffer.tell() >= 65536:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
     
     return Response(
-        output.getvalue(),
+        stream_with_context(generate()),
         mimetype='text/csv',
         headers={'Content-Disposition': 'attachment; filename=leads_export.csv'}
     )
@@ -207,13 +386,15 @@ def get_lead_stats():
     from sqlalchemy import func
     from datetime import datetime, timedelta
     
-    # Total leads
-    total = Lead.query.count()
-    
-    # Leads by status
+    # Leads by status, hot table plus precomputed archive counts
     by_status = db.session.query(
         Lead.status, func.count(Lead.id)
     ).group_by(Lead.status).all()
+    archived_total, archived_by_status = archived_counts()
+    by_status = combine_counts(dict(by_status), archived_by_status)
+    
+    # Total leads
+    total = sum(by_status.values())
     
     # Recent leads (last 7 days)
     week_ago = datetime.utcnow() - timedelta(days=7)
@@ -225,7 +406,8 @@ def get_lead_stats():
     
     return jsonify({
         'total': total,
-        'by_status': {status: count for status, count in by_status},
+        'archived': archived_total,
+        'by_status': by_status,
         'recent_7_days': recent,
         'this_month': this_month
     }), 200
@@ -0,0 +1,36 @@
+"""
+FinanceClinics - Metrics API
+"""
+
+import hmac
+from flask import Blueprint, Response, request, jsonify, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from ..utils.metrics import metrics, collect, render, metrics_dir
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _authorized():
+    """A scraper's METRICS_TOKEN bearer token, or an admin's access token"""
+    token = current_app.config.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:], token):
+        return True
+    try:
+        verify_jwt_in_request()
+    except (JWTExtendedException, PyJWTError):
+        return False
+    return get_jwt().get('role') == 'admin'
+
+
+@metrics_bp.route('', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics merged across all workers"""
+    if not _authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    directory = metrics_dir()
+    metrics.flush(directory, force=True)
+    return Response(render(collect(directory)), mimetype='text/plain; version=0.0.4')
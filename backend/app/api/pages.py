@@ -5,9 +5,13 @@ FinanceClinics - Pages API
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from slugify import slugify
+from sqlalchemy.orm import defer
 from ..models.page import Page
 from ..extensions import db
 from ..utils.security import sanitize_html
+from ..utils.content import content_changed, content_deleted
+from ..utils.read_model import read_model, json_response
+from ..utils.bulk import bulk_content, BulkRequestError
 
 pages_bp = Blueprint('pages', __name__)
 
@@ -15,7 +19,11 @@ pages_bp = Blueprint('pages', __name__)
 @pages_bp.route('', methods=['GET'])
 def get_pages():
     """Get all published pages"""
-    pages = Page.query.filter_by(is_published=True)\
+    if read_model.enabled():
+        return json_response(read_model.current().pages)
+    
+    pages = Page.query.options(defer(Page.content))\
+        .filter_by(is_published=True)\
         .order_by(Page.sort_order.asc())\
         .all()
     return jsonify({
@@ -26,6 +34,12 @@ def get_pages():
 @pages_bp.route('/<slug>', methods=['GET'])
 def get_page(slug):
     """Get page by slug"""
+    if read_model.enabled():
+        body = read_model.current().page_by_slug.get(slug)
+        if body is None:
+            return jsonify({'error': 'Page not found'}), 404
+        return json_response(body)
+    
     page = Page.query.filter_by(slug=slug, is_published=True).first()
     
     if not page:
@@ -39,7 +53,9 @@ def get_page(slug):
 @jwt_required()
 def admin_get_pages():
     """Get all pages for admin"""
-    pages = Page.query.order_by(Page.sort_order.asc()).all()
+    pages = Page.query.options(defer(Page.content))\
+        .order_by(Page.sort_order.asc())\
+        .all()
     return jsonify({
         'pages': [p.to_dict(include_content=False) for p in pages]
     }), 200
@@ -86,6 +102,7 @@ def create_page():
     
     db.session.add(page)
     db.session.commit()
+    content_changed('page', page)
     
     return jsonify({'message': 'Page created', 'page': page.to_dict()}), 201
 
@@ -128,6 +145,7 @@ def update_page(page_id):
         page.template = data['template']
     
     db.session.commit()
+    content_changed('page', page)
     
     return jsonify({'message': 'Page updated', 'page': page.to_dict()}), 200
 
@@ -140,5 +158,23 @@ def delete_page(page_id):
     
     db.session.delete(page)
     db.session.commit()
+    content_deleted('page', page_id)
     
     return jsonify({'message': 'Page deleted'}), 200
+
+
+@pages_bp.route('/admin/bulk', methods=['POST'])
+@jwt_required()
+def bulk_pages():
+    """Publish, unpublish, reorder or delete several pages in one transaction"""
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    try:
+        results = bulk_content(Page, 'page', data)
+    except BulkRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'results': results}), 200
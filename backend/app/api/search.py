@@ -0,0 +1,31 @@
+"""
+FinanceClinics - Site Search API
+"""
+
+from flask import Blueprint, request, jsonify
+from ..utils.search import search, SEARCH_SOURCES
+
+search_bp = Blueprint('search', __name__)
+
+
+@search_bp.route('', methods=['GET'])
+def site_search():
+    """Search published pages, services and blog posts"""
+    query = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 50)
+    kind = request.args.get('type')
+
+    if not query:
+        return jsonify({'error': 'Search query is required'}), 400
+    if len(query) > 200:
+        return jsonify({'error': 'Search query is too long'}), 400
+    if kind and kind not in SEARCH_SOURCES:
+        return jsonify({'error': 'Invalid search type'}), 400
+
+    results = search(query, limit=limit, kinds={kind} if kind else None)
+
+    return jsonify({
+        'query': query,
+        'results': results,
+        'total': len(results)
+    }), 200
@@ -5,9 +5,13 @@ FinanceClinics - Services API
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from slugify import slugify
+from sqlalchemy.orm import defer
 from ..models.service import Service
 from ..extensions import db
 from ..utils.security import sanitize_html
+from ..utils.read_model import read_model, json_response
+from ..utils.content import content_changed, content_deleted
+from ..utils.bulk import bulk_content, BulkRequestError
 
 services_bp = Blueprint('services', __name__)
 
@@ -15,7 +19,11 @@ services_bp = Blueprint('services', __name__)
 @services_bp.route('', methods=['GET'])
 def get_services():
     """Get all published services"""
-    services = Service.query.filter_by(is_published=True)\
+    if read_model.enabled():
+        return json_response(read_model.current().services)
+    
+    services = Service.query.options(defer(Service.description))\
+        .filter_by(is_published=True)\
         .order_by(Service.sort_order.asc())\
         .all()
     return jsonify({
@@ -26,7 +34,11 @@ def get_services():
 @services_bp.route('/featured', methods=['GET'])
 def get_featured_services():
     """Get featured services"""
-    services = Service.query.filter_by(is_published=True, is_featured=True)\
+    if read_model.enabled():
+        return json_response(read_model.current().featured_services)
+    
+    services = Service.query.options(defer(Service.description))\
+        .filter_by(is_published=True, is_featured=True)\
         .order_by(Service.sort_order.asc())\
         .all()
     return jsonify({
@@ -37,6 +49,12 @@ def get_featured_services():
 @services_bp.route('/<slug>', methods=['GET'])
 def get_service(slug):
     """Get service by slug"""
+    if read_model.enabled():
+        body = read_model.current().service_by_slug.get(slug)
+        if body is None:
+            return jsonify({'error': 'Service not found'}), 404
+        return json_response(body)
+    
     service = Service.query.filter_by(slug=slug, is_published=True).first()
     
     if not service:
@@ -95,6 +113,7 @@ def create_service():
     
     db.session.add(service)
     db.session.commit()
+    content_changed('service', service)
     
     return jsonify({'message': 'Service created', 'service': service.to_dict()}), 201
 
@@ -139,6 +158,7 @@ def update_service(service_id):
         service.sort_order = data['sort_order']
     
     db.session.commit()
+    content_changed('service', service)
     
     return jsonify({'message': 'Service updated', 'service': service.to_dict()}), 200
 
@@ -151,5 +171,23 @@ def delete_service(service_id):
     
     db.session.delete(service)
     db.session.commit()
+    content_deleted('service', service_id)
     
     return jsonify({'message': 'Service deleted'}), 200
+
+
+@services_bp.route('/admin/bulk', methods=['POST'])
+@jwt_required()
+def bulk_services():
+    """Publish, unpublish, reorder or delete several services in one transaction"""
+    data = request.get_json()
+    
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    
+    try:
+        results = bulk_content(Service, 'service', data)
+    except BulkRequestError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'results': results}), 200
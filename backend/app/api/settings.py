@@ -6,6 +6,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from ..models.setting import Setting
 from ..extensions import db
+from ..utils.read_model import read_model, json_response
+from ..utils.settings_cache import settings_cache, upsert_settings, bump_settings_version
 
 settings_bp = Blueprint('settings', __name__)
 
@@ -13,18 +15,10 @@ settings_bp = Blueprint('settings', __name__)
 @settings_bp.route('/public', methods=['GET'])
 def get_public_settings():
     """Get public site settings"""
-    public_keys = [
-        'site_name', 'site_tagline', 'site_description',
-        'contact_email', 'contact_phone', 'contact_address',
-        'social_facebook', 'social_twitter', 'social_linkedin',
-        'google_analytics_id', 'footer_text'
-    ]
+    if read_model.enabled():
+        return json_response(read_model.current().public_settings)
     
-    settings = Setting.query.filter(Setting.key.in_(public_keys)).all()
-    
-    return jsonify({
-        'settings': {s.key: Setting.get_value(s.key) for s in settings}
-    }), 200
+    return jsonify({'settings': settings_cache.public()}), 200
 
 
 @settings_bp.route('/admin', methods=['GET'])
@@ -55,26 +49,15 @@ def update_settings():
     if not data or 'settings' not in data:
         return jsonify({'error': 'No settings provided'}), 400
     
-    for key, value in data['settings'].items():
-        setting = Setting.query.filter_by(key=key).first()
-        
-        if setting:
-            if setting.type == 'json' and not isinstance(value, str):
-                import json
-                setting.value = json.dumps(value)
-            else:
-                setting.value = str(value) if value is not None else ''
-        else:
-            # Create new setting
-            new_setting = Setting(
-                key=key,
-                value=str(value) if value is not None else '',
-                type='string',
-                category='general'
-            )
-            db.session.add(new_setting)
-    
-    db.session.commit()
+    # Existing keys keep their type; new ones are created as strings
+    settings = data['settings']
+    types = dict(db.session.query(Setting.key, Setting.type).filter(Setting.key.in_(settings)).all())
+    upsert_settings([{
+        'key': key,
+        'value': Setting.serialize_value(value, types.get(key) or 'string'),
+        'type': 'string',
+        'category': 'general',
+    } for key, value in settings.items()])
     
     return jsonify({'message': 'Settings updated'}), 200
 
@@ -114,6 +97,7 @@ def update_setting(key):
         db.session.add(setting)
     
     db.session.commit()
+    bump_settings_version()
     
     return jsonify({'message': 'Setting updated', 'setting': setting.to_dict()}), 200
 
@@ -126,5 +110,6 @@ def delete_setting(key):
     
     db.session.delete(setting)
     db.session.commit()
+    bump_settings_version()
     
     return jsonify({'message': 'Setting deleted'}), 200
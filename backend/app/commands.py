@@ -0,0 +1,464 @@
+"""
+FinanceClinics - Flask CLI Commands
+
+Run with `flask <command>` from the backend directory.
+"""
+
+import os
+import time
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import inspect, text
+from .extensions import db
+
+
+def _add_missing_columns(table, columns):
+    """ALTER TABLE ... ADD COLUMN for each (name, definition) the table lacks"""
+    existing = {c['name'] for c in inspect(db.engine).get_columns(table)}
+    with db.engine.begin() as conn:
+        for name, definition in columns:
+            if name not in existing:
+                conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {definition}'))
+                click.echo(f'Added {table}.{name}')
+
+
+def _add_missing_indexes(table, indexes, kind=''):
+    """CREATE [kind] INDEX for each (name, columns) that has no index on exactly those columns yet"""
+    indexed = {tuple(i['column_names']) for i in inspect(db.engine).get_indexes(table)}
+    prefix = f'{kind} ' if kind else ''
+    with db.engine.begin() as conn:
+        for name, columns in indexes:
+            columns = (columns,) if isinstance(columns, str) else tuple(columns)
+            if columns not in indexed:
+                conn.execute(text(f'CREATE {prefix}INDEX {name} ON {table} ({", ".join(columns)})'))
+                click.echo(f'Added {prefix.lower()}index {name} on {table}')
+
+
+def _add_missing_fulltext_indexes(table, indexes):
+    """FULLTEXT variant of _add_missing_indexes; MySQL only (SQLite search builds its own FTS5 tables)"""
+    if db.engine.dialect.name == 'mysql':
+        _add_missing_indexes(table, indexes, kind='FULLTEXT')
+
+
+def _add_missing_foreign_key(table, column, target, ondelete):
+    """ALTER TABLE ... ADD FOREIGN KEY unless the column already references `target`"""
+    if db.engine.dialect.name == 'sqlite':
+        # SQLite cannot add constraints; the column definition carries the REFERENCES
+        return
+    target_table, target_column = target.split('.')
+    for fk in inspect(db.engine).get_foreign_keys(table):
+        if fk['constrained_columns'] == [column] and fk['referred_table'] == target_table:
+            return
+    with db.engine.begin() as conn:
+        conn.execute(text(f'ALTER TABLE {table} ADD FOREIGN KEY ({column}) '
+                          f'REFERENCES {target_table}({target_column}) ON DELETE {ondelete}'))
+    click.echo(f'Added foreign key {table}.{column} -> {target}')
+
+
+def _upgrade_outbox():
+    # digest_id arrived with notification digests, after the outbox itself
+    _add_missing_columns('email_outbox', [
+        ('digest_id', 'INT REFERENCES email_outbox(id) ON DELETE SET NULL'),
+    ])
+    _add_missing_indexes('email_outbox', [('idx_digest', 'digest_id')])
+    _add_missing_foreign_key('email_outbox', 'digest_id', 'email_outbox.id', 'SET NULL')
+
+
+def _upgrade_leads():
+    # Columns for lead deduplication, as in db/schema.sql
+    _add_missing_columns('leads', [
+        ('email_normalized', 'VARCHAR(120)'),
+        ('phone_e164', 'VARCHAR(20)'),
+        ('submission_count', 'INT NOT NULL DEFAULT 1'),
+        ('last_submitted_at', 'DATETIME'),
+    ])
+    _add_missing_indexes('leads', [
+        ('idx_email_normalized', 'email_normalized'),
+        ('idx_phone_e164', 'phone_e164'),
+    ])
+
+
+@click.command('upgrade-db')
+@with_appcontext
+def upgrade_db():
+    """Bring an existing database up to db/schema.sql; safe to run repeatedly"""
+    from .models.blogpost import BlogPost, PostTag
+    from .models.cache_version import CacheVersion
+    from .models.email_outbox import EmailOutbox
+    from .models.lead import LeadSubmission
+    from .models.revoked_token import RevokedToken
+
+    new_post_tags = not inspect(db.engine).has_table(PostTag.__tablename__)
+    for table in (CacheVersion.__table__, RevokedToken.__table__, EmailOutbox.__table__,
+                  LeadSubmission.__table__, PostTag.__table__):
+        table.create(db.engine, checkfirst=True)
+
+    _add_missing_columns('users', [('version', 'INT NOT NULL DEFAULT 1')])
+    _upgrade_leads()
+    _upgrade_outbox()
+
+    # Site search, as in db/schema.sql
+    _add_missing_fulltext_indexes('pages', [('ft_search', ('title', 'content'))])
+    _add_missing_fulltext_indexes('services', [('ft_search', ('title', 'short_description', 'description'))])
+    _add_missing_fulltext_indexes('blog_posts', [('ft_search', ('title', 'excerpt', 'content'))])
+
+    # Admin lead search: prefix lookups and full-text matches
+    _add_missing_indexes('leads', [('idx_name', 'name'), ('idx_phone', 'phone')])
+    _add_missing_fulltext_indexes('leads', [('ft_lead_search', ('organization', 'message'))])
+
+    click.echo('Database upgrade complete')
+    if new_post_tags and db.session.query(BlogPost.id).limit(1).first():
+        click.echo('Run `flask backfill-post-tags` to index the tags of existing posts')
+
+
+@click.command('backfill-post-tags')
+@click.option('--batch-size', default=500, show_default=True, help='Posts per transaction')
+@with_appcontext
+def backfill_post_tags(batch_size):
+    """Create post_tags if missing and fill it from blog_posts.tags"""
+    from .models.blogpost import BlogPost, PostTag
+
+    PostTag.__table__.create(db.engine, checkfirst=True)
+
+    last_id = 0
+    total = 0
+    while True:
+        posts = BlogPost.query.filter(BlogPost.id > last_id)\
+            .order_by(BlogPost.id.asc())\
+            .limit(batch_size)\
+            .all()
+        if not posts:
+            break
+        for post in posts:
+            post.sync_tags()
+        db.session.commit()
+        last_id = posts[-1].id
+        total += len(posts)
+        click.echo(f'Indexed tags for {total} posts')
+
+    click.echo('Post tag backfill complete')
+
+
+@click.command('backfill-lead-dedup')
+@click.option('--batch-size', default=1000, show_default=True, help='Leads per transaction')
+@with_appcontext
+def backfill_lead_dedup(batch_size):
+    """Add the lead dedup columns if missing and fill them on existing leads"""
+    from .models.lead import Lead, LeadSubmission
+    from .utils.lead_dedup import normalize_email, normalize_phone
+
+    _upgrade_leads()
+    LeadSubmission.__table__.create(db.engine, checkfirst=True)
+
+    country_code = current_app.config.get('LEAD_DEFAULT_COUNTRY_CODE', '91')
+    last_id = 0
+    total = 0
+    while True:
+        rows = db.session.query(Lead.id, Lead.email, Lead.phone, Lead.created_at, Lead.updated_at)\
+            .filter(Lead.id > last_id)\
+            .order_by(Lead.id.asc())\
+            .limit(batch_size)\
+            .all()
+        if not rows:
+            break
+        db.session.bulk_update_mappings(Lead, [{
+            'id': lead_id,
+            'email_normalized': normalize_email(email),
+            'phone_e164': normalize_phone(phone, country_code),
+            'last_submitted_at': created_at,
+            'updated_at': updated_at,
+        } for lead_id, email, phone, created_at, updated_at in rows])
+        db.session.commit()
+        last_id = rows[-1].id
+        total += len(rows)
+        click.echo(f'Normalized {total} leads')
+
+    click.echo('Lead dedup backfill complete')
+
+
+@click.command('archive-leads')
+@click.option('--days', default=None, type=int, help='Archive leads older than this (default LEAD_ARCHIVE_AFTER_DAYS)')
+@click.option('--batch-size', default=500, show_default=True, help='Leads per transaction')
+@with_appcontext
+def archive_leads_command(days, batch_size):
+    """Move old closed/converted leads to leads_archive"""
+    from .models.lead_archive import LeadArchive, LeadArchiveStat
+    from .utils.lead_archive import archive_leads
+
+    LeadArchive.__table__.create(db.engine, checkfirst=True)
+    LeadArchiveStat.__table__.create(db.engine, checkfirst=True)
+
+    total = archive_leads(days, batch_size, on_batch=lambda n: click.echo(f'Archived {n} leads'))
+    click.echo(f'Lead archival complete, {total} leads moved')
+
+
+@click.command('outbox-worker')
+@click.option('--once', is_flag=True, help='Deliver what is due and exit')
+@click.option('--interval', default=None, type=float, help='Seconds between polls')
+@with_appcontext
+def outbox_worker(once, interval):
+    """Deliver queued emails from the outbox"""
+    from .utils.outbox import deliver_pending
+
+    interval = interval or current_app.config.get('EMAIL_OUTBOX_POLL_SECONDS', 10)
+    while True:
+        try:
+            sent, failed = deliver_pending()
+        except Exception as e:
+            db.session.rollback()
+            click.echo(f'Outbox delivery error: {e}', err=True)
+            sent, failed = 0, 0
+        if sent or failed:
+            click.echo(f'Sent {sent}, failed {failed}')
+            continue
+        if once:
+            break
+        time.sleep(interval)
+
+
+@click.command('mail-bench')
+@click.option('--count', default=100, show_default=True, help='Messages per run')
+@click.option('--server', default='localhost', show_default=True, help='SMTP host to send to')
+@click.option('--port', default=1025, show_default=True, help='SMTP port to send to')
+@click.option('--to', 'recipient', default='bench@example.com', show_default=True)
+@with_appcontext
+def mail_bench(count, server, port, recipient):
+    """Compare per-message SMTP connections with the pooled connection.
+
+    Point it at a local SMTP sink, e.g. `python -m aiosmtpd -n -l localhost:1025`.
+    """
+    from flask_mail import Message
+    from .extensions import mail
+    from .utils.email import smtp_pool, send_many
+
+    current_app.config.update(
+        MAIL_SERVER=server, MAIL_PORT=port, MAIL_USE_TLS=False, MAIL_USE_SSL=False,
+        MAIL_USERNAME=None, MAIL_PASSWORD=None, MAIL_SUPPRESS_SEND=False, TESTING=False
+    )
+    mail.init_app(current_app)
+
+    def messages():
+        return [Message(subject=f'Benchmark {i}', recipients=[recipient], body='benchmark')
+                for i in range(count)]
+
+    batch = messages()
+    started = time.perf_counter()
+    for msg in batch:
+        mail.send(msg)
+    per_message = time.perf_counter() - started
+
+    batch = messages()
+    started = time.perf_counter()
+    errors = send_many(batch)
+    pooled = time.perf_counter() - started
+    smtp_pool.close()
+
+    click.echo(f'Connection per message: {count / per_message:8.1f} msg/s')
+    click.echo(f'Pooled connection:      {count / pooled:8.1f} msg/s '
+               f'({sum(e is not None for e in errors)} failed)')
+
+
+@click.command('ratelimit-bench')
+@click.option('--hits', default=2000, show_default=True, help='Rate limit hits per storage')
+@click.option('--processes', default=4, show_default=True, help='Workers in the cross-process check')
+@click.option('--limit', default=100, show_default=True, help='Limit shared by the workers')
+@with_appcontext
+def ratelimit_bench(hits, processes, limit):
+    """Time a limiter hit per storage and check the limit holds across processes."""
+    import multiprocessing
+    import tempfile
+    from limits import parse
+    from limits.storage import storage_from_string
+    from limits.strategies import MovingWindowRateLimiter
+
+    tmpdir = tempfile.mkdtemp()
+    uris = ['memory://', f'sqlite:///{os.path.join(tmpdir, "bench.db")}']
+    configured = current_app.config.get('RATELIMIT_STORAGE_URI')
+    if configured and configured not in uris:
+        uris.append(configured)
+
+    # Enough headroom that every hit is recorded, the slowest path
+    item = parse(f'{hits * 2} per hour')
+    for uri in uris:
+        limiter = MovingWindowRateLimiter(storage_from_string(uri))
+        started = time.perf_counter()
+        for i in range(hits):
+            limiter.hit(item, 'bench', str(i % 50))
+        elapsed = time.perf_counter() - started
+        click.echo(f'{elapsed / hits * 1e6:8.1f} us per hit  {uri}')
+
+    uri = uris[1]
+    shared = parse(f'{limit} per minute')
+    with multiprocessing.get_context('fork').Pool(processes) as pool:
+        accepted = sum(pool.starmap(_ratelimit_worker, [(uri, shared, limit)] * processes))
+    click.echo(f'{processes} processes x {limit} hits against "{shared}": {accepted} accepted '
+               f'({"ok" if accepted == limit else "LIMIT NOT HELD"})')
+
+
+def _ratelimit_worker(uri, item, attempts):
+    from limits.storage import storage_from_string
+    from limits.strategies import MovingWindowRateLimiter
+    limiter = MovingWindowRateLimiter(storage_from_string(uri))
+    return sum(limiter.hit(item, 'shared') for _ in range(attempts))
+
+
+BENCH_FIRST_NAMES = ('Asha', 'Priya', 'Rahul', 'Meera', 'Vikram', 'Anita', 'Sanjay', 'Kavya', 'Arjun', 'Nisha')
+BENCH_LAST_NAMES = ('Rao', 'Sharma', 'Iyer', 'Patel', 'Nair', 'Gupta', 'Reddy', 'Menon', 'Das', 'Kapoor')
+BENCH_WORDS = ('hospital', 'clinic', 'funding', 'loan', 'equipment', 'expansion', 'working', 'capital',
+               'diagnostic', 'centre', 'nursing', 'home', 'pharmacy', 'insurance', 'billing', 'audit')
+# Messages draw words with Zipf-like frequencies, so a search term matches a
+# realistic share of leads rather than most of them
+BENCH_VOCABULARY = BENCH_WORDS + tuple(f'term{i}' for i in range(5000))
+
+
+def _bench_leads(count, batch_size=10000):
+    """Insert `count` synthetic leads with source='bench', in batches"""
+    import itertools
+    import random
+    from datetime import datetime
+    from .models.lead import Lead
+
+    rng = random.Random(42)
+    weights = list(itertools.accumulate(1 / rank for rank in range(2, len(BENCH_VOCABULARY) + 2)))
+    now = datetime.utcnow()
+    for start in range(0, count, batch_size):
+        rows = []
+        for i in range(start, min(start + batch_size, count)):
+            first, last = rng.choice(BENCH_FIRST_NAMES), rng.choice(BENCH_LAST_NAMES)
+            email = f'{first.lower()}.{last.lower()}{i}@bench.example'
+            phone = f'+9198{rng.randrange(10 ** 8):08d}'
+            rows.append({
+                'name': f'{first} {last}', 'email': email, 'email_normalized': email,
+                'phone': phone, 'phone_e164': phone,
+                'organization': f'{last} {rng.choice(BENCH_WORDS).title()} {rng.choice(BENCH_WORDS).title()}',
+                'message': ' '.join(rng.choices(BENCH_VOCABULARY, cum_weights=weights, k=12)),
+                'source': 'bench', 'status': 'new', 'submission_count': 1,
+                'last_submitted_at': now, 'created_at': now, 'updated_at': now,
+            })
+        db.session.execute(Lead.__table__.insert(), rows)
+        db.session.commit()
+
+
+def _explain(statement, parameters):
+    """Query plan lines for one captured statement"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        rows = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)
+        return [row[-1] for row in rows]
+    if dialect == 'mysql':
+        rows = db.session.connection().exec_driver_sql(f'EXPLAIN {statement}', parameters).mappings()
+        return [f'{row["table"]}: {row["type"]} key={row["key"]} rows={row["rows"]}' for row in rows]
+    return []
+
+
+@click.command('lead-search-bench')
+@click.option('--leads', default=1000000, show_default=True, help='Synthetic leads to add first')
+@click.option('--queries', default=200, show_default=True, help='Searches timed per query shape')
+@click.option('--target-ms', default=50.0, show_default=True, help='p95 budget for one search')
+@click.option('--keep', is_flag=True, help='Leave the synthetic leads in place')
+@with_appcontext
+def lead_search_bench(leads, queries, target_ms, keep):
+    """Time admin lead searches per query shape and show the plan each one uses.
+
+    Adds synthetic leads (source='bench') to the configured database and
+    deletes them afterwards; run it against a staging copy, not production.
+    """
+    from sqlalchemy import event
+    from .models.lead import Lead
+    from .utils.lead_search import search_leads
+
+    if leads:
+        started = time.perf_counter()
+        _bench_leads(leads)
+        click.echo(f'Added {leads} leads in {time.perf_counter() - started:.1f}s')
+    total = db.session.query(db.func.count(Lead.id)).scalar()
+    click.echo(f'Searching {total} leads')
+
+    newest_email = db.session.query(Lead.email).order_by(Lead.id.desc()).limit(1).scalar() or 'asha@'
+    shapes = [
+        ('email', newest_email.split('@')[0] + '@'),
+        ('name', 'Meera Na'),
+        ('name', 'priya.sharma1'),
+        ('phone', '+91 9812'),
+        ('text', 'diagnostic expansion'),
+        ('text', 'hospital'),
+    ]
+    failed = False
+    try:
+        for shape, query in shapes:
+            # Warm up: the first SQLite text search builds the FTS5 index
+            _, next_page = search_leads(query)
+
+            captured = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                captured.append((statement, parameters))
+            event.listen(db.engine, 'before_cursor_execute', capture)
+            try:
+                search_leads(query)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', capture)
+
+            timings = []
+            for i in range(queries):
+                started = time.perf_counter()
+                # Every other search asks for the next page, as the admin list does
+                search_leads(query, cursor=next_page if i % 2 else None)
+                timings.append((time.perf_counter() - started) * 1000)
+                db.session.rollback()
+            timings.sort()
+            p50 = timings[len(timings) // 2]
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            verdict = 'ok' if p95 <= target_ms else 'OVER TARGET'
+            failed = failed or p95 > target_ms
+            click.echo(f'{shape:<6} {query!r:<24} p50 {p50:7.2f} ms  p95 {p95:7.2f} ms  '
+                       f'max {timings[-1]:7.2f} ms  {verdict}')
+            for statement, parameters in captured:
+                for line in _explain(statement, parameters):
+                    click.echo(f'         {line}')
+    finally:
+        if leads and not keep:
+            Lead.query.filter_by(source='bench').delete(synchronize_session=False)
+            db.session.commit()
+    if failed:
+        click.echo(f'p95 over {target_ms:g} ms for at least one query shape', err=True)
+
+
+@click.command('bench-hashers')
+@click.option('--seconds', default=2.0, show_default=True, help='Time spent per scheme')
+@click.option('--budget-ms', default=250.0, show_default=True, help='Target time for one login hash')
+@with_appcontext
+def bench_hashers(seconds, budget_ms):
+    """Report hashes per second for each password hashing scheme on this host."""
+    from .utils.passwords import HASHERS, current_hasher
+
+    policy, _ = current_hasher()
+    for name, hasher in HASHERS.items():
+        params = hasher.params(current_app.config)
+        encoded = hasher.hash('benchmark-password', params)
+        count = 0
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            hasher.verify('benchmark-password', encoded)
+            count += 1
+        elapsed = time.perf_counter() - started
+        per_hash = elapsed / count * 1000
+        verdict = 'within budget' if per_hash <= budget_ms else 'over budget'
+        marker = '*' if hasher is policy else ' '
+        click.echo(f'{marker} {name:<7} {str(params):<22} {count / elapsed:8.1f} hashes/s '
+                   f'{per_hash:8.1f} ms  ({verdict})')
+    click.echo('* current PASSWORD_HASHER')
+
+
+def register_commands(app):
+    """Attach CLI commands to the app"""
+    app.cli.add_command(upgrade_db)
+    app.cli.add_command(backfill_post_tags)
+    app.cli.add_command(backfill_lead_dedup)
+    app.cli.add_command(archive_leads_command)
+    app.cli.add_command(outbox_worker)
+    app.cli.add_command(mail_bench)
+    app.cli.add_command(ratelimit_bench)
+    app.cli.add_command(lead_search_bench)
+    app.cli.add_command(bench_hashers)
@@ -42,6 +42,29 @@ class Config:
     JWT_ACCESS_COOKIE_PATH = '/api/'
     JWT_COOKIE_SAMESITE = 'Lax'
     
+    # Token revocation - seconds between loads of new revocations per worker,
+    # and between purges of expired ones
+    TOKEN_REVOCATION_CHECK_SECONDS = float(os.environ.get('TOKEN_REVOCATION_CHECK_SECONDS', 1))
+    TOKEN_REVOCATION_PURGE_SECONDS = int(os.environ.get('TOKEN_REVOCATION_PURGE_SECONDS', 3600))
+    
+    # User cache - per-worker copies of authenticated users for /me and refresh;
+    # the users version row is re-checked at most every USER_CACHE_CHECK_SECONDS
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 256))
+    USER_CACHE_SECONDS = int(os.environ.get('USER_CACHE_SECONDS', 60))
+    USER_CACHE_CHECK_SECONDS = float(os.environ.get('USER_CACHE_CHECK_SECONDS', 5))
+    
+    # Password hashing - scrypt, bcrypt, pbkdf2 or argon2 (with argon2-cffi);
+    # size the costs with `flask bench-hashers`. Older hashes are upgraded on login.
+    PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'scrypt')
+    PASSWORD_SCRYPT_N = int(os.environ.get('PASSWORD_SCRYPT_N', 2 ** 15))
+    PASSWORD_SCRYPT_R = int(os.environ.get('PASSWORD_SCRYPT_R', 8))
+    PASSWORD_SCRYPT_P = int(os.environ.get('PASSWORD_SCRYPT_P', 1))
+    PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+    PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 600000))
+    PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 3))
+    PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 65536))
+    PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 4))
+    
     # CORS
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000,http://localhost:5173').split(',')
     
@@ -54,12 +77,75 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', 'noreply@financeclinics.com')
     ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@financeclinics.com')
+    MAIL_POOL_IDLE_SECONDS = float(os.environ.get('MAIL_POOL_IDLE_SECONDS', 60))
+    MAIL_POOL_CHECK_SECONDS = float(os.environ.get('MAIL_POOL_CHECK_SECONDS', 10))
+    
+    # Email outbox - delivered by a background thread per worker or `flask outbox-worker`
+    EMAIL_OUTBOX_WORKER_THREAD = os.environ.get('EMAIL_OUTBOX_WORKER_THREAD', 'true').lower() == 'true'
+    EMAIL_OUTBOX_POLL_SECONDS = float(os.environ.get('EMAIL_OUTBOX_POLL_SECONDS', 10))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 8))
+    EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.environ.get('EMAIL_OUTBOX_BACKOFF_SECONDS', 30))
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = int(os.environ.get('EMAIL_OUTBOX_BACKOFF_MAX_SECONDS', 3600))
+    EMAIL_OUTBOX_LEASE_SECONDS = int(os.environ.get('EMAIL_OUTBOX_LEASE_SECONDS', 300))
+    
+    # Lead digest - hold admin notifications and send one summary per interval or per N leads
+    LEAD_DIGEST_ENABLED = os.environ.get('LEAD_DIGEST_ENABLED', 'false').lower() == 'true'
+    LEAD_DIGEST_INTERVAL_SECONDS = int(os.environ.get('LEAD_DIGEST_INTERVAL_SECONDS', 900))
+    LEAD_DIGEST_MAX_LEADS = int(os.environ.get('LEAD_DIGEST_MAX_LEADS', 50))
+    LEADS_EXPORT_CHUNK_SIZE = int(os.environ.get('LEADS_EXPORT_CHUNK_SIZE', 1000))
+    
+    # Lead deduplication - repeats of an open lead within the window are folded into it
+    LEAD_DEDUP_WINDOW_DAYS = int(os.environ.get('LEAD_DEDUP_WINDOW_DAYS', 30))
+    LEAD_DEFAULT_COUNTRY_CODE = os.environ.get('LEAD_DEFAULT_COUNTRY_CODE', '91')
     
-    # Rate Limiting
-    RATELIMIT_STORAGE_URL = os.environ.get('REDIS_URL', 'memory://')
+    # Bulk admin endpoints - most ids accepted per request
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 1000))
+    
+    # Lead archival - `flask archive-leads` moves these statuses out after N days (min 31)
+    LEAD_ARCHIVE_AFTER_DAYS = int(os.environ.get('LEAD_ARCHIVE_AFTER_DAYS', 365))
+    LEAD_ARCHIVE_STATUSES = tuple(os.environ.get('LEAD_ARCHIVE_STATUSES', 'closed,converted').split(','))
+    
+    # Contact form spam filter - see app/utils/spam.py
+    CONTACT_SPAM_FILTER_ENABLED = os.environ.get('CONTACT_SPAM_FILTER_ENABLED', 'true').lower() == 'true'
+    CONTACT_HONEYPOT_FIELD = os.environ.get('CONTACT_HONEYPOT_FIELD', 'website')
+    CONTACT_REQUIRE_TOKEN = os.environ.get('CONTACT_REQUIRE_TOKEN', 'true').lower() == 'true'
+    CONTACT_MIN_FILL_SECONDS = float(os.environ.get('CONTACT_MIN_FILL_SECONDS', 3))
+    CONTACT_TOKEN_MAX_AGE = int(os.environ.get('CONTACT_TOKEN_MAX_AGE', 86400))
+    CONTACT_MAX_LINKS = int(os.environ.get('CONTACT_MAX_LINKS', 2))
+    CONTACT_DUPLICATE_LIMIT = int(os.environ.get('CONTACT_DUPLICATE_LIMIT', 3))
+    CONTACT_DUPLICATE_WINDOW = int(os.environ.get('CONTACT_DUPLICATE_WINDOW', 3600))
+    CONTACT_DUPLICATE_CACHE_SIZE = int(os.environ.get('CONTACT_DUPLICATE_CACHE_SIZE', 10000))
+    # One regex per line; replaces the built-in patterns when set
+    CONTACT_SPAM_PATTERNS = [p for p in os.environ.get('CONTACT_SPAM_PATTERNS', '').splitlines() if p.strip()]
+    
+    # Rate Limiting - without Redis, counters live in a SQLite file shared by
+    # every worker (app/utils/ratelimit_storage.py)
+    RATELIMIT_SQLITE_PATH = os.path.abspath(
+        os.environ.get('RATELIMIT_SQLITE_PATH') or os.path.join(basedir, '..', 'instance', 'ratelimit.db')
+    )
+    RATELIMIT_STORAGE_URI = os.environ.get('REDIS_URL') or f'sqlite:///{RATELIMIT_SQLITE_PATH}'
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'moving-window')
     RATELIMIT_DEFAULT = "200 per day"
     RATELIMIT_HEADERS_ENABLED = True
     
+    # Reverse proxy - how many proxies in front of the app set X-Forwarded-For/-Proto
+    # (1: the nginx container). Client IPs for rate limits, the login throttle and
+    # leads come from there; set 0 when the app is reached directly, or clients
+    # could pick their own address
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 1))
+    PROXY_FIX_X_PROTO = int(os.environ.get('PROXY_FIX_X_PROTO', 1))
+    
+    # Login throttle - failed logins per email and per IP, checked before hashing;
+    # a full window locks out for LOGIN_LOCKOUT_SECONDS, doubling per repeat
+    LOGIN_THROTTLE_ENABLED = os.environ.get('LOGIN_THROTTLE_ENABLED', 'true').lower() == 'true'
+    LOGIN_EMAIL_LIMIT = os.environ.get('LOGIN_EMAIL_LIMIT', '5 per 15 minutes')
+    LOGIN_IP_LIMIT = os.environ.get('LOGIN_IP_LIMIT', '30 per 15 minutes')
+    LOGIN_LOCKOUT_SECONDS = int(os.environ.get('LOGIN_LOCKOUT_SECONDS', 60))
+    LOGIN_LOCKOUT_MAX_SECONDS = int(os.environ.get('LOGIN_LOCKOUT_MAX_SECONDS', 3600))
+    LOGIN_UNKNOWN_EMAIL_CACHE_SIZE = int(os.environ.get('LOGIN_UNKNOWN_EMAIL_CACHE_SIZE', 10000))
+    LOGIN_UNKNOWN_EMAIL_CACHE_SECONDS = int(os.environ.get('LOGIN_UNKNOWN_EMAIL_CACHE_SECONDS', 60))
+    
     # File Upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max
     UPLOAD_FOLDER = os.path.join(basedir, '..', 'uploads')
@@ -69,6 +155,68 @@ class Config:
     SITE_NAME = os.environ.get('SITE_NAME', 'FinanceClinics')
     SITE_URL = os.environ.get('SITE_URL', 'https://financeclinics.com')
     
+    # Sitemap and RSS/Atom feeds - regenerated into this folder on publish
+    FEEDS_FOLDER = os.environ.get('FEEDS_FOLDER') or os.path.join(basedir, '..', 'feeds')
+    FEED_ITEM_LIMIT = int(os.environ.get('FEED_ITEM_LIMIT', 20))
+    
+    # Public read model - in-memory snapshot of published content per worker;
+    # the content version row is re-checked at most this often
+    READ_MODEL_ENABLED = os.environ.get('READ_MODEL_ENABLED', 'true').lower() == 'true'
+    READ_MODEL_CHECK_SECONDS = float(os.environ.get('READ_MODEL_CHECK_SECONDS', 5))
+    
+    # Settings cache - typed settings held per worker; the settings version
+    # row is re-checked at most this often
+    SETTINGS_CACHE_CHECK_SECONDS = float(os.environ.get('SETTINGS_CACHE_CHECK_SECONDS', 5))
+    
+    # Search - seconds before the non-MySQL fallback index is rebuilt from the DB
+    SEARCH_INDEX_MAX_AGE = int(os.environ.get('SEARCH_INDEX_MAX_AGE', 300))
+    
+    # Blog - seconds the public tag counts are cached between writes
+    BLOG_TAGS_CACHE_SECONDS = int(os.environ.get('BLOG_TAGS_CACHE_SECONDS', 300))
+    
+    # Metrics - per-worker files merged by GET /api/metrics; scrapers send
+    # METRICS_TOKEN as a bearer token, admins can use their access token
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(basedir, '..', 'instance', 'metrics')
+    METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    
+    # Slow query log - statements over the threshold are logged and kept in a
+    # per-worker ring buffer (GET /api/admin/diagnostics/slow-queries)
+    SLOW_QUERY_LOG_ENABLED = os.environ.get('SLOW_QUERY_LOG_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    SLOW_QUERY_BUFFER_SIZE = int(os.environ.get('SLOW_QUERY_BUFFER_SIZE', 500))
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+    
+    # N+1 detection - report requests that run the same statement more than
+    # N_PLUS_ONE_THRESHOLD times; on in development and tests (where it raises)
+    N_PLUS_ONE_DETECTION = os.environ.get('N_PLUS_ONE_DETECTION', 'false').lower() == 'true'
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))
+    N_PLUS_ONE_RAISE = False
+    
+    # Request profiler - admins send `X-Profile: 1`, or PROFILER_SAMPLE profiles
+    # 1 in N requests per endpoint (`admin.export_mis_data=20,blog.get_posts=100`).
+    # Uses pyinstrument if installed (or PROFILER_BACKEND=cprofile), else cProfile.
+    # Off unless PROFILER_ENABLED=true: no hooks are installed by default.
+    PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'false').lower() == 'true'
+    PROFILER_SAMPLE = os.environ.get('PROFILER_SAMPLE', '')
+    PROFILER_BACKEND = os.environ.get('PROFILER_BACKEND', 'auto')
+    PROFILER_DIR = os.environ.get('PROFILER_DIR') or os.path.join(basedir, '..', 'instance', 'profiles')
+    PROFILER_MAX_REPORTS = int(os.environ.get('PROFILER_MAX_REPORTS', 50))
+    
+    # Memory guard - MIS import/export stop with 413/503 once they grow the worker
+    # by MEMORY_BUDGET_MB (0 = measure only), or up front when the input times
+    # MEMORY_EXPANSION_FACTOR would not fit; 1 in MEMORY_TRACE_SAMPLE also runs
+    # under tracemalloc (0 = never). CSV imports and exports are streamed.
+    # Growth is measured on the worker's RSS: run gunicorn with --threads 1.
+    MEMORY_GUARD_ENABLED = os.environ.get('MEMORY_GUARD_ENABLED', 'true').lower() == 'true'
+    MEMORY_BUDGET_MB = int(os.environ.get('MEMORY_BUDGET_MB', 256))
+    MEMORY_EXPANSION_FACTOR = float(os.environ.get('MEMORY_EXPANSION_FACTOR', 10))
+    MEMORY_SAMPLE_SECONDS = float(os.environ.get('MEMORY_SAMPLE_SECONDS', 0.05))
+    MEMORY_TRACE_SAMPLE = int(os.environ.get('MEMORY_TRACE_SAMPLE', 20))
+    MIS_IMPORT_BATCH_SIZE = int(os.environ.get('MIS_IMPORT_BATCH_SIZE', 1000))
+    MIS_EXPORT_CHUNK_SIZE = int(os.environ.get('MIS_EXPORT_CHUNK_SIZE', 1000))
+    
     # Analytics
     GOOGLE_ANALYTICS_ID = os.environ.get('GOOGLE_ANALYTICS_ID', '')
     
@@ -77,6 +225,7 @@ class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    N_PLUS_ONE_DETECTION = True
 
 
 class ProductionConfig(Config):
@@ -90,6 +239,11 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    EMAIL_OUTBOX_WORKER_THREAD = False
+    CONTACT_REQUIRE_TOKEN = False
+    RATELIMIT_STORAGE_URI = 'memory://'
+    N_PLUS_ONE_DETECTION = True
+    N_PLUS_ONE_RAISE = True
 
 
 config = {
@@ -5,9 +5,15 @@ FinanceClinics - Database Models
 from .user import User
 from .page import Page
 from .service import Service
-from .blogpost import BlogPost
-from .lead import Lead
+from .blogpost import BlogPost, PostTag
+from .lead import Lead, LeadSubmission
+from .lead_archive import LeadArchive, LeadArchiveStat
 from .setting import Setting
 from .mis_template import MISTemplate, MISData
+from .cache_version import CacheVersion
+from .email_outbox import EmailOutbox
+from .revoked_token import RevokedToken
 
-__all__ = ['User', 'Page', 'Service', 'BlogPost', 'Lead', 'Setting', 'MISTemplate', 'MISData']
+__all__ = ['User', 'Page', 'Service', 'BlogPost', 'PostTag', 'Lead', 'LeadSubmission', 'LeadArchive', 'LeadArchiveStat',
+           'Setting', 'MISTemplate', 'MISData', 'CacheVersion', 'EmailOutbox',
+           'RevokedToken']
@@ -29,12 +29,48 @@ class BlogPost(db.Model):
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     
     author = db.relationship('User', backref='blog_posts')
+    tag_rows = db.relationship('PostTag', backref='post', cascade='all, delete-orphan')
     
     def __init__(self, **kwargs):
         super(BlogPost, self).__init__(**kwargs)
         if not self.slug and self.title:
             self.slug = slugify(self.title)
     
+    @staticmethod
+    def normalize_tags(tags):
+        """Strip blanks and duplicates from a list of tags, keeping order"""
+        seen = set()
+        normalized = []
+        for tag in tags or []:
+            if not isinstance(tag, str):
+                continue
+            tag = tag.strip()[:100]
+            if tag and tag.lower() not in seen:
+                seen.add(tag.lower())
+                normalized.append(tag)
+        return normalized
+    
+    def sync_tags(self):
+        """Mirror the JSON tags column into the post_tags index"""
+        self.tags = self.normalize_tags(self.tags)
+        # post_tags compares case-insensitively (utf8mb4_unicode_ci), so a change of
+        # case renames the existing row instead of inserting a clashing one
+        existing = {row.tag.lower(): row for row in self.tag_rows}
+        rows = []
+        for tag in self.tags:
+            row = existing.get(tag.lower())
+            if row is None:
+                row = PostTag(tag=tag)
+            elif row.tag != tag:
+                row.tag = tag
+            rows.append(row)
+        self.tag_rows = rows
+    
+    @property
+    def public_path(self):
+        """Path of this post on the public site"""
+        return f'/blog/{self.slug}'
+    
     def to_dict(self, include_content=True):
         """Serialize blog post to dictionary"""
         data = {
@@ -60,3 +96,15 @@ class BlogPost(db.Model):
     
     def __repr__(self):
         return f'<BlogPost {self.title}>'
+
+
+
+class PostTag(db.Model):
+    """Normalized tag index for blog posts, kept in sync with BlogPost.tags"""
+    __tablename__ = 'post_tags'
+    
+    post_id = db.Column(db.Integer, db.ForeignKey('blog_posts.id', ondelete='CASCADE'), primary_key=True)
+    tag = db.Column(db.String(100), primary_key=True, index=True)
+    
+    def __repr__(self):
+        return f'<PostTag {self.post_id}:{self.tag}>'
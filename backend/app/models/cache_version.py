@@ -0,0 +1,52 @@
+"""
+FinanceClinics - Cache Version Model
+
+One row per cached data set (e.g. 'content'). Writers bump the version and
+every worker compares it against the version its in-memory copy was built
+from, so caches converge without cross-process messaging.
+"""
+
+from datetime import datetime
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+from ..extensions import db
+
+
+class CacheVersion(db.Model):
+    """Monotonic version counter for a named cache"""
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def get(name):
+        """Current version of a cache, 0 if it was never bumped"""
+        try:
+            version = db.session.query(CacheVersion.version).filter_by(name=name).scalar()
+        except (OperationalError, ProgrammingError):
+            # Database not upgraded yet (`flask upgrade-db`): nothing was ever bumped
+            if inspect(db.engine).has_table(CacheVersion.__tablename__):
+                raise
+            return 0
+        return version or 0
+
+    @staticmethod
+    def bump(name):
+        """Atomically increment a cache version and commit"""
+        updated = CacheVersion.query.filter_by(name=name).update({
+            CacheVersion.version: CacheVersion.version + 1,
+            CacheVersion.updated_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        if not updated:
+            db.session.add(CacheVersion(name=name, version=1))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created the row first
+            db.session.rollback()
+            return CacheVersion.bump(name)
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
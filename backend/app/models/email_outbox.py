@@ -0,0 +1,53 @@
+"""
+FinanceClinics - Email Outbox Model
+
+Outgoing emails are written here in the same transaction as the record that
+caused them and delivered later by the outbox worker (app/utils/outbox.py).
+"""
+
+from datetime import datetime
+from ..extensions import db
+
+
+class EmailOutbox(db.Model):
+    """Queued outgoing email"""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('idx_outbox_due', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    lead_id = db.Column(db.Integer, db.ForeignKey('leads.id', ondelete='CASCADE'), index=True)
+    kind = db.Column(db.String(50), nullable=False)  # lead_notification, lead_acknowledgment, lead_digest
+    recipient = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(300), nullable=False)
+    body = db.Column(db.Text)
+    html = db.Column(db.Text)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, digest, digested, sent, dead
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+    # Held notifications folded into a lead_digest email point at that email
+    digest_id = db.Column(db.Integer, db.ForeignKey('email_outbox.id', ondelete='SET NULL'), index=True)
+
+    def to_dict(self):
+        """Serialize outbox entry to dictionary"""
+        return {
+            'id': self.id,
+            'lead_id': self.lead_id,
+            'kind': self.kind,
+            'recipient': self.recipient,
+            'subject': self.subject,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+            'digest_id': self.digest_id,
+        }
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.kind} to {self.recipient} ({self.status})>'
@@ -11,21 +11,25 @@ class Lead(db.Model):
     __tablename__ = 'leads'
     
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
     email = db.Column(db.String(120), nullable=False, index=True)
-    phone = db.Column(db.String(30))
+    email_normalized = db.Column(db.String(120), index=True)
+    phone = db.Column(db.String(30), index=True)
+    phone_e164 = db.Column(db.String(20), index=True)
     organization = db.Column(db.String(200))
     message = db.Column(db.Text, nullable=False)
     preferred_contact_time = db.Column(db.String(100))
     service_interest = db.Column(db.String(100))
     source = db.Column(db.String(50), default='contact_form')
-    status = db.Column(db.String(20), default='new')  # new, contacted, qualified, converted, closed
+    status = db.Column(db.String(20), default='new', index=True)  # new, contacted, qualified, converted, closed
     notes = db.Column(db.Text)
     ip_address = db.Column(db.String(50))
     user_agent = db.Column(db.String(500))
     privacy_accepted = db.Column(db.Boolean, default=True)
     email_sent = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    submission_count = db.Column(db.Integer, default=1, nullable=False)
+    last_submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
@@ -44,23 +48,38 @@ class Lead(db.Model):
             'notes': self.notes,
             'privacy_accepted': self.privacy_accepted,
             'email_sent': self.email_sent,
+            'submission_count': self.submission_count,
+            'last_submitted_at': self.last_submitted_at.isoformat() if self.last_submitted_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
         }
     
     def to_csv_row(self):
         """Return data suitable for CSV export"""
+        return Lead.format_csv_row(tuple(getattr(self, c.key) for c in Lead.csv_columns()))
+    
+    @staticmethod
+    def csv_columns():
+        """Columns selected for CSV export, in csv_headers() order"""
+        return (Lead.id, Lead.name, Lead.email, Lead.phone, Lead.organization, Lead.message,
+                Lead.preferred_contact_time, Lead.service_interest, Lead.status, Lead.created_at)
+    
+    @staticmethod
+    def format_csv_row(values):
+        """Format a csv_columns() tuple as a CSV row"""
+        (lead_id, name, email, phone, organization, message,
+         preferred_contact_time, service_interest, status, created_at) = values
         return [
-            self.id,
-            self.name,
-            self.email,
-            self.phone or '',
-            self.organization or '',
-            self.message,
-            self.preferred_contact_time or '',
-            self.service_interest or '',
-            self.status,
-            self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else '',
+            lead_id,
+            name,
+            email,
+            phone or '',
+            organization or '',
+            message,
+            preferred_contact_time or '',
+            service_interest or '',
+            status,
+            created_at.strftime('%Y-%m-%d %H:%M:%S') if created_at else '',
         ]
     
     @staticmethod
@@ -71,3 +90,45 @@ class Lead(db.Model):
     
     def __repr__(self):
         return f'<Lead {self.email}>'
+
+
+class LeadSubmission(db.Model):
+    """A repeat contact form submission folded into an existing lead.
+
+    Kept apart from the admin-edited `notes`. `lead_id` has no foreign key so
+    the history stays with the lead when it moves to `leads_archive`, which
+    keeps the same ids.
+    """
+    __tablename__ = 'lead_submissions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    lead_id = db.Column(db.Integer, nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(30))
+    organization = db.Column(db.String(200))
+    message = db.Column(db.Text, nullable=False)
+    service_interest = db.Column(db.String(100))
+    ip_address = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @staticmethod
+    def for_lead(lead_id):
+        """Repeat submissions of a lead, oldest first"""
+        return LeadSubmission.query.filter_by(lead_id=lead_id).order_by(LeadSubmission.id.asc()).all()
+    
+    def to_dict(self):
+        """Serialize submission to dictionary"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'email': self.email,
+            'phone': self.phone,
+            'organization': self.organization,
+            'message': self.message,
+            'service_interest': self.service_interest,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+    
+    def __repr__(self):
+        return f'<LeadSubmission {self.lead_id}:{self.email}>'
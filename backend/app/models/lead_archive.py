@@ -0,0 +1,61 @@
+"""
+FinanceClinics - Lead Archive Models
+
+Closed and converted leads past LEAD_ARCHIVE_AFTER_DAYS are moved out of the
+hot `leads` table by `flask archive-leads` (app/utils/lead_archive.py). The
+archive keeps every lead column; LeadArchiveStat keeps per-status, per-month
+counts of archived rows so totals never have to scan the archive.
+"""
+
+from datetime import datetime
+from ..extensions import db
+from .lead import Lead
+
+
+class LeadArchive(db.Model):
+    """Archived lead; same columns and ids as Lead"""
+    __tablename__ = 'leads_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(120), nullable=False, index=True)
+    email_normalized = db.Column(db.String(120))
+    phone = db.Column(db.String(30))
+    phone_e164 = db.Column(db.String(20))
+    organization = db.Column(db.String(200))
+    message = db.Column(db.Text, nullable=False)
+    preferred_contact_time = db.Column(db.String(100))
+    service_interest = db.Column(db.String(100))
+    source = db.Column(db.String(50))
+    status = db.Column(db.String(20), index=True)
+    notes = db.Column(db.Text)
+    ip_address = db.Column(db.String(50))
+    user_agent = db.Column(db.String(500))
+    privacy_accepted = db.Column(db.Boolean)
+    email_sent = db.Column(db.Boolean)
+    submission_count = db.Column(db.Integer, default=1, nullable=False)
+    last_submitted_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, index=True)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        """Serialize archived lead to dictionary"""
+        data = Lead.to_dict(self)
+        data['archived_at'] = self.archived_at.isoformat() if self.archived_at else None
+        return data
+
+    def __repr__(self):
+        return f'<LeadArchive {self.email}>'
+
+
+class LeadArchiveStat(db.Model):
+    """Number of archived leads per status and creation month"""
+    __tablename__ = 'lead_archive_stats'
+
+    status = db.Column(db.String(20), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # YYYY-MM of created_at
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<LeadArchiveStat {self.status} {self.month}={self.count}>'
@@ -33,6 +33,11 @@ class Page(db.Model):
         if not self.slug and self.title:
             self.slug = slugify(self.title)
     
+    @property
+    def public_path(self):
+        """Path of this page on the public site"""
+        return '/' if self.slug == 'home' else f'/{self.slug}'
+    
     def to_dict(self, include_content=True):
         """Serialize page to dictionary"""
         data = {
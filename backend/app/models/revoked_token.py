@@ -0,0 +1,29 @@
+"""
+FinanceClinics - Revoked Token Model
+
+Append-only list of revoked JWTs. A row either names one token by `jti` or,
+with `revoked_before` set, revokes every token of `user_id` issued up to that
+moment. `seq` orders the rows so workers can load only what is new; rows are
+purged once `expires_at` - the latest expiry of any token they cover - has
+passed.
+"""
+
+from datetime import datetime
+from ..extensions import db
+
+
+class RevokedToken(db.Model):
+    """A revoked token, or a cutoff for all tokens of a user"""
+    __tablename__ = 'revoked_tokens'
+
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    jti = db.Column(db.String(36), index=True)
+    user_id = db.Column(db.Integer, index=True)
+    token_type = db.Column(db.String(10))
+    revoked_before = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        target = self.jti or f'user {self.user_id} before {self.revoked_before}'
+        return f'<RevokedToken {self.seq} {target}>'
@@ -32,6 +32,11 @@ class Service(db.Model):
         if not self.slug and self.title:
             self.slug = slugify(self.title)
     
+    @property
+    def public_path(self):
+        """Path of this service on the public site"""
+        return f'/services/{self.slug}'
+    
     def to_dict(self, include_description=True):
         """Serialize service to dictionary"""
         data = {
@@ -2,6 +2,7 @@
 FinanceClinics - Settings Model
 """
 
+import json
 from datetime import datetime
 from ..extensions import db
 
@@ -19,58 +20,67 @@ class Setting(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Keys exposed to the public site through /api/settings/public
+    PUBLIC_KEYS = (
+        'site_name', 'site_tagline', 'site_description',
+        'contact_email', 'contact_phone', 'contact_address',
+        'social_facebook', 'social_twitter', 'social_linkedin',
+        'google_analytics_id', 'footer_text'
+    )
+    
     @staticmethod
     def get_value(key, default=None):
-        """Get setting value by key"""
-        setting = Setting.query.filter_by(key=key).first()
-        if not setting:
+        """Get setting value by key from the per-worker settings cache"""
+        from ..utils.settings_cache import settings_cache
+        return settings_cache.get(key, default)
+    
+    @staticmethod
+    def parse_value(value, type, default=None):
+        """Parse a stored string according to a setting type"""
+        if value is None:
             return default
-        
-        if setting.type == 'boolean':
-            return setting.value.lower() in ('true', '1', 'yes')
-        elif setting.type == 'number':
+        if type == 'boolean':
+            return value.lower() in ('true', '1', 'yes')
+        elif type == 'number':
             try:
-                return int(setting.value) if '.' not in setting.value else float(setting.value)
+                return int(value) if '.' not in value else float(value)
             except ValueError:
                 return default
-        elif setting.type == 'json':
-            import json
+        elif type == 'json':
             try:
-                return json.loads(setting.value)
+                return json.loads(value)
             except json.JSONDecodeError:
                 return default
-        return setting.value
+        return value
+    
+    @staticmethod
+    def serialize_value(value, type='string'):
+        """String form of a value as stored in the settings table"""
+        if type == 'json' and not isinstance(value, str):
+            return json.dumps(value)
+        return str(value) if value is not None else ''
+    
+    def typed_value(self, default=None):
+        """Parse the stored string according to the setting type"""
+        return Setting.parse_value(self.value, self.type, default)
     
     @staticmethod
     def set_value(key, value, type='string', category='general', description=None):
-        """Set setting value by key"""
-        import json
-        setting = Setting.query.filter_by(key=key).first()
-        
-        if setting:
-            if type == 'json' and not isinstance(value, str):
-                setting.value = json.dumps(value)
-            else:
-                setting.value = str(value)
-            setting.type = type
-            if category:
-                setting.category = category
-            if description:
-                setting.description = description
-        else:
-            if type == 'json' and not isinstance(value, str):
-                value = json.dumps(value)
-            setting = Setting(
-                key=key, 
-                value=str(value), 
-                type=type, 
-                category=category,
-                description=description
-            )
-            db.session.add(setting)
-        
-        db.session.commit()
-        return setting
+        """Set setting value by key with a single upsert"""
+        from ..utils.settings_cache import upsert_settings
+        update_columns = ['value', 'type']
+        if category:
+            update_columns.append('category')
+        if description:
+            update_columns.append('description')
+        upsert_settings([{
+            'key': key,
+            'value': Setting.serialize_value(value, type),
+            'type': type,
+            'category': category,
+            'description': description,
+        }], update_columns)
+        return Setting.query.filter_by(key=key).first()
     
     def to_dict(self):
         """Serialize setting to dictionary"""
@@ -3,8 +3,8 @@ FinanceClinics - User Model
 """
 
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from ..extensions import db
+from ..utils.passwords import hash_password, verify_password, needs_rehash
 
 
 class User(db.Model):
@@ -17,17 +17,31 @@ class User(db.Model):
     name = db.Column(db.String(100), nullable=False)
     role = db.Column(db.String(20), default='admin', nullable=False)
     is_active = db.Column(db.Boolean, default=True)
+    # Bumped whenever identity fields change; carried in access tokens as `user_version`
+    version = db.Column(db.Integer, default=1, nullable=False)
     last_login = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def set_password(self, password):
-        """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        """Hash and set password with the configured hasher"""
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        """Verify password"""
-        return check_password_hash(self.password_hash, password)
+        """Verify password against a hash from any registered hasher"""
+        return verify_password(password, self.password_hash)
+    
+    def password_needs_rehash(self):
+        """True if the stored hash does not match the current hashing policy"""
+        return needs_rehash(self.password_hash)
+    
+    def bump_version(self):
+        """Mark cached copies and token claims of this user as outdated"""
+        self.version = (self.version or 0) + 1
+    
+    def token_claims(self):
+        """Additional claims embedded in access tokens"""
+        return {'role': self.role, 'email': self.email, 'user_version': self.version}
     
     def to_dict(self):
         """Serialize user to dictionary"""
@@ -0,0 +1,142 @@
+"""
+FinanceClinics - Bulk Admin Operations
+
+Helpers for the `/admin/bulk` endpoints. Each operation looks up which of
+the requested ids exist in one query, applies one set-based UPDATE or DELETE
+to those rows, and reports a result per requested id. The caller commits
+once, so a bulk request is a single transaction.
+"""
+
+from flask import current_app
+from sqlalchemy import case
+from ..extensions import db
+
+
+class BulkRequestError(ValueError):
+    """The bulk request body is malformed"""
+
+
+def parse_ids(data):
+    """Validated, de-duplicated list of ids from a bulk request body"""
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise BulkRequestError('ids must be a non-empty list')
+    if len(ids) > current_app.config.get('BULK_MAX_ITEMS', 1000):
+        raise BulkRequestError('Too many ids in one request')
+    if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise BulkRequestError('ids must be integers')
+    return list(dict.fromkeys(ids))
+
+
+def parse_sort_orders(data):
+    """{id: sort_order} from a bulk request body's `items`"""
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        raise BulkRequestError('items must be a non-empty list of {id, sort_order}')
+    if len(items) > current_app.config.get('BULK_MAX_ITEMS', 1000):
+        raise BulkRequestError('Too many items in one request')
+    orders = {}
+    for item in items:
+        item_id = item.get('id') if isinstance(item, dict) else None
+        order = item.get('sort_order') if isinstance(item, dict) else None
+        if not isinstance(item_id, int) or not isinstance(order, int) \
+                or isinstance(item_id, bool) or isinstance(order, bool):
+            raise BulkRequestError('Each item needs integer id and sort_order')
+        orders[item_id] = order
+    return orders
+
+
+def existing_ids(model, ids):
+    return {row_id for (row_id,) in db.session.query(model.id).filter(model.id.in_(ids))}
+
+
+def bulk_update(model, ids, values):
+    """UPDATE the existing rows among ids in one statement; returns the ids found"""
+    found = existing_ids(model, ids)
+    if found:
+        model.query.filter(model.id.in_(found))\
+            .update(values, synchronize_session=False)
+    return found
+
+
+def bulk_set_sort_order(model, orders):
+    """Set per-row sort_order with a single UPDATE ... CASE; returns the ids found"""
+    found = existing_ids(model, list(orders))
+    if found:
+        model.query.filter(model.id.in_(found))\
+            .update({model.sort_order: case({i: orders[i] for i in found}, value=model.id)},
+                    synchronize_session=False)
+    return found
+
+
+def bulk_delete(model, ids):
+    """DELETE the existing rows among ids in one statement; returns the ids found"""
+    found = existing_ids(model, ids)
+    if found:
+        model.query.filter(model.id.in_(found)).delete(synchronize_session=False)
+    return found
+
+
+def bulk_set_published(model, ids, publish, values):
+    """Publish or unpublish the existing rows among ids; returns (ids found, ids changed)"""
+    states = dict(db.session.query(model.id, model.is_published).filter(model.id.in_(ids)))
+    # Rows already in the target state are left untouched
+    changed = {row_id for row_id, published in states.items() if bool(published) != publish}
+    if changed:
+        model.query.filter(model.id.in_(changed),
+                           model.is_published.isnot(True) if publish else model.is_published.is_(True))\
+            .update(values, synchronize_session=False)
+    return set(states), changed
+
+
+def bulk_results(ids, found, outcome, changed=None):
+    """Per-id results in request order; ids found but not in `changed` are 'unchanged'"""
+    def result(i):
+        if i not in found:
+            return 'not_found'
+        if changed is not None and i not in changed:
+            return 'unchanged'
+        return outcome
+    return [{'id': i, 'result': result(i)} for i in ids]
+
+
+def bulk_content(model, kind, data, publish_values=None):
+    """Apply a bulk action to pages, services or posts and commit.
+
+    Actions: publish, unpublish, set_sort_order (models with sort_order) and
+    delete. `publish_values` adds columns to set when publishing (e.g. the
+    post published_at). Returns the per-id results; publish and unpublish
+    report rows already in the target state as 'unchanged'.
+    """
+    from .content import contents_changed
+
+    action = data.get('action')
+    changed = None
+    if action == 'set_sort_order' and hasattr(model, 'sort_order'):
+        orders = parse_sort_orders(data)
+        ids = list(orders)
+        found = bulk_set_sort_order(model, orders)
+    elif action in ('publish', 'unpublish'):
+        ids = parse_ids(data)
+        publish = action == 'publish'
+        values = {model.is_published: publish}
+        if publish and publish_values:
+            values.update(publish_values)
+        found, changed = bulk_set_published(model, ids, publish, values)
+    elif action == 'delete':
+        ids = parse_ids(data)
+        found = bulk_delete(model, ids)
+    else:
+        raise BulkRequestError('Invalid action')
+    db.session.commit()
+
+    if action == 'delete':
+        if found:
+            contents_changed(kind, deleted_ids=found)
+    elif action == 'set_sort_order':
+        if found:
+            contents_changed(kind, objs=())
+    elif changed:
+        contents_changed(kind, objs=model.query.filter(model.id.in_(changed)).all())
+
+    return bulk_results(ids, found, 'deleted' if action == 'delete' else 'updated', changed)
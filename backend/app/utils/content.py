@@ -0,0 +1,44 @@
+"""
+FinanceClinics - Content Change Hooks
+
+Admin endpoints call these after committing a page, service or blog post so
+that derived data (search index, sitemap and feeds, the public read model)
+stays in step with the database.
+"""
+
+from flask import current_app
+from . import search
+from .feeds import rebuild_feeds
+from .read_model import bump_content_version
+
+
+def _rebuild_feeds():
+    # The write is already committed; a failed rebuild must not fail the request
+    try:
+        rebuild_feeds()
+    except Exception as e:
+        current_app.logger.error(f'Failed to rebuild feeds: {e}')
+
+
+def content_changed(kind, obj):
+    """A page, service or post was created or updated"""
+    search.index_document(kind, obj)
+    _rebuild_feeds()
+    bump_content_version()
+
+
+def content_deleted(kind, obj_id):
+    """A page, service or post was deleted"""
+    search.remove_document(kind, obj_id)
+    _rebuild_feeds()
+    bump_content_version()
+
+
+def contents_changed(kind, objs=(), deleted_ids=()):
+    """Several pages, services or posts were updated or deleted in one request"""
+    for obj in objs:
+        search.index_document(kind, obj)
+    for obj_id in deleted_ids:
+        search.remove_document(kind, obj_id)
+    _rebuild_feeds()
+    bump_content_version()
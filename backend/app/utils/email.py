@@ -2,10 +2,103 @@
 FinanceClinics - Email Utilities
 """
 
+import smtplib
+import threading
+import time
 from flask import current_app, render_template_string
 from flask_mail import Message
 from ..extensions import mail
 
+# Errors after which the SMTP session is unusable and worth one reconnect
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class SMTPConnectionPool:
+    """
+    Keeps one open SMTP connection per thread so consecutive messages skip
+    the connect/STARTTLS/login handshake. A connection idle for longer than
+    MAIL_POOL_CHECK_SECONDS is probed with NOOP before reuse, one idle for
+    longer than MAIL_POOL_IDLE_SECONDS is closed, and a send that fails on a
+    dropped connection is retried once on a fresh one.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _close(self, local):
+        conn = getattr(local, 'conn', None)
+        local.conn = None
+        if conn is not None and conn.host is not None:
+            try:
+                conn.host.quit()
+            except (smtplib.SMTPException, OSError):
+                conn.host.close()
+
+    def _healthy(self, local, state):
+        conn = getattr(local, 'conn', None)
+        if conn is None or conn.mail is not state:
+            return False
+        if conn.host is None:
+            return True
+        
+        idle = time.monotonic() - local.used_at
+        config = current_app.config
+        if idle > config.get('MAIL_POOL_IDLE_SECONDS', 60):
+            return False
+        if idle > config.get('MAIL_POOL_CHECK_SECONDS', 10):
+            try:
+                return conn.host.noop()[0] == 250
+            except (smtplib.SMTPException, OSError):
+                return False
+        return True
+
+    def connection(self):
+        """Open SMTP connection for the current thread"""
+        local = self._local
+        state = current_app.extensions['mail']
+        if not self._healthy(local, state):
+            self._close(local)
+            local.conn = mail.connect().__enter__()
+        local.used_at = time.monotonic()
+        return local.conn
+
+    def send(self, message):
+        """Send one message, reconnecting once if the server dropped us"""
+        try:
+            self.connection().send(message)
+        except RECONNECT_ERRORS:
+            self._close(self._local)
+            self.connection().send(message)
+        self._local.used_at = time.monotonic()
+
+    def close(self):
+        """Close the current thread's connection"""
+        self._close(self._local)
+
+    def close_idle(self):
+        """Close the current thread's connection if it is past the idle timeout"""
+        local = self._local
+        conn = getattr(local, 'conn', None)
+        if conn is not None and \
+                time.monotonic() - local.used_at > current_app.config.get('MAIL_POOL_IDLE_SECONDS', 60):
+            self._close(local)
+
+
+smtp_pool = SMTPConnectionPool()
+
+
+def send_many(messages):
+    """Send messages over one pooled connection; returns the error per message (None if sent)"""
+    errors = []
+    for msg in messages:
+        try:
+            smtp_pool.send(msg)
+            errors.append(None)
+        except Exception as e:
+            current_app.logger.error(f'Failed to send email to {msg.recipients}: {e}')
+            errors.append(e)
+    return errors
+
 
 def send_email(subject, recipients, body, html=None):
     """Send email helper"""
@@ -16,21 +109,15 @@ def send_email(subject, recipients, body, html=None):
             body=body,
             html=html
         )
-        mail.send(msg)
+        smtp_pool.send(msg)
         return True
     except Exception as e:
         current_app.logger.error(f'Failed to send email: {e}')
         return False
 
 
-def send_lead_notification(lead):
-    """Send notification email to admin about new lead"""
-    admin_email = current_app.config.get('ADMIN_EMAIL')
-    
-    if not admin_email:
-        current_app.logger.warning('No admin email configured for lead notifications')
-        return False
-    
+def render_lead_notification(lead):
+    """Build (subject, body, html) of the admin notification for a lead"""
     subject = f'New Contact Form Submission - {lead.name}'
     
     body = f"""
@@ -110,11 +197,87 @@ IP Address: {lead.ip_address or 'Unknown'}
 </html>
 """
     
+    return subject, body, html
+
+
+def send_lead_notification(lead):
+    """Send notification email to admin about new lead"""
+    admin_email = current_app.config.get('ADMIN_EMAIL')
+    
+    if not admin_email:
+        current_app.logger.warning('No admin email configured for lead notifications')
+        return False
+    
+    subject, body, html = render_lead_notification(lead)
     return send_email(subject, admin_email, body, html)
 
 
-def send_lead_acknowledgment(lead):
-    """Send acknowledgment email to user who submitted the form"""
+LEAD_DIGEST_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.5; color: #333; }
+        .container { max-width: 900px; margin: 0 auto; padding: 20px; }
+        .header { background: linear-gradient(135deg, #2563eb, #1d4ed8); color: white; padding: 20px; border-radius: 8px 8px 0 0; }
+        table { width: 100%; border-collapse: collapse; font-size: 13px; }
+        th { background: #f3f4f6; text-align: left; padding: 8px; border-bottom: 2px solid #e5e7eb; }
+        td { padding: 8px; border-bottom: 1px solid #e5e7eb; vertical-align: top; }
+        .message { color: #4b5563; }
+        .footer { background: #1f2937; color: #9ca3af; padding: 15px; font-size: 12px; border-radius: 0 0 8px 8px; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h2 style="margin:0;">📧 {{ leads|length }} New Contact Form Submission{{ 's' if leads|length != 1 }}</h2>
+        </div>
+        <table>
+            <tr>
+                <th>Submitted</th><th>Name</th><th>Email</th><th>Phone</th>
+                <th>Organization</th><th>Service Interest</th><th>Message</th>
+            </tr>
+            {% for lead in leads %}
+            <tr>
+                <td>{{ lead.created_at.strftime('%Y-%m-%d %H:%M') }}</td>
+                <td>{{ lead.name }}</td>
+                <td><a href="mailto:{{ lead.email }}">{{ lead.email }}</a></td>
+                <td>{{ lead.phone or '-' }}</td>
+                <td>{{ lead.organization or '-' }}</td>
+                <td>{{ lead.service_interest or '-' }}</td>
+                <td class="message">{{ lead.message|truncate(300) }}</td>
+            </tr>
+            {% endfor %}
+        </table>
+        <div class="footer">
+            {{ leads[0].created_at.strftime('%Y-%m-%d %H:%M:%S') }} to {{ leads[-1].created_at.strftime('%Y-%m-%d %H:%M:%S') }}
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+
+def render_lead_digest(leads):
+    """Build (subject, body, html) of one admin email summarizing several leads"""
+    leads = sorted(leads, key=lambda lead: lead.created_at)
+    subject = f'{len(leads)} New Contact Form Submission{"s" if len(leads) != 1 else ""}'
+
+    lines = [f'{subject} received.', '']
+    for lead in leads:
+        lines.append(
+            f"{lead.created_at.strftime('%Y-%m-%d %H:%M')} | {lead.name} <{lead.email}> | "
+            f"{lead.phone or '-'} | {lead.organization or '-'} | {lead.service_interest or '-'}"
+        )
+    body = '\n'.join(lines) + '\n'
+
+    html = render_template_string(LEAD_DIGEST_TEMPLATE, leads=leads)
+
+    return subject, body, html
+
+
+def render_lead_acknowledgment(lead):
+    """Build (subject, body, html) of the acknowledgment sent to a lead"""
     site_name = current_app.config.get('SITE_NAME', 'FinanceClinics')
     
     subject = f'Thank you for contacting {site_name}'
@@ -178,4 +341,10 @@ The {site_name} Team
 </html>
 """
     
+    return subject, body, html
+
+
+def send_lead_acknowledgment(lead):
+    """Send acknowledgment email to user who submitted the form"""
+    subject, body, html = render_lead_acknowledgment(lead)
     return send_email(subject, lead.email, body, html)
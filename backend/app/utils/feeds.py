@@ -0,0 +1,193 @@
+"""
+FinanceClinics - Sitemap and Feed Generation
+
+sitemap.xml, rss.xml and atom.xml are rendered from published content and
+written to FEEDS_FOLDER whenever content changes. Requests are served from
+those files (cached in memory per worker), so crawlers never reach the DB.
+"""
+
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape, quoteattr
+from flask import current_app
+from sqlalchemy.orm import defer, joinedload
+from ..models.page import Page
+from ..models.service import Service
+from ..models.blogpost import BlogPost
+from ..models.user import User
+
+FEED_FILES = ('sitemap.xml', 'rss.xml', 'atom.xml')
+
+# Routes of the public SPA that have no backing row
+STATIC_PATHS = ('/', '/about', '/services', '/blog', '/contact')
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def _site_url():
+    return current_app.config.get('SITE_URL', '').rstrip('/')
+
+
+def _lastmod(obj):
+    value = obj.updated_at or obj.created_at
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+def _rfc822(value):
+    # Timestamps are stored as naive UTC
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def _isoformat(value):
+    return (value or datetime.utcnow()).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def build_sitemap(pages, services, posts):
+    """Render sitemap.xml"""
+    site_url = _site_url()
+    entries = {path: None for path in STATIC_PATHS}
+    for obj in (*pages, *services, *posts):
+        entries[obj.public_path] = _lastmod(obj)
+
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for path, lastmod in entries.items():
+        lines.append('  <url>')
+        lines.append(f'    <loc>{escape(site_url + path)}</loc>')
+        if lastmod:
+            lines.append(f'    <lastmod>{lastmod}</lastmod>')
+        lines.append('  </url>')
+    lines.append('</urlset>')
+    return '\n'.join(lines) + '\n'
+
+
+def build_rss(posts):
+    """Render rss.xml (RSS 2.0) for the latest blog posts"""
+    site_url = _site_url()
+    site_name = current_app.config.get('SITE_NAME', 'FinanceClinics')
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">',
+        '  <channel>',
+        f'    <title>{escape(site_name)}</title>',
+        f'    <link>{escape(site_url + "/blog")}</link>',
+        f'    <description>{escape(site_name)} blog</description>',
+        f'    <atom:link href={quoteattr(site_url + "/rss.xml")} rel="self" type="application/rss+xml"/>',
+    ]
+    if posts:
+        lines.append(f'    <lastBuildDate>{_rfc822(posts[0].published_at)}</lastBuildDate>')
+    for post in posts:
+        link = site_url + post.public_path
+        lines.extend([
+            '    <item>',
+            f'      <title>{escape(post.title)}</title>',
+            f'      <link>{escape(link)}</link>',
+            f'      <guid isPermaLink="true">{escape(link)}</guid>',
+            f'      <pubDate>{_rfc822(post.published_at)}</pubDate>',
+        ])
+        if post.excerpt:
+            lines.append(f'      <description>{escape(post.excerpt)}</description>')
+        if post.category:
+            lines.append(f'      <category>{escape(post.category)}</category>')
+        lines.append('    </item>')
+    lines.extend(['  </channel>', '</rss>'])
+    return '\n'.join(lines) + '\n'
+
+
+def build_atom(posts):
+    """Render atom.xml for the latest blog posts"""
+    site_url = _site_url()
+    site_name = current_app.config.get('SITE_NAME', 'FinanceClinics')
+    updated = max((p.updated_at or p.published_at for p in posts), default=None)
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f'  <title>{escape(site_name)}</title>',
+        f'  <id>{escape(site_url + "/")}</id>',
+        f'  <link href={quoteattr(site_url + "/blog")}/>',
+        f'  <link href={quoteattr(site_url + "/atom.xml")} rel="self"/>',
+        f'  <updated>{_isoformat(updated)}</updated>',
+    ]
+    for post in posts:
+        link = site_url + post.public_path
+        lines.extend([
+            '  <entry>',
+            f'    <title>{escape(post.title)}</title>',
+            f'    <id>{escape(link)}</id>',
+            f'    <link href={quoteattr(link)}/>',
+            f'    <published>{_isoformat(post.published_at)}</published>',
+            f'    <updated>{_isoformat(post.updated_at or post.published_at)}</updated>',
+        ])
+        if post.author:
+            lines.append(f'    <author><name>{escape(post.author.name)}</name></author>')
+        if post.excerpt:
+            lines.append(f'    <summary>{escape(post.excerpt)}</summary>')
+        lines.append('  </entry>')
+    lines.append('</feed>')
+    return '\n'.join(lines) + '\n'
+
+
+def _write_atomic(path, body):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+
+def rebuild_feeds():
+    """Regenerate every feed file from published content"""
+    folder = current_app.config['FEEDS_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+
+    pages = Page.query.options(defer(Page.content))\
+        .filter_by(is_published=True)\
+        .order_by(Page.sort_order.asc())\
+        .all()
+    services = Service.query.options(defer(Service.description))\
+        .filter_by(is_published=True)\
+        .order_by(Service.sort_order.asc())\
+        .all()
+    posts = BlogPost.query.options(
+            defer(BlogPost.content),
+            joinedload(BlogPost.author).load_only(User.id, User.name)
+        )\
+        .filter(BlogPost.is_published == True, BlogPost.published_at.isnot(None))\
+        .order_by(BlogPost.published_at.desc())\
+        .all()
+    latest = posts[:current_app.config.get('FEED_ITEM_LIMIT', 20)]
+
+    rendered = {
+        'sitemap.xml': build_sitemap(pages, services, posts),
+        'rss.xml': build_rss(latest),
+        'atom.xml': build_atom(latest),
+    }
+    with _lock:
+        for name, body in rendered.items():
+            _write_atomic(os.path.join(folder, name), body.encode('utf-8'))
+
+
+def load_feed(name):
+    """Return (body, etag) for a generated feed, building it if missing"""
+    path = os.path.join(current_app.config['FEEDS_FOLDER'], name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        rebuild_feeds()
+        stat = os.stat(path)
+
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _loaded.get(path)
+    if cached and cached[0] == version:
+        return cached[1], cached[2]
+
+    with open(path, 'rb') as f:
+        body = f.read()
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    _loaded[path] = (version, body, etag)
+    return body, etag
@@ -0,0 +1,104 @@
+"""
+FinanceClinics - Lead Archival
+
+Moves closed/converted leads older than LEAD_ARCHIVE_AFTER_DAYS from `leads`
+to `leads_archive`. Each batch copies the rows, adds them to the
+precomputed LeadArchiveStat counts and deletes them from `leads` in a single
+transaction, so an interrupted run leaves every lead in exactly one table
+and the counts in step with the archive.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, insert, literal
+from ..extensions import db
+from ..models.lead import Lead
+from ..models.lead_archive import LeadArchive, LeadArchiveStat
+
+# Keep "last 7 days" and "this month" lead counts answerable from the hot table
+MIN_ARCHIVE_DAYS = 31
+
+
+def archive_statuses():
+    return current_app.config.get('LEAD_ARCHIVE_STATUSES', ('closed', 'converted'))
+
+
+def _add_stats(counts):
+    for (status, month), count in counts.items():
+        updated = LeadArchiveStat.query.filter_by(status=status, month=month).update({
+            LeadArchiveStat.count: LeadArchiveStat.count + count
+        }, synchronize_session=False)
+        if not updated:
+            db.session.add(LeadArchiveStat(status=status, month=month, count=count))
+
+
+def archive_batch(cutoff, batch_size, after_id=0):
+    """Archive one batch of eligible leads with id > after_id; returns their ids"""
+    rows = db.session.query(Lead.id, Lead.status, Lead.created_at)\
+        .filter(Lead.status.in_(archive_statuses()),
+                Lead.created_at < cutoff,
+                Lead.id > after_id)\
+        .order_by(Lead.id.asc())\
+        .limit(batch_size)\
+        .all()
+    if not rows:
+        return []
+
+    ids = [row.id for row in rows]
+    columns = [c.key for c in Lead.__table__.columns]
+    source = db.session.query(*[getattr(Lead, c) for c in columns], literal(datetime.utcnow()))\
+        .filter(Lead.id.in_(ids))
+    db.session.execute(
+        insert(LeadArchive).from_select(columns + ['archived_at'], source)
+    )
+    _add_stats(Counter(
+        (status, created_at.strftime('%Y-%m')) for _, status, created_at in rows
+    ))
+    Lead.query.filter(Lead.id.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+    return ids
+
+
+def archive_leads(days=None, batch_size=500, on_batch=None):
+    """Archive every eligible lead in batches; returns the number moved"""
+    days = max(days or current_app.config.get('LEAD_ARCHIVE_AFTER_DAYS', 365), MIN_ARCHIVE_DAYS)
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    total = 0
+    last_id = 0
+    while True:
+        ids = archive_batch(cutoff, batch_size, last_id)
+        if not ids:
+            break
+        last_id = ids[-1]
+        total += len(ids)
+        if on_batch:
+            on_batch(total)
+    return total
+
+
+def archived_counts():
+    """(total, {status: count}) of archived leads from the precomputed stats"""
+    rows = db.session.query(LeadArchiveStat.status, func.sum(LeadArchiveStat.count))\
+        .group_by(LeadArchiveStat.status)\
+        .all()
+    by_status = {status: int(count) for status, count in rows}
+    return sum(by_status.values()), by_status
+
+
+def archived_monthly(since_month):
+    """{YYYY-MM: count} of archived leads created in or after since_month"""
+    rows = db.session.query(LeadArchiveStat.month, func.sum(LeadArchiveStat.count))\
+        .filter(LeadArchiveStat.month >= since_month)\
+        .group_by(LeadArchiveStat.month)\
+        .all()
+    return {month: int(count) for month, count in rows}
+
+
+def combine_counts(hot, archived):
+    """Add two {key: count} mappings"""
+    combined = dict(hot)
+    for key, count in archived.items():
+        combined[key] = combined.get(key, 0) + count
+    return combined
@@ -0,0 +1,92 @@
+"""
+FinanceClinics - Lead Deduplication
+
+Leads carry a normalized email and an E.164 phone number in indexed columns.
+A submission matching an open lead (new, contacted or qualified) last seen
+within LEAD_DEDUP_WINDOW_DAYS is recorded on that lead instead of creating a
+new one, so it triggers no further emails; the submission itself, with the
+submitter's contact details, goes to `lead_submissions`. It matches on the normalized email,
+or on the phone number together with the name: a phone alone is shared too
+often (households, office switchboards) to identify the person.
+"""
+
+import re
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, func, or_
+from ..extensions import db
+from ..models.lead import Lead, LeadSubmission
+
+OPEN_STATUSES = ('new', 'contacted', 'qualified')
+
+# Providers that ignore dots in the local part
+DOTLESS_DOMAINS = {'gmail.com': 'gmail.com', 'googlemail.com': 'gmail.com'}
+
+_PHONE_STRIP_RE = re.compile(r'[^\d+]')
+
+
+def normalize_email(email):
+    """Lowercase, drop +tags, and fold provider-specific aliases"""
+    if not email or '@' not in email:
+        return None
+    local, _, domain = email.strip().lower().rpartition('@')
+    local = local.split('+', 1)[0]
+    if domain in DOTLESS_DOMAINS:
+        domain = DOTLESS_DOMAINS[domain]
+        local = local.replace('.', '')
+    return f'{local}@{domain}' if local else None
+
+
+def normalize_phone(phone, default_country_code=None):
+    """Best-effort E.164 form of a phone number, None if it cannot be one"""
+    if not phone:
+        return None
+    cleaned = _PHONE_STRIP_RE.sub('', phone)
+    if cleaned.startswith('+'):
+        digits = cleaned[1:].replace('+', '')
+    elif cleaned.startswith('00'):
+        digits = cleaned[2:]
+    else:
+        if default_country_code is None:
+            default_country_code = current_app.config.get('LEAD_DEFAULT_COUNTRY_CODE', '91')
+        national = cleaned.lstrip('0')  # drop the trunk prefix
+        digits = default_country_code + national if len(national) <= 10 else national
+    if not digits.isdigit() or not 8 <= len(digits) <= 15:
+        return None
+    return '+' + digits
+
+
+def normalize_name(name):
+    """Casefolded name with runs of whitespace collapsed"""
+    return ' '.join((name or '').split()).lower()
+
+
+def find_open_lead(email_normalized, phone_e164, name=None):
+    """Most recent open lead within the dedup window sharing the email, or the phone and name"""
+    matches = []
+    if email_normalized:
+        matches.append(Lead.email_normalized == email_normalized)
+    if phone_e164 and normalize_name(name):
+        matches.append(and_(Lead.phone_e164 == phone_e164, func.lower(Lead.name) == normalize_name(name)))
+    if not matches:
+        return None
+
+    window = timedelta(days=current_app.config.get('LEAD_DEDUP_WINDOW_DAYS', 30))
+    return Lead.query.filter(
+        or_(*matches),
+        Lead.status.in_(OPEN_STATUSES),
+        Lead.last_submitted_at >= datetime.utcnow() - window
+    ).order_by(Lead.id.desc()).first()
+
+
+def record_repeat(lead, submission):
+    """Count a repeat submission on an existing lead and keep it as a LeadSubmission"""
+    now = datetime.utcnow()
+    submission.lead_id = lead.id
+    submission.created_at = now
+    db.session.add(submission)
+    Lead.query.filter_by(id=lead.id).update({
+        Lead.submission_count: Lead.submission_count + 1,
+        Lead.last_submitted_at: now,
+    }, synchronize_session=False)
+    db.session.commit()
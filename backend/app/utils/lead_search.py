@@ -0,0 +1,221 @@
+"""
+FinanceClinics - Admin Lead Search
+
+Two kinds of match, each served by an index:
+
+- prefix lookups on email, name and phone (`LIKE 'q%'` on B-tree indexes),
+  picked by the shape of the query so only the relevant index is probed.
+  SQLite's LIKE is case-insensitive, so there the name index is a NOCASE
+  one, created on first use. Matching ids are sorted and limited from the
+  index before any row is loaded;
+- full-text matches on organization and message, ranked by relevance. MySQL
+  uses the `ft_lead_search` FULLTEXT index from db/schema.sql; SQLite uses an
+  external-content FTS5 table kept in sync by triggers, created on first use.
+
+Prefix hits rank above text hits. Results are keyset-paginated with an
+opaque cursor, so deep pages cost the same as the first one.
+"""
+
+import base64
+import json
+import re
+import threading
+from sqlalchemy import text, or_, and_, literal, true
+from ..extensions import db
+from ..models.lead import Lead
+from .search import tokenize
+
+PREFIX_TIER = 0
+TEXT_TIER = 1
+
+_PHONE_QUERY_RE = re.compile(r'^\+?[\d\s\-\(\)\.]{3,}$')
+_PHONE_STRIP_RE = re.compile(r'[\s\-\(\)\.]')
+
+_fts_lock = threading.Lock()
+_fts_ready = set()
+
+FTS5_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS leads_fts USING fts5("
+    "organization, message, content='leads', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS leads_fts_ai AFTER INSERT ON leads BEGIN "
+    "INSERT INTO leads_fts(rowid, organization, message) VALUES (new.id, new.organization, new.message); END",
+    "CREATE TRIGGER IF NOT EXISTS leads_fts_ad AFTER DELETE ON leads BEGIN "
+    "INSERT INTO leads_fts(leads_fts, rowid, organization, message) "
+    "VALUES ('delete', old.id, old.organization, old.message); END",
+    "CREATE TRIGGER IF NOT EXISTS leads_fts_au AFTER UPDATE OF organization, message ON leads BEGIN "
+    "INSERT INTO leads_fts(leads_fts, rowid, organization, message) "
+    "VALUES ('delete', old.id, old.organization, old.message); "
+    "INSERT INTO leads_fts(rowid, organization, message) VALUES (new.id, new.organization, new.message); END",
+)
+
+# SQLite only uses an index for a case-insensitive LIKE if it has NOCASE collation
+NAME_INDEX_DDL = "CREATE INDEX IF NOT EXISTS ix_leads_name_nocase ON leads (name COLLATE NOCASE)"
+
+
+def encode_cursor(tier, score, lead_id):
+    raw = json.dumps([tier, score, lead_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor; raises ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        tier, score, lead_id = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError('Invalid cursor') from e
+    if tier not in (PREFIX_TIER, TEXT_TIER) or not isinstance(lead_id, (int, type(None))) or \
+            not isinstance(score, (int, float, type(None))):
+        raise ValueError('Invalid cursor')
+    return tier, score, lead_id
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _starts_with(column, prefix):
+    """Range form of a prefix match; unlike SQLite's LIKE it can always use the index"""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper)
+
+
+def _prefix_filter(query):
+    """Prefix condition on the indexed column(s) that fit the query's shape"""
+    # Emails are stored lowercased, so the case-sensitive range form is exact
+    if '@' in query:
+        return _starts_with(Lead.email, query.lower()), 'email'
+    if _PHONE_QUERY_RE.match(query):
+        conditions = [_starts_with(Lead.phone, query)]
+        digits = _PHONE_STRIP_RE.sub('', query)
+        if digits and digits != query:
+            conditions.append(_starts_with(Lead.phone, digits))
+        return or_(*conditions), 'phone'
+    return or_(
+        Lead.name.like(_escape_like(query) + '%', escape='\\'),
+        _starts_with(Lead.email, query.lower()),
+    ), 'name'
+
+
+def _ensure_sqlite_indexes():
+    """Create the SQLite FTS5 table, its triggers and the NOCASE name index once per database"""
+    url = str(db.engine.url)
+    if url in _fts_ready:
+        return
+    with _fts_lock:
+        if url in _fts_ready:
+            return
+        with db.engine.begin() as conn:
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'leads_fts'"
+            )).first()
+            for statement in FTS5_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                conn.execute(text("INSERT INTO leads_fts(leads_fts) VALUES ('rebuild')"))
+            conn.execute(text(NAME_INDEX_DDL))
+        _fts_ready.add(url)
+
+
+def _text_match(query):
+    """(join target or None, filter, score expression) for a full-text match"""
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import match
+        score = match(Lead.organization, Lead.message, against=query)
+        return None, score > 0, score
+
+    terms = tokenize(query)
+    if not terms:
+        return None, None, None
+
+    if dialect == 'sqlite':
+        _ensure_sqlite_indexes()
+        fts_query = ' '.join('"{}"'.format(t.replace('"', '""')) for t in terms)
+        hits = text(
+            'SELECT rowid AS id, -bm25(leads_fts) AS score FROM leads_fts WHERE leads_fts MATCH :q'
+        ).bindparams(q=fts_query).columns(id=db.Integer, score=db.Float).subquery('fts')
+        return (hits, hits.c.id == Lead.id), None, hits.c.score
+
+    # Other databases: unindexed substring match, unranked
+    conditions = [or_(Lead.organization.ilike(f'%{_escape_like(t)}%', escape='\\'),
+                      Lead.message.ilike(f'%{_escape_like(t)}%', escape='\\')) for t in terms]
+    return None, and_(*conditions), literal(1.0)
+
+
+def _base_query(columns, status):
+    query = db.session.query(Lead, *columns)
+    if status:
+        query = query.filter(Lead.status == status)
+    return query
+
+
+def _prefix_hits(query, status, after_id, limit):
+    if db.engine.dialect.name == 'sqlite':
+        _ensure_sqlite_indexes()
+    condition, field = _prefix_filter(query)
+    # Sort and limit the ids straight from the index, then load only that page:
+    # a common name can match thousands of rows
+    ids = db.session.query(Lead.id).filter(condition)
+    if status:
+        ids = ids.filter(Lead.status == status)
+    if after_id is not None:
+        ids = ids.filter(Lead.id < after_id)
+    page = ids.order_by(Lead.id.desc()).limit(limit).subquery('page')
+    leads = db.session.query(Lead)\
+        .join(page, page.c.id == Lead.id)\
+        .order_by(Lead.id.desc())\
+        .all()
+    if field == 'name':
+        lowered = query.lower()
+        return [(lead, 'email' if lead.email.startswith(lowered) else 'name', None) for lead in leads]
+    return [(lead, field, None) for lead in leads]
+
+
+def _text_hits(query, status, after, limit, exclude):
+    join, condition, score = _text_match(query)
+    if score is None:
+        return []
+    q = _base_query([score], status)
+    if join is not None:
+        q = q.join(*join)
+    if condition is not None:
+        q = q.filter(condition)
+    if exclude is not None:
+        # Leads already listed as prefix hits; IS NOT TRUE keeps rows where it is NULL
+        q = q.filter(exclude.is_not(true()))
+    if after is not None:
+        after_score, after_id = after
+        q = q.filter(or_(score < after_score, and_(score == after_score, Lead.id < after_id)))
+    rows = q.order_by(score.desc(), Lead.id.desc()).limit(limit).all()
+    return [(lead, 'text', float(row_score)) for lead, row_score in rows]
+
+
+def search_leads(query, limit=20, cursor=None, status=None):
+    """Ranked lead search. Returns (hits, next_cursor); hits are (lead, match, score)."""
+    # A text-tier cursor without an id starts at the best text hit
+    tier, after_score, after_id = decode_cursor(cursor) if cursor else (PREFIX_TIER, None, None)
+    prefix_condition, _ = _prefix_filter(query)
+
+    hits = []
+    if tier == PREFIX_TIER:
+        hits = _prefix_hits(query, status, after_id, limit + 1)
+        if len(hits) > limit:
+            last = hits[limit - 1][0]
+            return hits[:limit], encode_cursor(PREFIX_TIER, 0, last.id)
+        after = None
+    else:
+        after = (after_score, after_id) if after_id is not None else None
+
+    remaining = limit - len(hits)
+    text_hits = _text_hits(query, status, after, remaining + 1, prefix_condition)
+    next_cursor = None
+    if len(text_hits) > remaining:
+        text_hits = text_hits[:remaining]
+        if text_hits:
+            last_lead, _, last_score = text_hits[-1]
+            next_cursor = encode_cursor(TEXT_TIER, last_score, last_lead.id)
+        else:
+            # The page filled up exactly with prefix hits
+            next_cursor = encode_cursor(TEXT_TIER, None, None)
+    return hits + text_hits, next_cursor
@@ -0,0 +1,158 @@
+"""
+FinanceClinics - Login Throttle
+
+Checked before any password hashing, so a credential-stuffing run is turned
+away for the cost of a storage lookup:
+
+- failed logins are counted per email and per client IP in sliding windows
+  kept in the rate limiter's storage, so every worker sees the same counts;
+- filling a window locks that email or IP out for LOGIN_LOCKOUT_SECONDS,
+  doubling with each further lockout within a day up to
+  LOGIN_LOCKOUT_MAX_SECONDS, and starts a fresh window;
+- emails with no active account are remembered in a bounded per-worker
+  cache so repeat guesses skip the user query. They still run a dummy hash,
+  so an unknown email answers no faster than a wrong password. The cache is
+  dropped when the 'users' CacheVersion moves (re-checked at most every
+  USER_CACHE_CHECK_SECONDS), so an account created or approved in another
+  worker can log in everywhere within seconds.
+"""
+
+import secrets
+import threading
+import time
+from flask import current_app
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import MovingWindowRateLimiter, FixedWindowRateLimiter
+from ..models.cache_version import CacheVersion
+from .cache import TTLCache
+from .passwords import hash_password, verify_password
+from .user_cache import USERS_VERSION
+
+LOCKOUT_HISTORY_SECONDS = 86400
+
+
+class LoginThrottle:
+    """Failed-login windows and lockouts per email and per IP"""
+
+    def __init__(self):
+        self._unknown = None
+        self._unknown_version = None
+        self._unknown_checked_at = 0.0
+        self._lock = threading.Lock()
+        self._dummy_hash = None
+        self._dummy_policy = None
+        self._storages = {}
+
+    def enabled(self):
+        return current_app.config.get('LOGIN_THROTTLE_ENABLED', True)
+
+    def _storage(self):
+        # Same backend as the rate limiter, even when request limits are disabled
+        uri = current_app.config.get('RATELIMIT_STORAGE_URI', 'memory://')
+        storage = self._storages.get(uri)
+        if storage is None:
+            storage = self._storages.setdefault(uri, storage_from_string(uri))
+        return storage
+
+    def _window(self):
+        storage = self._storage()
+        if hasattr(storage, 'acquire_entry'):
+            return MovingWindowRateLimiter(storage)
+        return FixedWindowRateLimiter(storage)
+
+    def _scopes(self, email, ip):
+        config = current_app.config
+        scopes = [('email', email, config.get('LOGIN_EMAIL_LIMIT', '5 per 15 minutes'))]
+        if ip:
+            scopes.append(('ip', ip, config.get('LOGIN_IP_LIMIT', '30 per 15 minutes')))
+        return [(scope, ident, parse(limit)) for scope, ident, limit in scopes]
+
+    def retry_after(self, email, ip):
+        """Seconds until a login may be attempted; 0 if it may be now"""
+        if not self.enabled():
+            return 0
+        storage = self._storage()
+        now = time.time()
+        wait = 0
+        for scope, ident, _ in self._scopes(email, ip):
+            lock_key = f'LIMITER/login-lock/{scope}/{ident}'
+            if storage.get(lock_key):
+                wait = max(wait, int(storage.get_expiry(lock_key) - now) + 1)
+        return wait
+
+    def _lock_out(self, scope, ident, item):
+        config = current_app.config
+        storage = self._storage()
+        lockouts = storage.incr(f'LIMITER/login-lockouts/{scope}/{ident}',
+                                LOCKOUT_HISTORY_SECONDS, elastic_expiry=True)
+        duration = min(config.get('LOGIN_LOCKOUT_SECONDS', 60) * 2 ** (lockouts - 1),
+                       config.get('LOGIN_LOCKOUT_MAX_SECONDS', 3600))
+        lock_key = f'LIMITER/login-lock/{scope}/{ident}'
+        storage.clear(lock_key)
+        storage.incr(lock_key, int(duration))
+        storage.clear(item.key_for('login', scope, ident))
+        current_app.logger.warning(f'Login locked for {scope} {ident} for {int(duration)}s')
+
+    def failed(self, email, ip):
+        """Record a failed login; locks the email or IP out once its window fills"""
+        if not self.enabled():
+            return
+        window = self._window()
+        for scope, ident, item in self._scopes(email, ip):
+            window.hit(item, 'login', scope, ident)
+            if not window.test(item, 'login', scope, ident):
+                self._lock_out(scope, ident, item)
+
+    def succeeded(self, email):
+        """Forget the failures and lockout history of an email after it logs in"""
+        if not self.enabled():
+            return
+        storage = self._storage()
+        item = parse(current_app.config.get('LOGIN_EMAIL_LIMIT', '5 per 15 minutes'))
+        storage.clear(item.key_for('login', 'email', email))
+        storage.clear(f'LIMITER/login-lockouts/email/{email}')
+
+    def _unknown_emails(self):
+        config = current_app.config
+        if self._unknown is None:
+            with self._lock:
+                if self._unknown is None:
+                    self._unknown = TTLCache(
+                        maxsize=config.get('LOGIN_UNKNOWN_EMAIL_CACHE_SIZE', 10000),
+                        ttl=config.get('LOGIN_UNKNOWN_EMAIL_CACHE_SECONDS', 60)
+                    )
+
+        interval = config.get('USER_CACHE_CHECK_SECONDS', 5)
+        if time.monotonic() - self._unknown_checked_at >= interval:
+            with self._lock:
+                if time.monotonic() - self._unknown_checked_at >= interval:
+                    version = CacheVersion.get(USERS_VERSION)
+                    if version != self._unknown_version:
+                        self._unknown.clear()
+                        self._unknown_version = version
+                    self._unknown_checked_at = time.monotonic()
+        return self._unknown
+
+    def is_unknown(self, email):
+        return email in self._unknown_emails()
+
+    def remember_unknown(self, email):
+        self._unknown_emails().set(email, True)
+
+    def forget_unknown(self, email):
+        """Call when an account with this email is created or activated (with users_changed for other workers)"""
+        if email:
+            self._unknown_emails().pop(email)
+
+    def dummy_check(self, password):
+        """Hash a password against a throwaway hash, at the cost of a real check"""
+        # Made with the current policy, so it costs what a real account's hash does
+        if self._dummy_hash is None or self._dummy_policy != current_app.config.get('PASSWORD_HASHER'):
+            self._dummy_policy = current_app.config.get('PASSWORD_HASHER')
+            self._dummy_hash = hash_password(secrets.token_urlsafe(16))
+        verify_password(password, self._dummy_hash)
+        return False
+
+
+login_throttle = LoginThrottle()
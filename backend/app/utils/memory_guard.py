@@ -0,0 +1,221 @@
+"""
+FinanceClinics - Memory Guard
+
+Endpoints that parse or build whole files in memory (MIS import and export)
+are wrapped in `@memory_budget`. While one runs, a thread samples the
+worker's resident memory every MEMORY_SAMPLE_SECONDS and records its peak
+growth over the request. Once the growth passes MEMORY_BUDGET_MB, the next
+`check_memory()` call in the view raises `MemoryBudgetExceeded`, and the
+request fails with 413 or 503 and a hint towards the streamed CSV path,
+instead of the OOM killer taking the worker down. Views also call
+`check_memory(expected)` with an estimate before an allocation they cannot
+interrupt (pandas, python-docx), to fail before it starts. Streamed responses
+(the CSV export) are not measured or reported: their body is generated after
+the view has returned.
+
+RSS belongs to the whole worker process, not to one request. Anything else
+running in the same worker (another thread's request) counts towards the
+guarded request's growth and can get it rejected, and memory freed meanwhile
+hides some of it. Guarded workers therefore run with one thread each
+(`--threads 1` in the Dockerfile); add workers, not threads, for concurrency.
+
+One in MEMORY_TRACE_SAMPLE guarded requests also runs under tracemalloc and
+reports its top allocating lines. Peak growth, rejections and worker RSS are
+exported through /api/metrics; the recent reports of this worker are listed at
+GET /api/admin/diagnostics/memory.
+"""
+
+import os
+import random
+import threading
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from ..extensions import db
+from .metrics import metrics
+
+MB = 1024 * 1024
+MEMORY_BUCKETS = tuple(n * MB for n in (1, 4, 16, 64, 128, 256, 512, 1024, 2048))
+
+metrics.define('memory_peak_growth_bytes', 'histogram', 'Peak RSS growth of guarded requests', MEMORY_BUCKETS)
+metrics.define('memory_budget_rejections_total', 'counter', 'Guarded requests stopped at MEMORY_BUDGET_MB')
+metrics.define('process_resident_memory_bytes', 'gauge', 'Worker RSS after the last guarded request')
+
+try:
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = 4096
+
+
+def rss_bytes():
+    """Resident memory of this process, from /proc; peak RSS where /proc is missing"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryBudgetExceeded(Exception):
+    """A guarded request grew the worker past MEMORY_BUDGET_MB"""
+
+
+class MemoryGuard:
+    """Samples RSS in a thread while a request runs; `check` enforces the budget"""
+
+    def __init__(self, budget, interval):
+        self.budget = budget
+        self.interval = interval
+        self.start = rss_bytes()
+        self.peak = self.start
+        self.exceeded = False
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='memory-guard', daemon=True)
+        self._thread.start()
+
+    def _sample(self):
+        rss = rss_bytes()
+        if rss > self.peak:
+            self.peak = rss
+        if self.budget and rss - self.start > self.budget:
+            self.exceeded = True
+        return rss
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self._sample()
+
+    @property
+    def growth(self):
+        return self.peak - self.start
+
+    def check(self, expected=0):
+        if self.exceeded:
+            raise MemoryBudgetExceeded(f'memory grew by {self.growth // MB} MB')
+        if self.budget and expected and self._sample() - self.start + expected > self.budget:
+            raise MemoryBudgetExceeded(f'about {expected // MB} MB more would be needed')
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        return self._sample()
+
+
+def check_memory(expected=0):
+    """Raise MemoryBudgetExceeded if this request is over budget, or would be after `expected` more bytes"""
+    guard = g.get('_memory_guard')
+    if guard is not None:
+        guard.check(expected)
+
+
+class MemoryReports:
+    """Recent guarded requests of this worker"""
+
+    def __init__(self, size=50):
+        self._reports = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, report):
+        with self._lock:
+            self._reports.append(report)
+
+    def recent(self):
+        with self._lock:
+            return list(reversed(self._reports))
+
+
+memory_reports = MemoryReports()
+_trace_lock = threading.Lock()
+
+
+def _start_trace(config):
+    # tracemalloc is process-wide: only one request traces at a time
+    sample = config.get('MEMORY_TRACE_SAMPLE', 20)
+    if not sample or random.randrange(sample) or not _trace_lock.acquire(blocking=False):
+        return False
+    if tracemalloc.is_tracing():
+        # Started outside this module (PYTHONTRACEMALLOC); leave it alone
+        _trace_lock.release()
+        return False
+    tracemalloc.start()
+    return True
+
+
+def _stop_trace(top):
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        _, traced_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        _trace_lock.release()
+    stats = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    )).statistics('lineno')[:top]
+    return traced_peak, [
+        {'line': f'{s.traceback[0].filename}:{s.traceback[0].lineno}', 'size': s.size, 'count': s.count}
+        for s in stats
+    ]
+
+
+def _report(guard, rss, rejected, traced):
+    endpoint = request.endpoint
+    report = {
+        'endpoint': endpoint,
+        'at': datetime.utcnow().isoformat(),
+        'pid': os.getpid(),
+        'rss_start': guard.start,
+        'peak_growth': guard.growth,
+        'rejected': rejected,
+    }
+    if traced:
+        report['traced_peak'], report['top_allocations'] = traced
+    memory_reports.add(report)
+
+    metrics.observe('memory_peak_growth_bytes', guard.growth, endpoint=endpoint)
+    metrics.set('process_resident_memory_bytes', rss)
+    if rejected:
+        metrics.inc('memory_budget_rejections_total', endpoint=endpoint)
+        current_app.logger.warning(f'{endpoint} stopped at the memory budget: {rejected}')
+
+
+def memory_budget(status, hint):
+    """Guard a view: measure its memory and stop it at MEMORY_BUDGET_MB with `status`"""
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            config = current_app.config
+            if not config.get('MEMORY_GUARD_ENABLED', True):
+                return fn(*args, **kwargs)
+
+            guard = MemoryGuard(int(config.get('MEMORY_BUDGET_MB', 256) * MB),
+                                config.get('MEMORY_SAMPLE_SECONDS', 0.05))
+            tracing = _start_trace(config)
+            g._memory_guard = guard
+            rejected = None
+            streamed = False
+            try:
+                response = fn(*args, **kwargs)
+                # A streamed body is generated after the view returns, outside the guard,
+                # so there is nothing to measure for it
+                streamed = getattr(response, 'is_streamed', False)
+                return response
+            except MemoryBudgetExceeded as e:
+                rejected = str(e)
+                db.session.rollback()
+                return jsonify({
+                    'error': f'This request needs more memory than the server allows ({rejected})',
+                    'budget_mb': guard.budget // MB,
+                    'hint': hint,
+                }), status
+            finally:
+                g._memory_guard = None
+                rss = guard.stop()
+                traced = _stop_trace(config.get('MEMORY_TRACE_TOP', 10)) if tracing else None
+                if not streamed:
+                    _report(guard, rss, rejected, traced)
+        return decorator
+    return wrapper
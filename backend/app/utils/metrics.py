@@ -0,0 +1,328 @@
+"""
+FinanceClinics - Request Metrics
+
+Per-worker counters, gauges and histograms recorded by hooks that
+`init_metrics` registers in create_app:
+
+- request latency and response size per endpoint, method and status;
+- SQL statements and SQL time per request (cursor execute events);
+- connection pool checkout wait;
+- Flask-Limiter rejections (counted by the RateLimitExceeded handler in
+  create_app, so other 429s such as the login throttle are not included).
+
+Each worker keeps its numbers in memory and writes them to its own JSON file
+in METRICS_DIR at most every METRICS_FLUSH_SECONDS. GET /api/metrics merges
+the files of all workers into the Prometheus text format. Files left by
+workers that exited are folded into a single archive file so counters keep
+growing across worker recycles. Gauges are reported per live worker (`pid`).
+"""
+
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from flask import current_app, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# name -> (type, help, buckets)
+DEFINITIONS = {
+    'http_request_duration_seconds': ('histogram', 'Request latency', LATENCY_BUCKETS),
+    'http_response_bytes': ('histogram', 'Response body size', BYTES_BUCKETS),
+    'sql_statements_per_request': ('histogram', 'SQL statements executed per request', COUNT_BUCKETS),
+    'sql_seconds_total': ('counter', 'Time spent executing SQL', None),
+    'sql_statements_total': ('counter', 'SQL statements executed', None),
+    'db_pool_checkout_wait_seconds': ('histogram', 'Time waiting for a pooled connection', WAIT_BUCKETS),
+    'ratelimit_rejections_total': ('counter', 'Requests rejected by a rate limit', None),
+}
+
+PREFIX = 'financeclinics_'
+ARCHIVE_FILE = 'metrics-archive.json'
+
+
+class Metrics:
+    """In-process metric values plus the per-worker file they are flushed to"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+        self._flushed_at = 0.0
+        self._path = None
+        self._pid = None
+
+    def define(self, name, type_, help_, buckets=None):
+        DEFINITIONS[name] = (type_, help_, buckets)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._observe(key, value)
+
+    def _observe(self, key, value):
+        # Caller holds the lock; key is (name, sorted label pairs)
+        buckets = DEFINITIONS[key[0]][2]
+        entry = self._histograms.get(key)
+        if entry is None:
+            entry = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def record_request(self, endpoint, method, status, duration, size, statements, sql_seconds):
+        """Record everything measured for one request under a single lock"""
+        by_endpoint = (('endpoint', endpoint),)
+        with self._lock:
+            self._observe(('http_request_duration_seconds',
+                           (('endpoint', endpoint), ('method', method), ('status', status))), duration)
+            if size is not None:
+                self._observe(('http_response_bytes', by_endpoint), size)
+            self._observe(('sql_statements_per_request', by_endpoint), statements)
+            if statements:
+                key = ('sql_statements_total', by_endpoint)
+                self._counters[key] = self._counters.get(key, 0) + statements
+                key = ('sql_seconds_total', by_endpoint)
+                self._counters[key] = self._counters.get(key, 0) + sql_seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[n, list(l), v] for (n, l), v in self._counters.items()],
+                'histograms': [[n, list(l), list(e[0]), e[1], e[2]] for (n, l), e in self._histograms.items()],
+                'gauges': [[n, list(l), v] for (n, l), v in self._gauges.items()],
+            }
+
+    # Per-worker files
+
+    def _after_fork(self):
+        # A forked worker starts from zero with a file of its own
+        self._lock = threading.Lock()
+        self._counters, self._histograms, self._gauges = {}, {}, {}
+        self._flushed_at = 0.0
+        self._pid = None
+
+    def _worker_path(self, directory):
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._path = os.path.join(directory, f'metrics-{self._pid}-{uuid.uuid4().hex[:8]}.json')
+        return self._path
+
+    def flush(self, directory, force=False, interval=5):
+        if not force and time.monotonic() - self._flushed_at < interval:
+            return
+        self._flushed_at = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        path = self._worker_path(directory)
+        data = self.snapshot()
+        data['pid'] = os.getpid()
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+
+metrics = Metrics()
+os.register_at_fork(after_in_child=metrics._after_fork)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge(total, data, keep_gauges):
+    for name, labels, value in data.get('counters', ()):
+        key = (name, tuple(map(tuple, labels)))
+        total['counters'][key] = total['counters'].get(key, 0) + value
+    for name, labels, buckets, sum_, count in data.get('histograms', ()):
+        key = (name, tuple(map(tuple, labels)))
+        entry = total['histograms'].get(key)
+        if entry is None or len(entry[0]) != len(buckets):
+            entry = total['histograms'][key] = [[0] * len(buckets), 0.0, 0]
+        entry[0] = [a + b for a, b in zip(entry[0], buckets)]
+        entry[1] += sum_
+        entry[2] += count
+    if keep_gauges:
+        pid = str(data.get('pid', ''))
+        for name, labels, value in data.get('gauges', ()):
+            key = (name, tuple(map(tuple, labels)) + (('pid', pid),))
+            total['gauges'][key] = value
+
+
+def _to_file_format(total):
+    return {
+        'counters': [[n, list(l), v] for (n, l), v in total['counters'].items()],
+        'histograms': [[n, list(l), e[0], e[1], e[2]] for (n, l), e in total['histograms'].items()],
+    }
+
+
+def collect(directory):
+    """Merge every worker's file; folds files of exited workers into the archive"""
+    total = {'counters': {}, 'histograms': {}, 'gauges': {}}
+    archive_path = os.path.join(directory, ARCHIVE_FILE)
+    with open(os.path.join(directory, '.lock'), 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            archive = {'counters': {}, 'histograms': {}, 'gauges': {}}
+            if os.path.exists(archive_path):
+                with open(archive_path) as f:
+                    _merge(archive, json.load(f), keep_gauges=False)
+            dead = []
+            for path in glob.glob(os.path.join(directory, 'metrics-*-*.json')):
+                try:
+                    with open(path) as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if _pid_alive(data.get('pid', 0)):
+                    _merge(total, data, keep_gauges=True)
+                else:
+                    _merge(archive, data, keep_gauges=False)
+                    dead.append(path)
+            if dead:
+                tmp = f'{archive_path}.tmp'
+                with open(tmp, 'w') as f:
+                    json.dump(_to_file_format(archive), f, separators=(',', ':'))
+                os.replace(tmp, archive_path)
+                for path in dead:
+                    os.remove(path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    _merge(total, _to_file_format(archive), keep_gauges=False)
+    return total
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def render(total):
+    """Prometheus text exposition of merged metrics"""
+    series = {}
+    for kind in ('counters', 'histograms', 'gauges'):
+        for (name, labels), value in total[kind].items():
+            series.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name in sorted(series):
+        type_, help_, buckets = DEFINITIONS.get(name, ('gauge', name, None))
+        full = PREFIX + name
+        lines.append(f'# HELP {full} {help_}')
+        lines.append(f'# TYPE {full} {type_}')
+        for labels, value in sorted(series[name]):
+            if type_ == 'histogram':
+                counts, sum_, count = value
+                cumulative = 0
+                for bound, n in zip(list(buckets) + ['+Inf'], counts):
+                    cumulative += n
+                    lines.append(f'{full}_bucket{_format_labels(labels, ("le", bound))} {cumulative}')
+                lines.append(f'{full}_sum{_format_labels(labels)} {sum_}')
+                lines.append(f'{full}_count{_format_labels(labels)} {count}')
+            else:
+                lines.append(f'{full}{_format_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_dir():
+    return current_app.config['METRICS_DIR']
+
+
+# Request and SQL hooks
+
+_request_stats = threading.local()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = getattr(_request_stats, 'current', None)
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - context._metrics_started
+
+
+def _instrument_pool(pool):
+    """Time Pool.connect, the checkout path every session connection goes through"""
+    if getattr(pool, '_metrics_instrumented', False):
+        return
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            metrics.observe('db_pool_checkout_wait_seconds', time.perf_counter() - started)
+
+    pool.connect = timed_connect
+    pool._metrics_instrumented = True
+
+
+def init_metrics(app):
+    """Register the request, SQL and pool instrumentation on an app"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    from ..extensions import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if not getattr(engine, '_metrics_listening', False):
+                event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+                engine._metrics_listening = True
+            _instrument_pool(engine.pool)
+
+    directory = app.config['METRICS_DIR']
+    flush_interval = app.config.get('METRICS_FLUSH_SECONDS', 5)
+
+    @app.before_request
+    def start_request_metrics():
+        _request_stats.current = [0, 0.0, time.perf_counter()]
+
+    @app.after_request
+    def record_request_metrics(response):
+        stats = getattr(_request_stats, 'current', None)
+        if stats is None:
+            return response
+        _request_stats.current = None
+        metrics.record_request(
+            request.endpoint or 'unmatched', request.method, str(response.status_code),
+            time.perf_counter() - stats[2],
+            None if response.is_streamed else response.calculate_content_length() or 0,
+            stats[0], stats[1]
+        )
+        metrics.flush(directory, interval=flush_interval)
+        return response
+
+    atexit.register(lambda: metrics.flush(directory, force=True) if metrics._pid == os.getpid() else None)
@@ -0,0 +1,105 @@
+"""
+FinanceClinics - N+1 Query Detector
+
+While N_PLUS_ONE_DETECTION is on, every statement a request executes is
+fingerprinted (see `slow_queries.fingerprint`) and counted. When the same
+fingerprint runs more than N_PLUS_ONE_THRESHOLD times in one request - a lazy
+load inside a loop, typically - the request is reported with the statement,
+the count and the first frame of application code that issued it.
+
+Reports are logged as warnings; with N_PLUS_ONE_RAISE (on in TestingConfig)
+the request fails with `NPlusOneError` instead, so a test exercising the
+endpoint catches the regression. Views that loop on purpose can be exempted
+with `@allow_repeated_queries`.
+"""
+
+import os
+import sysconfig
+import traceback
+from functools import wraps
+from flask import g, has_request_context, current_app, request
+from sqlalchemy import event
+from .slow_queries import fingerprint
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+THIS_FILE = os.path.abspath(__file__)
+LIBRARY_DIRS = tuple({sysconfig.get_paths()[k] for k in ('stdlib', 'platstdlib', 'purelib', 'platlib')})
+
+
+class NPlusOneError(AssertionError):
+    """The same statement ran more than N_PLUS_ONE_THRESHOLD times in a request"""
+
+
+def allow_repeated_queries(fn):
+    """Exempt a view from N+1 detection"""
+    @wraps(fn)
+    def decorator(*args, **kwargs):
+        g._n_plus_one_exempt = True
+        return fn(*args, **kwargs)
+    return decorator
+
+
+def _origin():
+    """Innermost stack frame in application code (else outside libraries)"""
+    fallback = None
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if filename == THIS_FILE:
+            continue
+        if filename.startswith(APP_DIR):
+            return f'{os.path.relpath(filename, os.path.dirname(APP_DIR))}:{frame.lineno} in {frame.name}'
+        if fallback is None and not filename.startswith(LIBRARY_DIRS):
+            fallback = f'{filename}:{frame.lineno} in {frame.name}'
+    return fallback or 'unknown'
+
+
+def init_n_plus_one_detection(app):
+    """Count statement fingerprints per request on the app's engines"""
+    if not app.config.get('N_PLUS_ONE_DETECTION', False):
+        return
+    from ..extensions import db
+
+    threshold = app.config.get('N_PLUS_ONE_THRESHOLD', 5)
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context():
+            return
+        seen = g.get('_n_plus_one_seen')
+        if seen is None:
+            return
+        key = fingerprint(statement)
+        count = seen.get(key, 0) + 1
+        seen[key] = count
+        if count == threshold + 1:
+            g._n_plus_one_origins[key] = _origin()
+
+    @app.before_request
+    def start_n_plus_one_detection():
+        # g outlives the request when a test pushed an app context, so reset all of it
+        g._n_plus_one_seen = {}
+        g._n_plus_one_origins = {}
+        g._n_plus_one_exempt = False
+
+    @app.after_request
+    def report_n_plus_one(response):
+        seen = g.pop('_n_plus_one_seen', None)
+        origins = g.pop('_n_plus_one_origins', None)
+        if not origins or g.pop('_n_plus_one_exempt', False):
+            return response
+
+        reports = [
+            f'{seen[key]}x from {origin}: {key}'
+            for key, origin in origins.items()
+        ]
+        message = f'Possible N+1 queries in {request.endpoint} ' \
+                  f'(same statement over {threshold} times):\n  ' + '\n  '.join(reports)
+        if current_app.config.get('N_PLUS_ONE_RAISE', False):
+            raise NPlusOneError(message)
+        current_app.logger.warning(message)
+        return response
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if not getattr(engine, '_n_plus_one_listening', False):
+                event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+                engine._n_plus_one_listening = True
@@ -0,0 +1,253 @@
+"""
+FinanceClinics - Email Outbox Delivery
+
+Requests only insert EmailOutbox rows; delivery happens here, either in a
+background thread per worker or through `flask outbox-worker`.
+
+Each due row is claimed with a conditional UPDATE that bumps `attempts` and
+pushes `next_attempt_at` out by a lease, so several workers can poll the
+same table without sending an email twice. A worker that dies mid-send
+simply lets the lease expire. Failures are retried with exponential backoff
+and jitter; after EMAIL_OUTBOX_MAX_ATTEMPTS the row is marked 'dead'.
+
+With LEAD_DIGEST_ENABLED, admin lead notifications are held with status
+'digest'. Once LEAD_DIGEST_MAX_LEADS are waiting, or the oldest has waited
+LEAD_DIGEST_INTERVAL_SECONDS, they are folded into a single 'lead_digest'
+email that goes through the same delivery path.
+"""
+
+import random
+import threading
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import func
+from ..extensions import db
+from ..models.email_outbox import EmailOutbox
+from ..models.lead import Lead
+from .email import smtp_pool, render_lead_notification, render_lead_acknowledgment, render_lead_digest
+
+
+def queue_email(kind, recipient, subject, body, html=None, lead_id=None, status='pending'):
+    """Add an email to the outbox; the caller's commit makes it deliverable"""
+    entry = EmailOutbox(
+        kind=kind,
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        html=html,
+        lead_id=lead_id,
+        status=status,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.session.add(entry)
+    return entry
+
+
+def queue_lead_emails(lead):
+    """Queue the admin notification and the acknowledgment for a flushed lead"""
+    admin_email = current_app.config.get('ADMIN_EMAIL')
+    if admin_email:
+        # Held notifications keep their own rendering so they can still go out singly
+        status = 'digest' if current_app.config.get('LEAD_DIGEST_ENABLED') else 'pending'
+        queue_email('lead_notification', admin_email, *render_lead_notification(lead),
+                    lead_id=lead.id, status=status)
+    else:
+        current_app.logger.warning('No admin email configured for lead notifications')
+
+    queue_email('lead_acknowledgment', lead.email, *render_lead_acknowledgment(lead), lead_id=lead.id)
+
+
+def flush_lead_digest():
+    """Fold held lead notifications into one digest email when one is due.
+
+    Returns the number of notifications folded.
+    """
+    config = current_app.config
+    max_leads = config.get('LEAD_DIGEST_MAX_LEADS', 50)
+    
+    held, oldest = db.session.query(func.count(EmailOutbox.id), func.min(EmailOutbox.created_at))\
+        .filter(EmailOutbox.status == 'digest')\
+        .one()
+    if not held:
+        return 0
+    # Notifications held before digest mode was switched off go out right away
+    if config.get('LEAD_DIGEST_ENABLED') and held < max_leads and \
+            oldest > datetime.utcnow() - timedelta(seconds=config.get('LEAD_DIGEST_INTERVAL_SECONDS', 900)):
+        return 0
+    
+    ids = [entry_id for (entry_id,) in db.session.query(EmailOutbox.id)
+           .filter(EmailOutbox.status == 'digest')
+           .order_by(EmailOutbox.id.asc())
+           .limit(max_leads)
+           .all()]
+    
+    digest = queue_email('lead_digest', config.get('ADMIN_EMAIL'), '', '')
+    db.session.flush()
+    # Conditional claim: a concurrent worker folding the same rows gets 0 here
+    claimed = EmailOutbox.query.filter(EmailOutbox.id.in_(ids), EmailOutbox.status == 'digest')\
+        .update({EmailOutbox.status: 'digested', EmailOutbox.digest_id: digest.id},
+                synchronize_session=False)
+    if not claimed:
+        db.session.rollback()
+        return 0
+    
+    leads = Lead.query.join(EmailOutbox, EmailOutbox.lead_id == Lead.id)\
+        .filter(EmailOutbox.digest_id == digest.id)\
+        .all()
+    if leads:
+        digest.subject, digest.body, digest.html = render_lead_digest(leads)
+    else:
+        # Every lead was deleted while its notification was held
+        digest.status = 'sent'
+        digest.subject = 'Empty lead digest'
+    db.session.commit()
+    return claimed
+
+
+def _backoff_seconds(attempts):
+    base = current_app.config.get('EMAIL_OUTBOX_BACKOFF_SECONDS', 30)
+    cap = current_app.config.get('EMAIL_OUTBOX_BACKOFF_MAX_SECONDS', 3600)
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _claim(entry_id, now, lease_until):
+    """Take ownership of a due row; returns True if this worker won it"""
+    return EmailOutbox.query.filter(
+        EmailOutbox.id == entry_id,
+        EmailOutbox.status == 'pending',
+        EmailOutbox.next_attempt_at <= now
+    ).update({
+        EmailOutbox.attempts: EmailOutbox.attempts + 1,
+        EmailOutbox.next_attempt_at: lease_until,
+    }, synchronize_session=False) == 1
+
+
+def _deliver(entry):
+    smtp_pool.send(Message(
+        subject=entry.subject,
+        recipients=[entry.recipient],
+        body=entry.body,
+        html=entry.html
+    ))
+
+
+def _mark_leads_sent(lead_ids):
+    """Set Lead.email_sent once none of a lead's emails is outstanding"""
+    outstanding = db.session.query(EmailOutbox.lead_id).filter(
+        EmailOutbox.lead_id.in_(lead_ids),
+        EmailOutbox.status != 'sent'
+    )
+    Lead.query.filter(Lead.id.in_(lead_ids), ~Lead.id.in_(outstanding))\
+        .update({Lead.email_sent: True}, synchronize_session=False)
+    db.session.commit()
+
+
+def _complete_digest(digest):
+    """Mark the notifications folded into a sent digest as sent; returns their lead ids"""
+    folded = db.session.query(EmailOutbox.lead_id)\
+        .filter(EmailOutbox.digest_id == digest.id, EmailOutbox.status == 'digested')\
+        .all()
+    EmailOutbox.query.filter(EmailOutbox.digest_id == digest.id, EmailOutbox.status == 'digested')\
+        .update({EmailOutbox.status: 'sent', EmailOutbox.sent_at: digest.sent_at},
+                synchronize_session=False)
+    return {lead_id for (lead_id,) in folded if lead_id}
+
+
+def deliver_pending(batch_size=None):
+    """Send due outbox emails. Returns (sent, failed) counts."""
+    config = current_app.config
+    batch_size = batch_size or config.get('EMAIL_OUTBOX_BATCH_SIZE', 50)
+    max_attempts = config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 8)
+    lease = timedelta(seconds=config.get('EMAIL_OUTBOX_LEASE_SECONDS', 300))
+
+    flush_lead_digest()
+
+    now = datetime.utcnow()
+    due = db.session.query(EmailOutbox.id)\
+        .filter(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now)\
+        .order_by(EmailOutbox.next_attempt_at.asc())\
+        .limit(batch_size)\
+        .all()
+    claimed = [entry_id for (entry_id,) in due if _claim(entry_id, now, now + lease)]
+    db.session.commit()
+    if not claimed:
+        return 0, 0
+
+    sent = failed = 0
+    lead_ids = set()
+    for entry in EmailOutbox.query.filter(EmailOutbox.id.in_(claimed)).order_by(EmailOutbox.id).all():
+        try:
+            _deliver(entry)
+        except Exception as e:
+            failed += 1
+            entry.last_error = str(e)[:2000]
+            if entry.attempts >= max_attempts:
+                entry.status = 'dead'
+                current_app.logger.error(
+                    f'Email {entry.id} ({entry.kind}) to {entry.recipient} dead after {entry.attempts} attempts: {e}'
+                )
+            else:
+                entry.next_attempt_at = datetime.utcnow() + timedelta(seconds=_backoff_seconds(entry.attempts))
+                current_app.logger.warning(f'Email {entry.id} attempt {entry.attempts} failed: {e}')
+        else:
+            sent += 1
+            entry.status = 'sent'
+            entry.sent_at = datetime.utcnow()
+            entry.last_error = None
+            if entry.lead_id:
+                lead_ids.add(entry.lead_id)
+            if entry.kind == 'lead_digest':
+                lead_ids.update(_complete_digest(entry))
+        # Commit per email so a crash mid-batch never re-sends delivered mail
+        db.session.commit()
+
+    if lead_ids:
+        _mark_leads_sent(lead_ids)
+    return sent, failed
+
+
+class OutboxWorker:
+    """Background thread that drains the outbox for one app"""
+
+    def __init__(self):
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self, app):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, args=(app,), name='email-outbox', daemon=True
+            )
+            self._thread.start()
+
+    def notify(self):
+        """Wake the worker now instead of at the next poll"""
+        if not current_app.config.get('EMAIL_OUTBOX_WORKER_THREAD'):
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self.start(current_app._get_current_object())
+        self._wakeup.set()
+
+    def _run(self, app):
+        interval = app.config.get('EMAIL_OUTBOX_POLL_SECONDS', 10)
+        while True:
+            with app.app_context():
+                try:
+                    while True:
+                        sent, failed = deliver_pending()
+                        if not sent and not failed:
+                            break
+                except Exception as e:
+                    db.session.rollback()
+                    app.logger.error(f'Email outbox worker error: {e}')
+                smtp_pool.close_idle()
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+
+
+outbox_worker = OutboxWorker()
@@ -0,0 +1,186 @@
+"""
+FinanceClinics - Password Hashing
+
+A registry of password hashers. New hashes use PASSWORD_HASHER with the cost
+parameters from config; existing hashes are verified by whichever hasher
+recognises their format, so changing the policy never locks anyone out.
+After a successful login, a hash made by another scheme or with other costs
+is replaced (see `needs_rehash`).
+
+- scrypt and pbkdf2 - Werkzeug's `method$salt$hash` format (always available);
+- bcrypt - `$2b$...`, needs the `bcrypt` package;
+- argon2 - `$argon2id$...`, only registered if `argon2-cffi` is installed.
+
+`flask bench-hashers` reports hashes per second for each scheme on this
+host, to size the costs to a login latency budget.
+"""
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+try:
+    import bcrypt
+except ImportError:
+    bcrypt = None
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+except ImportError:
+    PasswordHasher = None
+
+# bcrypt only looks at the first 72 bytes of a password
+BCRYPT_MAX_BYTES = 72
+
+
+class Hasher:
+    """One password hashing scheme; `params` are its cost settings from config"""
+    name = None
+
+    def params(self, config):
+        raise NotImplementedError
+
+    def identifies(self, encoded):
+        raise NotImplementedError
+
+    def hash(self, password, params):
+        raise NotImplementedError
+
+    def verify(self, password, encoded):
+        raise NotImplementedError
+
+    def needs_rehash(self, encoded, params):
+        raise NotImplementedError
+
+
+class WerkzeugHasher(Hasher):
+    """Werkzeug `method:args$salt$hash` hashes; `method` is scrypt or pbkdf2"""
+
+    def method(self, params):
+        raise NotImplementedError
+
+    def identifies(self, encoded):
+        return encoded.startswith(self.name + ':') or encoded.startswith(self.name + '$')
+
+    def hash(self, password, params):
+        return generate_password_hash(password, method=self.method(params))
+
+    def verify(self, password, encoded):
+        return check_password_hash(encoded, password)
+
+    def needs_rehash(self, encoded, params):
+        return encoded.split('$', 1)[0] != self.method(params)
+
+
+class ScryptHasher(WerkzeugHasher):
+    name = 'scrypt'
+
+    def params(self, config):
+        return (config.get('PASSWORD_SCRYPT_N', 2 ** 15),
+                config.get('PASSWORD_SCRYPT_R', 8),
+                config.get('PASSWORD_SCRYPT_P', 1))
+
+    def method(self, params):
+        return 'scrypt:{}:{}:{}'.format(*params)
+
+
+class Pbkdf2Hasher(WerkzeugHasher):
+    name = 'pbkdf2'
+
+    def params(self, config):
+        return (config.get('PASSWORD_PBKDF2_ITERATIONS', 600000),)
+
+    def method(self, params):
+        return f'pbkdf2:sha256:{params[0]}'
+
+
+class BcryptHasher(Hasher):
+    name = 'bcrypt'
+
+    def params(self, config):
+        return (config.get('PASSWORD_BCRYPT_ROUNDS', 12),)
+
+    def identifies(self, encoded):
+        return encoded.startswith(('$2a$', '$2b$', '$2y$'))
+
+    def hash(self, password, params):
+        secret = password.encode('utf-8')[:BCRYPT_MAX_BYTES]
+        return bcrypt.hashpw(secret, bcrypt.gensalt(rounds=params[0])).decode('ascii')
+
+    def verify(self, password, encoded):
+        try:
+            return bcrypt.checkpw(password.encode('utf-8')[:BCRYPT_MAX_BYTES], encoded.encode('ascii'))
+        except ValueError:
+            return False
+
+    def needs_rehash(self, encoded, params):
+        return encoded[4:6] != f'{params[0]:02d}'
+
+
+class Argon2Hasher(Hasher):
+    name = 'argon2'
+
+    def params(self, config):
+        return (config.get('PASSWORD_ARGON2_TIME_COST', 3),
+                config.get('PASSWORD_ARGON2_MEMORY_COST', 65536),
+                config.get('PASSWORD_ARGON2_PARALLELISM', 4))
+
+    def _hasher(self, params):
+        time_cost, memory_cost, parallelism = params
+        return PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+    def identifies(self, encoded):
+        return encoded.startswith('$argon2')
+
+    def hash(self, password, params):
+        return self._hasher(params).hash(password)
+
+    def verify(self, password, encoded):
+        try:
+            return PasswordHasher().verify(encoded, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def needs_rehash(self, encoded, params):
+        return self._hasher(params).check_needs_rehash(encoded)
+
+
+HASHERS = {h.name: h for h in (ScryptHasher(), Pbkdf2Hasher())}
+if bcrypt is not None:
+    HASHERS['bcrypt'] = BcryptHasher()
+if PasswordHasher is not None:
+    HASHERS['argon2'] = Argon2Hasher()
+
+
+def current_hasher():
+    """(hasher, params) of the configured hashing policy"""
+    config = current_app.config
+    name = config.get('PASSWORD_HASHER', 'scrypt')
+    hasher = HASHERS.get(name)
+    if hasher is None:
+        raise RuntimeError(f'PASSWORD_HASHER {name!r} is not available; installed: {", ".join(HASHERS)}')
+    return hasher, hasher.params(config)
+
+
+def identify(encoded):
+    """Hasher that produced an encoded hash, None if unknown"""
+    for hasher in HASHERS.values():
+        if encoded and hasher.identifies(encoded):
+            return hasher
+    return None
+
+
+def hash_password(password):
+    hasher, params = current_hasher()
+    return hasher.hash(password, params)
+
+
+def verify_password(password, encoded):
+    hasher = identify(encoded)
+    return hasher is not None and hasher.verify(password, encoded)
+
+
+def needs_rehash(encoded):
+    """True if a hash was made by another scheme or with other costs than the policy"""
+    hasher, params = current_hasher()
+    return identify(encoded) is not hasher or hasher.needs_rehash(encoded, params)
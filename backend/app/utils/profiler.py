@@ -0,0 +1,175 @@
+"""
+FinanceClinics - Request Profiler
+
+Runs selected requests under a profiler and keeps the reports in
+PROFILER_DIR, for GET /api/admin/diagnostics/profiles to list and download.
+A request is profiled when:
+
+- an admin sends the `X-Profile: 1` header, or
+- its endpoint is listed in PROFILER_SAMPLE (`endpoint=N,...`) and it is the
+  one request in N picked at random.
+
+pyinstrument, if installed, records a statistical profile saved as an HTML
+flamegraph; otherwise cProfile's stats are saved as a `.prof` file (open it
+with snakeviz or `python -m pstats`). Only the newest PROFILER_MAX_REPORTS
+reports are kept.
+
+With PROFILER_ENABLED off no hook is installed at all. With it on, a request
+that is not profiled costs a header lookup (plus a dict lookup when
+PROFILER_SAMPLE is set); the JWT is only checked when the header is sent.
+"""
+
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from flask import current_app, g, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+PROFILE_HEADER = 'X-Profile'
+REPORT_NAME = re.compile(r'^\d{8}T\d{12}-\d+--[\w.]+--\d+ms\.(html|prof)$')
+
+_prune_lock = threading.Lock()
+
+
+def parse_sample_rates(value):
+    """`'admin.export_mis_data=10,blog.get_posts=100'` -> {endpoint: N}"""
+    rates = {}
+    for part in (value or '').split(','):
+        endpoint, _, n = part.strip().partition('=')
+        if endpoint and n.strip().isdigit() and int(n) > 0:
+            rates[endpoint] = int(n)
+    return rates
+
+
+def profiles_dir():
+    return current_app.config['PROFILER_DIR']
+
+
+def _requested_by_admin():
+    try:
+        verify_jwt_in_request()
+    except (JWTExtendedException, PyJWTError):
+        return False
+    return get_jwt().get('role') == 'admin'
+
+
+class _CProfile:
+    extension = 'prof'
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def save(self, path):
+        self._profile.dump_stats(path)
+
+
+class _Pyinstrument:
+    extension = 'html'
+
+    def __init__(self, interval):
+        self._profiler = Profiler(interval=interval)
+
+    def start(self):
+        self._profiler.start()
+
+    def stop(self):
+        self._profiler.stop()
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            f.write(self._profiler.output_html())
+
+
+def _new_profiler(config):
+    if Profiler is not None and config.get('PROFILER_BACKEND', 'auto') != 'cprofile':
+        return _Pyinstrument(config.get('PROFILER_INTERVAL', 0.001))
+    return _CProfile()
+
+
+def _prune(directory, keep):
+    with _prune_lock:
+        reports = sorted(name for name in os.listdir(directory) if REPORT_NAME.match(name))
+        for name in reports[:max(0, len(reports) - keep)]:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def list_profiles(directory):
+    """Saved reports, newest first"""
+    if not os.path.isdir(directory):
+        return []
+    result = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not REPORT_NAME.match(name):
+            continue
+        stamp, endpoint, duration = name.rsplit('.', 1)[0].split('--')
+        result.append({
+            'name': name,
+            'endpoint': endpoint,
+            'duration_ms': int(duration[:-2]),
+            'created_at': datetime.strptime(stamp.split('-')[0], '%Y%m%dT%H%M%S%f').isoformat(timespec='seconds'),
+            'format': name.rsplit('.', 1)[1],
+            'size': os.path.getsize(os.path.join(directory, name)),
+        })
+    return result
+
+
+def init_profiler(app):
+    """Install the profiling hooks if PROFILER_ENABLED"""
+    if not app.config.get('PROFILER_ENABLED', False):
+        return
+
+    rates = parse_sample_rates(app.config.get('PROFILER_SAMPLE', ''))
+    directory = app.config['PROFILER_DIR']
+    keep = app.config.get('PROFILER_MAX_REPORTS', 50)
+
+    def should_profile():
+        if request.headers.get(PROFILE_HEADER):
+            return _requested_by_admin()
+        n = rates.get(request.endpoint) if rates else None
+        return n is not None and not random.randrange(n)
+
+    @app.before_request
+    def start_profiler():
+        g._profiler = None
+        if should_profile():
+            profiler = _new_profiler(app.config)
+            g._profiler = (profiler, time.perf_counter())
+            profiler.start()
+
+    @app.teardown_request
+    def save_profile(exc=None):
+        state = g.pop('_profiler', None)
+        if state is None:
+            return
+        profiler, started = state
+        profiler.stop()
+        elapsed = int((time.perf_counter() - started) * 1000)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+            endpoint = re.sub(r'[^\w.]', '_', request.endpoint or 'unmatched')
+            name = f'{stamp}-{os.getpid()}--{endpoint}--{elapsed}ms.{profiler.extension}'
+            profiler.save(os.path.join(directory, name))
+            _prune(directory, keep)
+        except OSError as e:
+            app.logger.error(f'Could not save request profile: {e}')
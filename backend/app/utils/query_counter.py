@@ -0,0 +1,70 @@
+"""
+FinanceClinics - SQL Statement Counter
+
+Helpers for asserting how many SQL statements an endpoint issues, so that
+N+1 regressions on list endpoints are caught early.
+
+Usage:
+    with assert_num_queries(2):
+        client.get('/api/blog')
+"""
+
+from contextlib import contextmanager
+from sqlalchemy import event
+from ..extensions import db
+
+
+class QueryCounter:
+    """Record SQL statements executed on the engine while active"""
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.statements = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        if self.engine is None:
+            self.engine = db.engine
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return False
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@contextmanager
+def assert_num_queries(expected, engine=None):
+    """Fail if the wrapped block does not execute exactly `expected` statements"""
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count != expected:
+        executed = '\n'.join(f'  {i + 1}. {s}' for i, s in enumerate(counter.statements))
+        raise AssertionError(
+            f'Expected {expected} SQL statements, got {counter.count}:\n{executed}'
+        )
+
+
+@contextmanager
+def assert_max_queries(maximum, engine=None):
+    """Fail if the wrapped block executes more than `maximum` statements"""
+    with QueryCounter(engine) as counter:
+        yield counter
+    if counter.count > maximum:
+        executed = '\n'.join(f'  {i + 1}. {s}' for i, s in enumerate(counter.statements))
+        raise AssertionError(
+            f'Expected at most {maximum} SQL statements, got {counter.count}:\n{executed}'
+        )
+
+
+def count_endpoint_queries(client, url, method='get', **kwargs):
+    """Issue a request through a test client and return (response, statement count)"""
+    with QueryCounter() as counter:
+        response = getattr(client, method.lower())(url, **kwargs)
+    return response, counter.count
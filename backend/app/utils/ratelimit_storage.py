@@ -0,0 +1,170 @@
+"""
+FinanceClinics - Shared Rate Limit Storage
+
+A Flask-Limiter (`limits`) storage backed by a local SQLite file in WAL
+mode, for hosts without Redis. Every gunicorn worker opens the same file, so
+limits are enforced across processes and survive worker recycles.
+
+Select it with RATELIMIT_STORAGE_URI = 'sqlite:////absolute/path/ratelimit.db'.
+Each hit is one short BEGIN IMMEDIATE transaction: the write lock makes the
+check-and-record of the moving (sliding) window atomic across processes, and
+WAL keeps readers from blocking on it.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+from limits.storage import Storage, MovingWindowSupport
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS ratelimit_counters ("
+    "key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS ratelimit_events ("
+    "key TEXT NOT NULL, hit_at REAL NOT NULL, expires_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_ratelimit_events_key ON ratelimit_events (key, hit_at)",
+    "CREATE INDEX IF NOT EXISTS ix_ratelimit_events_expires ON ratelimit_events (expires_at)",
+)
+
+# Seconds between sweeps of expired rows left behind by idle keys
+PURGE_INTERVAL = 60
+
+
+class SQLiteStorage(Storage, MovingWindowSupport):
+    """Rate limit storage in a WAL-mode SQLite file shared by all workers"""
+
+    STORAGE_SCHEME = ['sqlite']
+
+    def __init__(self, uri=None, busy_timeout=5000, **options):
+        # sqlite:////abs/path -> /abs/path; sqlite:///rel/path -> rel/path
+        self.path = urlparse(uri).path[1:] if uri else ''
+        if not self.path:
+            raise ValueError('RATELIMIT_STORAGE_URI needs a file path, e.g. sqlite:////var/app/ratelimit.db')
+        self.busy_timeout = int(busy_timeout)
+        self._local = threading.local()
+        self._purged_at = 0.0
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._transaction() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+        super().__init__(uri, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        # One connection per thread; a forked worker must not reuse its parent's
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(f'PRAGMA busy_timeout={self.busy_timeout}')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def _maybe_purge(self, conn, now):
+        if now - self._purged_at < PURGE_INTERVAL:
+            return
+        self._purged_at = now
+        conn.execute('DELETE FROM ratelimit_events WHERE expires_at <= ?', (now,))
+        conn.execute('DELETE FROM ratelimit_counters WHERE expires_at <= ?', (now,))
+
+    # Fixed window
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM ratelimit_counters WHERE key = ? AND expires_at <= ?', (key, now))
+            conn.execute(
+                'INSERT INTO ratelimit_counters (key, value, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = value + excluded.value, '
+                'expires_at = CASE WHEN ? THEN excluded.expires_at ELSE expires_at END',
+                (key, amount, now + expiry, bool(elastic_expiry))
+            )
+            value = conn.execute('SELECT value FROM ratelimit_counters WHERE key = ?', (key,)).fetchone()[0]
+            self._maybe_purge(conn, now)
+        return value
+
+    def get(self, key):
+        row = self._connection().execute(
+            'SELECT value FROM ratelimit_counters WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._connection().execute(
+            'SELECT expires_at FROM ratelimit_counters WHERE key = ?', (key,)
+        ).fetchone()
+        return int(row[0]) if row else int(time.time())
+
+    # Moving window
+
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM ratelimit_events WHERE key = ? AND hit_at < ?', (key, now - expiry))
+            acquired = conn.execute(
+                'SELECT COUNT(*) FROM ratelimit_events WHERE key = ?', (key,)
+            ).fetchone()[0]
+            if acquired + amount > limit:
+                return False
+            conn.executemany(
+                'INSERT INTO ratelimit_events (key, hit_at, expires_at) VALUES (?, ?, ?)',
+                [(key, now, now + expiry)] * amount
+            )
+            self._maybe_purge(conn, now)
+        return True
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        start, acquired = self._connection().execute(
+            'SELECT MIN(hit_at), COUNT(*) FROM ratelimit_events WHERE key = ? AND hit_at >= ?',
+            (key, now - expiry)
+        ).fetchone()
+        return int(start if start is not None else now), acquired
+
+    # Maintenance
+
+    def check(self):
+        try:
+            self._connection().execute('SELECT 1').fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        with self._transaction() as conn:
+            removed = conn.execute('DELETE FROM ratelimit_counters').rowcount
+            removed += conn.execute('DELETE FROM ratelimit_events').rowcount
+        return removed
+
+    def clear(self, key):
+        with self._transaction() as conn:
+            conn.execute('DELETE FROM ratelimit_counters WHERE key = ?', (key,))
+            conn.execute('DELETE FROM ratelimit_events WHERE key = ?', (key,))
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, rolled back on error"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
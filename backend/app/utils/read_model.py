@@ -0,0 +1,165 @@
+"""
+FinanceClinics - Public Content Read Model
+
+Each worker keeps an immutable snapshot of everything the public endpoints
+serve (published pages, services, blog post summaries, categories and public
+settings), pre-serialized to JSON bytes and keyed by slug.
+
+The snapshot records the 'content' CacheVersion it was built from. At most
+once every READ_MODEL_CHECK_SECONDS a request compares that against the
+database row and, if an admin write bumped it, builds a fresh snapshot and
+swaps the reference. Every other public read is served without any SQL.
+"""
+
+import json
+import threading
+import time
+from math import ceil
+from types import MappingProxyType
+from flask import current_app, Response
+from sqlalchemy.orm import defer, joinedload
+from ..models.page import Page
+from ..models.service import Service
+from ..models.blogpost import BlogPost
+from ..models.user import User
+from ..models.setting import Setting
+from ..models.cache_version import CacheVersion
+
+CONTENT_VERSION = 'content'
+
+
+def _dumps(data):
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(body, status=200):
+    """Wrap pre-serialized JSON bytes in a response"""
+    return Response(body, status=status, mimetype='application/json')
+
+
+class PostSummary:
+    """A published post as needed for filtering and pagination"""
+    __slots__ = ('category', 'tags', 'body')
+
+    def __init__(self, category, tags, body):
+        self.category = category
+        self.tags = tags
+        self.body = body
+
+
+class ContentSnapshot:
+    """Immutable, pre-serialized view of published content"""
+
+    def __init__(self, version):
+        self.version = version
+
+        pages = Page.query.filter_by(is_published=True)\
+            .order_by(Page.sort_order.asc())\
+            .all()
+        self.pages = _dumps({'pages': [p.to_dict(include_content=False) for p in pages]})
+        self.page_by_slug = MappingProxyType({
+            p.slug: _dumps({'page': p.to_dict()}) for p in pages
+        })
+
+        services = Service.query.filter_by(is_published=True)\
+            .order_by(Service.sort_order.asc())\
+            .all()
+        self.services = _dumps({'services': [s.to_dict(include_description=False) for s in services]})
+        self.featured_services = _dumps({
+            'services': [s.to_dict(include_description=False) for s in services if s.is_featured]
+        })
+        self.service_by_slug = MappingProxyType({
+            s.slug: _dumps({'service': s.to_dict()}) for s in services
+        })
+
+        posts = BlogPost.query.options(
+                defer(BlogPost.content),
+                joinedload(BlogPost.author).load_only(User.id, User.name)
+            )\
+            .filter_by(is_published=True)\
+            .order_by(BlogPost.published_at.desc())\
+            .all()
+        self.posts = tuple(
+            PostSummary(p.category, frozenset(t.lower() for t in p.tags or ()), _dumps(p.to_dict(include_content=False)))
+            for p in posts
+        )
+        self.categories = _dumps({
+            'categories': list(dict.fromkeys(p.category for p in posts if p.category))
+        })
+
+        settings = Setting.query.filter(Setting.key.in_(Setting.PUBLIC_KEYS)).all()
+        self.public_settings = _dumps({'settings': {s.key: s.typed_value() for s in settings}})
+
+    def post_list(self, posts):
+        return b'[' + b','.join(p.body for p in posts) + b']'
+
+    def posts_page(self, page, per_page, category=None, tag=None):
+        """Paginated post list matching the SQL-backed get_posts response"""
+        posts = self.posts
+        if category:
+            posts = [p for p in posts if p.category == category]
+        if tag:
+            # Case-insensitive, like the post_tags collation the SQL path filters on
+            tag = tag.lower()
+            posts = [p for p in posts if tag in p.tags]
+
+        current = page if page >= 1 else 1
+        size = per_page if per_page >= 1 else 20
+        total = len(posts)
+        pages = ceil(total / size) if total else 0
+        items = posts[(current - 1) * size:current * size]
+
+        meta = _dumps({
+            'total': total,
+            'pages': pages,
+            'current_page': page,
+            'per_page': per_page,
+            'has_next': current < pages,
+            'has_prev': current > 1,
+        })
+        return b'{"posts":' + self.post_list(items) + b',' + meta[1:]
+
+    def recent_posts(self, limit):
+        return b'{"posts":' + self.post_list(self.posts[:max(limit, 0)]) + b'}'
+
+
+class ReadModel:
+    """Holds the current snapshot and swaps it when the content version moves"""
+
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def enabled(self):
+        return current_app.config.get('READ_MODEL_ENABLED', True)
+
+    def current(self):
+        snapshot = self._snapshot
+        interval = current_app.config.get('READ_MODEL_CHECK_SECONDS', 5)
+        if snapshot is not None and time.monotonic() - self._checked_at < interval:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - self._checked_at < interval:
+                return snapshot
+            version = CacheVersion.get(CONTENT_VERSION)
+            if snapshot is None or snapshot.version != version:
+                snapshot = ContentSnapshot(version)
+                self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+        return snapshot
+
+    def invalidate(self):
+        """Force the next read to re-check the content version"""
+        self._checked_at = 0.0
+
+
+read_model = ReadModel()
+
+
+def bump_content_version():
+    """Record a public content change so every worker rebuilds its snapshot"""
+    CacheVersion.bump(CONTENT_VERSION)
+    read_model.invalidate()
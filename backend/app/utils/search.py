@@ -0,0 +1,233 @@
+"""
+FinanceClinics - Site Search
+
+Full-text search over published pages, services and blog posts.
+
+On MySQL the FULLTEXT indexes declared in db/schema.sql do the matching and
+ranking. Any other database (SQLite in tests, small deployments) falls back
+to an in-process inverted index that is built on first use and kept current
+by the admin endpoints through `index_document` / `remove_document`.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from flask import current_app
+from ..extensions import db
+from ..models.page import Page
+from ..models.service import Service
+from ..models.blogpost import BlogPost
+
+
+# kind -> (model, {field: weight})
+SEARCH_SOURCES = {
+    'page': (Page, {'title': 3, 'content': 1}),
+    'service': (Service, {'title': 3, 'short_description': 2, 'description': 1}),
+    'post': (BlogPost, {'title': 3, 'excerpt': 2, 'content': 1}),
+}
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in',
+    'is', 'it', 'of', 'on', 'or', 'that', 'the', 'to', 'was', 'we', 'with', 'you',
+}
+
+SNIPPET_LENGTH = 160
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def strip_html(value):
+    """Reduce stored HTML to plain text for indexing and snippets"""
+    if not value:
+        return ''
+    return _SPACE_RE.sub(' ', _TAG_RE.sub(' ', value)).strip()
+
+
+def tokenize(value):
+    """Split text into lowercase search terms"""
+    return [t for t in _TOKEN_RE.findall(value.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def make_snippet(text, terms, length=SNIPPET_LENGTH):
+    """Return a window of `text` around the first matching term"""
+    if not text:
+        return ''
+    lowered = text.lower()
+    positions = [lowered.find(t) for t in terms]
+    positions = [p for p in positions if p >= 0]
+    start = max(min(positions) - length // 4, 0) if positions else 0
+    snippet = text[start:start + length].strip()
+    if start > 0:
+        snippet = '…' + snippet
+    if start + length < len(text):
+        snippet = snippet + '…'
+    return snippet
+
+
+class InvertedIndex:
+    """In-process inverted index used when MySQL FULLTEXT is unavailable"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents = {}
+        self._postings = defaultdict(dict)
+        self.built_at = None
+
+    def _add(self, kind, obj):
+        model, fields = SEARCH_SOURCES[kind]
+        key = (kind, obj.id)
+        self._remove(key)
+
+        weighted = defaultdict(float)
+        body = []
+        for field, weight in fields.items():
+            text = strip_html(getattr(obj, field, None))
+            if field != 'title':
+                body.append(text)
+            for term in tokenize(text):
+                weighted[term] += weight
+
+        self._documents[key] = {
+            'type': kind,
+            'id': obj.id,
+            'title': obj.title,
+            'slug': obj.slug,
+            'url': obj.public_path,
+            'text': ' '.join(t for t in body if t),
+            'terms': list(weighted),
+        }
+        for term, weight in weighted.items():
+            self._postings[term][key] = weight
+
+    def _remove(self, key):
+        doc = self._documents.pop(key, None)
+        if not doc:
+            return
+        for term in doc['terms']:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+
+    def build(self):
+        """Load every published document from the database"""
+        with self._lock:
+            self._documents = {}
+            self._postings = defaultdict(dict)
+            for kind, (model, fields) in SEARCH_SOURCES.items():
+                for obj in model.query.filter_by(is_published=True).all():
+                    self._add(kind, obj)
+            self.built_at = time.monotonic()
+
+    def add(self, kind, obj):
+        with self._lock:
+            self._add(kind, obj)
+
+    def remove(self, kind, obj_id):
+        with self._lock:
+            self._remove((kind, obj_id))
+
+    def search(self, query, limit=20, kinds=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        with self._lock:
+            total = len(self._documents) or 1
+            scores = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for key, weight in postings.items():
+                    scores[key] += (1 + math.log(weight)) * idf
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            docs = [(self._documents[key], score) for key, score in ranked
+                    if kinds is None or key[0] in kinds]
+
+        return [{
+            'type': doc['type'],
+            'id': doc['id'],
+            'title': doc['title'],
+            'slug': doc['slug'],
+            'url': doc['url'],
+            'snippet': make_snippet(doc['text'], terms),
+            'score': round(score, 4),
+        } for doc, score in docs[:limit]]
+
+
+_index = InvertedIndex()
+
+
+def _use_fulltext():
+    return db.engine.dialect.name == 'mysql'
+
+
+def _ensure_index():
+    max_age = current_app.config.get('SEARCH_INDEX_MAX_AGE', 300)
+    if _index.built_at is None or time.monotonic() - _index.built_at > max_age:
+        _index.build()
+    return _index
+
+
+def _fulltext_search(query, limit, kinds):
+    from sqlalchemy.dialects.mysql import match
+
+    terms = tokenize(query)
+    results = []
+    for kind, (model, fields) in SEARCH_SOURCES.items():
+        if kinds is not None and kind not in kinds:
+            continue
+        columns = [getattr(model, f) for f in fields]
+        score = match(*columns, against=query).label('score')
+        rows = db.session.query(model, score)\
+            .filter(model.is_published == True, score > 0)\
+            .order_by(score.desc())\
+            .limit(limit)\
+            .all()
+        for obj, row_score in rows:
+            text = ' '.join(strip_html(getattr(obj, f)) for f in fields if f != 'title')
+            results.append({
+                'type': kind,
+                'id': obj.id,
+                'title': obj.title,
+                'slug': obj.slug,
+                'url': obj.public_path,
+                'snippet': make_snippet(text.strip(), terms),
+                'score': round(float(row_score), 4),
+            })
+    results.sort(key=lambda r: r['score'], reverse=True)
+    return results[:limit]
+
+
+def search(query, limit=20, kinds=None):
+    """Search published content, best matches first"""
+    query = (query or '').strip()
+    if not query:
+        return []
+    if _use_fulltext():
+        return _fulltext_search(query, limit, kinds)
+    return _ensure_index().search(query, limit, kinds)
+
+
+def index_document(kind, obj):
+    """Reflect a created or updated object in the fallback index"""
+    if _index.built_at is None or _use_fulltext():
+        return
+    if obj.is_published:
+        _index.add(kind, obj)
+    else:
+        _index.remove(kind, obj.id)
+
+
+def remove_document(kind, obj_id):
+    """Drop a deleted object from the fallback index"""
+    if _index.built_at is None or _use_fulltext():
+        return
+    _index.remove(kind, obj_id)
@@ -0,0 +1,146 @@
+"""
+FinanceClinics - Settings Cache
+
+Each worker holds every setting, already parsed by type, loaded with one
+query. Like the public read model, the cache records the 'settings'
+CacheVersion it was loaded from and re-checks it at most once every
+SETTINGS_CACHE_CHECK_SECONDS; a write anywhere bumps the version so every
+worker reloads.
+
+Writes go through `upsert_settings`, a single INSERT ... ON CONFLICT /
+ON DUPLICATE KEY UPDATE statement for any number of keys.
+"""
+
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+from flask import current_app
+from ..extensions import db
+from ..models.setting import Setting
+from ..models.cache_version import CacheVersion
+from .read_model import bump_content_version
+
+SETTINGS_VERSION = 'settings'
+
+_INVALID = object()
+
+UPSERT_COLUMNS = ('key', 'value', 'type', 'category', 'description')
+
+
+class SettingsSnapshot:
+    """Immutable typed view of the settings table"""
+
+    def __init__(self, version):
+        self.version = version
+        rows = db.session.query(Setting.key, Setting.value, Setting.type).all()
+        self.types = MappingProxyType({key: type_ for key, _, type_ in rows})
+        self.values = MappingProxyType({
+            key: Setting.parse_value(value, type_, _INVALID) for key, value, type_ in rows
+        })
+
+
+class SettingsCache:
+    """Holds the current settings snapshot and reloads it when the version moves"""
+
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self):
+        snapshot = self._snapshot
+        interval = current_app.config.get('SETTINGS_CACHE_CHECK_SECONDS', 5)
+        if snapshot is not None and time.monotonic() - self._checked_at < interval:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and time.monotonic() - self._checked_at < interval:
+                return snapshot
+            version = CacheVersion.get(SETTINGS_VERSION)
+            if snapshot is None or snapshot.version != version:
+                snapshot = SettingsSnapshot(version)
+                self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+        return snapshot
+
+    def get(self, key, default=None):
+        """Typed value of a setting; default if it is missing or unparseable"""
+        value = self.current().values.get(key, _INVALID)
+        return default if value is _INVALID else value
+
+    def type_of(self, key):
+        return self.current().types.get(key)
+
+    def public(self):
+        """{key: value} of the settings exposed to the public site"""
+        values = self.current().values
+        return {
+            key: values[key] for key in Setting.PUBLIC_KEYS
+            if key in values and values[key] is not _INVALID
+        }
+
+    def invalidate(self):
+        """Force the next read to re-check the settings version"""
+        self._checked_at = 0.0
+
+
+settings_cache = SettingsCache()
+
+
+def bump_settings_version():
+    """Record a settings change so every worker reloads its cache"""
+    CacheVersion.bump(SETTINGS_VERSION)
+    settings_cache.invalidate()
+    # Public settings are also part of the content snapshot
+    bump_content_version()
+
+
+def _upsert_statement(rows, update_columns):
+    dialect = db.engine.dialect.name
+    now = datetime.utcnow()
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(Setting).values(rows)
+        updates = {c: stmt.inserted[c] for c in update_columns}
+        return stmt.on_duplicate_key_update(updated_at=now, **updates)
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(Setting).values(rows)
+        updates = {c: stmt.excluded[c] for c in update_columns}
+        updates['updated_at'] = now
+        return stmt.on_conflict_do_update(index_elements=[Setting.key], set_=updates)
+    return None
+
+
+def upsert_settings(rows, update_columns=('value',)):
+    """
+    Insert or update settings in one statement and commit.
+
+    `rows` are dicts with the UPSERT_COLUMNS keys; for keys that already exist
+    only `update_columns` are overwritten.
+    """
+    if not rows:
+        return
+    rows = [{c: row.get(c) for c in UPSERT_COLUMNS} for row in rows]
+
+    stmt = _upsert_statement(rows, update_columns)
+    if stmt is not None:
+        db.session.execute(stmt)
+    else:
+        # No native upsert: one lookup, then bulk update and insert
+        by_key = {row['key']: row for row in rows}
+        existing = dict(db.session.query(Setting.key, Setting.id).filter(Setting.key.in_(by_key)).all())
+        db.session.bulk_update_mappings(Setting, [
+            dict({c: by_key[key][c] for c in update_columns}, id=setting_id)
+            for key, setting_id in existing.items()
+        ])
+        db.session.bulk_insert_mappings(Setting, [
+            row for key, row in by_key.items() if key not in existing
+        ])
+    db.session.commit()
+    bump_settings_version()
@@ -0,0 +1,231 @@
+"""
+FinanceClinics - Slow Query Log
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are logged with the endpoint
+that ran them, a normalized fingerprint of the SQL, their parameters
+(values redacted) and their duration, and kept in a per-worker ring buffer of
+SLOW_QUERY_BUFFER_SIZE entries. The first time a fingerprint is slow its
+`EXPLAIN` plan is captured (MySQL and SQLite) on the same connection, right
+after the statement, so the plan matches what the statement just did.
+
+GET /api/admin/diagnostics/slow-queries reads the buffer of the worker that
+serves it, aggregated by fingerprint; the `sql_slow_statements_total` metric
+counts slow statements across all workers.
+"""
+
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import date, datetime
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+from .metrics import metrics
+
+metrics.define('sql_slow_statements_total', 'counter', 'Statements over SLOW_QUERY_THRESHOLD_MS')
+
+_COMMENTS = re.compile(r'/\*.*?\*/|--[^\n]*', re.S)
+_STRINGS = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBERS = re.compile(r'(?<![\w.])\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.I)
+_PLACEHOLDERS = re.compile(r'%\(\w+\)s|%s|\?|(?<![:\w]):\w+')
+_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ROWS = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+_SPACES = re.compile(r'\s+')
+
+# Dialects whose EXPLAIN only plans the statement, without running it
+EXPLAIN_PREFIXES = {
+    'mysql': 'EXPLAIN ',
+    'mariadb': 'EXPLAIN ',
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+EXPLAINABLE = ('select', 'update', 'delete', 'with')
+
+
+def fingerprint(statement):
+    """SQL with literals, placeholders and IN/VALUES lists collapsed, lowercased"""
+    sql = _COMMENTS.sub(' ', statement)
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('?', sql)
+    sql = _LISTS.sub('(...)', sql)
+    sql = _ROWS.sub(r'\1', sql)
+    return _SPACES.sub(' ', sql).strip().lower()
+
+
+def _redact_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str):
+        return f'<str:{len(value)}>'
+    if isinstance(value, (bytes, bytearray)):
+        return f'<bytes:{len(value)}>'
+    return f'<{type(value).__name__}>'
+
+
+def redact(parameters):
+    """Parameters with strings and blobs replaced by their type and length"""
+    if isinstance(parameters, dict):
+        return {k: _redact_value(v) for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact_value(v) for v in parameters]
+    return _redact_value(parameters)
+
+
+def _percentile(ordered, fraction):
+    # Nearest-rank percentile of an already sorted list
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements plus the first plan of each fingerprint"""
+
+    def __init__(self, size=500):
+        self._entries = deque(maxlen=size)
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resize(self, size):
+        with self._lock:
+            if self._entries.maxlen != size:
+                self._entries = deque(self._entries, maxlen=size)
+
+    def needs_plan(self, key):
+        return key not in self._plans
+
+    def add(self, entry, plan=None):
+        with self._lock:
+            self._entries.append(entry)
+            if entry['fingerprint'] not in self._plans:
+                self._plans[entry['fingerprint']] = plan
+                while len(self._plans) > self._entries.maxlen:
+                    self._plans.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+    def summary(self):
+        """Buffered statements grouped by fingerprint, slowest p95 first"""
+        with self._lock:
+            entries = list(self._entries)
+            plans = dict(self._plans)
+
+        groups = {}
+        for entry in entries:
+            groups.setdefault(entry['fingerprint'], []).append(entry)
+
+        result = []
+        for key, items in groups.items():
+            durations = sorted(e['duration_ms'] for e in items)
+            endpoints = {}
+            for e in items:
+                endpoints[e['endpoint']] = endpoints.get(e['endpoint'], 0) + 1
+            last = items[-1]
+            result.append({
+                'fingerprint': key,
+                'count': len(items),
+                'p50_ms': round(_percentile(durations, 0.5), 2),
+                'p95_ms': round(_percentile(durations, 0.95), 2),
+                'max_ms': round(durations[-1], 2),
+                'total_ms': round(sum(durations), 2),
+                'endpoints': endpoints,
+                'last_seen': last['at'],
+                'last_statement': last['statement'],
+                'last_parameters': last['parameters'],
+                'plan': plans.get(key),
+            })
+        result.sort(key=lambda g: g['p95_ms'], reverse=True)
+        return result
+
+
+slow_query_log = SlowQueryLog()
+
+
+def _explain(conn, statement, parameters):
+    """EXPLAIN rows for a statement, on a fresh cursor of the same connection"""
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None:
+        return None
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        columns = [c[0] for c in cursor.description or ()]
+        return [dict(zip(columns, (_plain(v) for v in row))) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def _plain(value):
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', 'replace')
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def init_slow_query_log(app):
+    """Listen for slow statements on the app's engines"""
+    if not app.config.get('SLOW_QUERY_LOG_ENABLED', True):
+        return
+    from ..extensions import db
+
+    threshold = app.config.get('SLOW_QUERY_THRESHOLD_MS', 200) / 1000.0
+    capture_plans = app.config.get('SLOW_QUERY_EXPLAIN', True)
+    slow_query_log.resize(app.config.get('SLOW_QUERY_BUFFER_SIZE', 500))
+    logger = app.logger
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._slow_query_started
+        if duration < threshold:
+            return
+        key = fingerprint(statement)
+        endpoint = (request.endpoint or 'unmatched') if has_request_context() else 'background'
+        if executemany:
+            shown = {'rows': len(parameters), 'first': redact(parameters[0]) if parameters else None}
+        else:
+            shown = redact(parameters)
+        entry = {
+            'fingerprint': key,
+            'statement': statement,
+            'parameters': shown,
+            'endpoint': endpoint,
+            'duration_ms': duration * 1000.0,
+            'at': datetime.utcnow().isoformat(),
+        }
+
+        plan = None
+        if capture_plans and slow_query_log.needs_plan(key) and not executemany \
+                and statement.lstrip().lower().startswith(EXPLAINABLE) \
+                and not context.execution_options.get('stream_results'):
+            try:
+                plan = _explain(conn, statement, parameters)
+            except Exception as e:
+                plan = [{'error': str(e)}]
+
+        slow_query_log.add(entry, plan)
+        metrics.inc('sql_slow_statements_total', endpoint=endpoint)
+        logger.warning(f'Slow query {duration * 1000.0:.1f}ms in {endpoint}: {key} params={shown}')
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if not getattr(engine, '_slow_query_listening', False):
+                event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+                event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+                engine._slow_query_listening = True
+
+
+def slow_query_summary():
+    return {
+        'threshold_ms': current_app.config.get('SLOW_QUERY_THRESHOLD_MS', 200),
+        'buffer_size': slow_query_log._entries.maxlen,
+        'pid': os.getpid(),
+        'fingerprints': slow_query_log.summary(),
+    }
@@ -0,0 +1,157 @@
+"""
+FinanceClinics - Contact Form Spam Filter
+
+Runs on POST /api/contact before any database or SMTP work, cheapest check
+first:
+
+1. honeypot - a hidden form field that people never fill in;
+2. form token - an HMAC-signed timestamp from GET /api/contact/token; a form
+   sent back sooner than CONTACT_MIN_FILL_SECONDS was not typed by a person;
+3. rules - too many links, or keyword/regex patterns compiled once per
+   pattern set;
+4. duplicates - a bounded LRU of recent message hashes; the same text sent
+   more than CONTACT_DUPLICATE_LIMIT times within the window is a flood.
+
+Counters per outcome are kept per worker and exposed to admins.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from functools import lru_cache
+from flask import current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from .cache import TTLCache
+
+TOKEN_SALT = 'contact-form'
+
+DEFAULT_SPAM_PATTERNS = (
+    r'\b(viagra|cialis|casino|porn|escort|payday loan)\b',
+    r'\b(seo|link building|backlinks?|guest post(ing)?)\s+(services?|packages?|offer)\b',
+    r'\b(crypto(currency)?|bitcoin|forex)\s+(investment|trading|profits?)\b',
+    r'\[url=|<a\s+href=',
+)
+
+# Rejections a real visitor can hit (e.g. a tab left open for days); they get
+# a real error asking to reload instead of the silent fake success
+TOKEN_REASONS = frozenset(('no_token', 'expired_token', 'bad_token'))
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_URL_RE = re.compile(r'https?://', re.IGNORECASE)
+
+
+class SpamRejected(Exception):
+    """A submission the filter shed; `reason` names the check"""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+@lru_cache(maxsize=8)
+def _compile_rules(patterns):
+    return tuple(re.compile(p, re.IGNORECASE | re.DOTALL) for p in patterns)
+
+
+@lru_cache(maxsize=4)
+def _serializer(secret_key):
+    return URLSafeTimedSerializer(secret_key, salt=TOKEN_SALT)
+
+
+def issue_form_token():
+    """Signed timestamp the contact form sends back on submit"""
+    return _serializer(current_app.config['SECRET_KEY']).dumps(1)
+
+
+class SpamFilter:
+    """Per-worker submission filter with shed counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._since = datetime.utcnow()
+        self._recent = None
+
+    def _recent_hashes(self, config):
+        if self._recent is None:
+            with self._lock:
+                if self._recent is None:
+                    self._recent = TTLCache(
+                        maxsize=config.get('CONTACT_DUPLICATE_CACHE_SIZE', 10000),
+                        ttl=config.get('CONTACT_DUPLICATE_WINDOW', 3600)
+                    )
+        return self._recent
+
+    def _count(self, outcome):
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def _check_token(self, token, config):
+        if not token:
+            if config.get('CONTACT_REQUIRE_TOKEN', True):
+                raise SpamRejected('no_token')
+            return
+        try:
+            _, signed_at = _serializer(config['SECRET_KEY']).loads(
+                token, max_age=config.get('CONTACT_TOKEN_MAX_AGE', 86400), return_timestamp=True
+            )
+        except SignatureExpired:
+            raise SpamRejected('expired_token')
+        except BadSignature:
+            raise SpamRejected('bad_token')
+        if time.time() - signed_at.timestamp() < config.get('CONTACT_MIN_FILL_SECONDS', 3):
+            raise SpamRejected('too_fast')
+
+    def _check_rules(self, data, config):
+        patterns = config.get('CONTACT_SPAM_PATTERNS') or DEFAULT_SPAM_PATTERNS
+        text = '\n'.join(str(data.get(f) or '') for f in ('name', 'organization', 'message'))
+        if len(_URL_RE.findall(text)) > config.get('CONTACT_MAX_LINKS', 2):
+            raise SpamRejected('links')
+        for rule in _compile_rules(tuple(patterns)):
+            if rule.search(text):
+                raise SpamRejected('rule')
+
+    def _check_duplicate(self, message, config):
+        normalized = _WHITESPACE_RE.sub(' ', str(message or '')).strip().lower()
+        if not normalized:
+            return
+        digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+        recent = self._recent_hashes(config)
+        with self._lock:
+            seen = recent.get(digest, 0) + 1
+            recent.set(digest, seen)
+        if seen > config.get('CONTACT_DUPLICATE_LIMIT', 3):
+            raise SpamRejected('duplicate')
+
+    def check(self, data):
+        """Raise SpamRejected if the submission should be shed"""
+        config = current_app.config
+        if not config.get('CONTACT_SPAM_FILTER_ENABLED', True):
+            return
+        try:
+            if data.get(config.get('CONTACT_HONEYPOT_FIELD', 'website')):
+                raise SpamRejected('honeypot')
+            self._check_token(data.get('form_token'), config)
+            self._check_rules(data, config)
+            self._check_duplicate(data.get('message'), config)
+        except SpamRejected as e:
+            self._count(e.reason)
+            raise
+        self._count('passed')
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        passed = counts.pop('passed', 0)
+        return {
+            'passed': passed,
+            'shed': sum(counts.values()),
+            'by_reason': counts,
+            'since': self._since.isoformat(),
+        }
+
+
+spam_filter = SpamFilter()
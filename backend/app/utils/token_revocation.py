@@ -0,0 +1,149 @@
+"""
+FinanceClinics - Token Revocation
+
+Every authenticated request asks `token_in_blocklist_loader` whether its JWT
+was revoked. The answer comes from a per-worker copy of `revoked_tokens`: a
+dict of revoked jtis and a dict of per-user cutoffs (tokens issued before the
+cutoff are revoked), so the check is two dict lookups. A token's `iat` has
+whole seconds, so cutoffs are stored in whole seconds too, rounded up: a
+token issued in the same second as the revocation is revoked, on every worker
+and whatever precision the DATETIME column keeps.
+
+The copy is refreshed at most every TOKEN_REVOCATION_CHECK_SECONDS by loading
+only rows with a higher `seq` than the last one seen (plus the last few
+seconds of rows, for transactions that commit out of seq order). Revocations
+made by this worker apply immediately. If the table cannot be read, the last
+loaded copy keeps being used. Expired entries are dropped from memory, and
+purged from the table, every TOKEN_REVOCATION_PURGE_SECONDS.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import select, delete, or_
+from sqlalchemy.exc import SQLAlchemyError
+from ..extensions import db
+from ..models.revoked_token import RevokedToken
+
+# Rows this recent are re-read on every refresh: a transaction holding a lower
+# seq can commit after a higher one was already seen
+COMMIT_LAG = timedelta(seconds=10)
+
+
+def _epoch(dt):
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationList:
+    """Per-worker view of revoked tokens, refreshed incrementally by seq"""
+
+    def __init__(self):
+        self._jtis = {}      # jti -> expiry (epoch seconds)
+        self._cutoffs = {}   # user id (str, as in `sub`) -> (revoked_before, expiry)
+        self._last_seq = 0
+        self._checked_at = 0.0
+        self._purged_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _add(self, row):
+        expires = _epoch(row.expires_at)
+        if row.jti:
+            self._jtis[row.jti] = expires
+        elif row.user_id is not None and row.revoked_before is not None:
+            key = str(row.user_id)
+            before = _epoch(row.revoked_before)
+            current = self._cutoffs.get(key)
+            if current is None or current[0] < before:
+                self._cutoffs[key] = (before, max(expires, current[1] if current else 0))
+
+    def _prune(self):
+        now = time.time()
+        self._jtis = {jti: exp for jti, exp in self._jtis.items() if exp > now}
+        self._cutoffs = {uid: c for uid, c in self._cutoffs.items() if c[1] > now}
+        with db.engine.begin() as conn:
+            conn.execute(delete(RevokedToken).where(RevokedToken.expires_at <= datetime.utcnow()))
+
+    def refresh(self):
+        """Load revocations newer than the last seen seq"""
+        config = current_app.config
+        interval = config.get('TOKEN_REVOCATION_CHECK_SECONDS', 1)
+        if time.monotonic() - self._checked_at < interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at < interval:
+                return
+            query = select(RevokedToken.seq, RevokedToken.jti, RevokedToken.user_id,
+                           RevokedToken.revoked_before, RevokedToken.expires_at)\
+                .order_by(RevokedToken.seq.asc())
+            if self._last_seq:
+                query = query.where(or_(RevokedToken.seq > self._last_seq,
+                                        RevokedToken.created_at >= datetime.utcnow() - COMMIT_LAG))
+            else:
+                query = query.where(RevokedToken.expires_at > datetime.utcnow())
+            self._checked_at = time.monotonic()
+            try:
+                with db.engine.connect() as conn:
+                    rows = conn.execute(query).all()
+                for row in rows:
+                    self._add(row)
+                if rows:
+                    self._last_seq = max(self._last_seq, rows[-1].seq)
+
+                if time.monotonic() - self._purged_at >= config.get('TOKEN_REVOCATION_PURGE_SECONDS', 3600):
+                    self._purged_at = time.monotonic()
+                    self._prune()
+            except SQLAlchemyError as e:
+                current_app.logger.error(f'Could not refresh revoked tokens: {e}')
+
+    def is_revoked(self, payload):
+        """True if a decoded JWT was revoked"""
+        self.refresh()
+        if payload.get('jti') in self._jtis:
+            return True
+        cutoff = self._cutoffs.get(str(payload.get('sub')))
+        return cutoff is not None and payload.get('iat', 0) < cutoff[0]
+
+    def record(self, row):
+        """Apply a revocation made by this worker without waiting for a refresh"""
+        with self._lock:
+            self._add(row)
+
+    def reset(self):
+        """Forget everything and reload from the table on the next check"""
+        with self._lock:
+            self._jtis = {}
+            self._cutoffs = {}
+            self._last_seq = 0
+            self._checked_at = 0.0
+
+
+revocation_list = RevocationList()
+
+
+def revoke_token(payload):
+    """Revoke one decoded JWT until it would have expired anyway"""
+    row = RevokedToken(
+        jti=payload['jti'],
+        user_id=int(payload['sub']) if str(payload.get('sub', '')).isdigit() else None,
+        token_type=payload.get('type'),
+        expires_at=datetime.utcfromtimestamp(payload['exp']),
+    )
+    revocation_list.record(row)
+    db.session.add(row)
+    db.session.commit()
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every access and refresh token issued to a user so far"""
+    config = current_app.config
+    lifetime = max(config['JWT_ACCESS_TOKEN_EXPIRES'], config['JWT_REFRESH_TOKEN_EXPIRES'])
+    if not isinstance(lifetime, timedelta):
+        lifetime = timedelta(seconds=lifetime)
+    now = datetime.utcnow()
+    # First whole second after now: covers every token issued so far (see the module docstring)
+    cutoff = now.replace(microsecond=0) + timedelta(seconds=1)
+    row = RevokedToken(user_id=user_id, revoked_before=cutoff, expires_at=now + lifetime)
+    revocation_list.record(row)
+    db.session.add(row)
+    db.session.commit()
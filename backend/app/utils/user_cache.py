@@ -0,0 +1,117 @@
+"""
+FinanceClinics - User Cache
+
+Per-worker cache of the users behind authenticated requests, so `/me` and
+token refreshes do not query `users` on every SPA boot.
+
+Entries expire after USER_CACHE_SECONDS. Every user change bumps the
+`users.version` column and the 'users' CacheVersion; each worker re-checks
+that version at most once every USER_CACHE_CHECK_SECONDS and drops its
+entries when it moved. Access tokens carry the `user_version` they were
+issued for, so a token minted after a change this worker has not seen yet
+makes it reload that user from the database.
+"""
+
+import threading
+import time
+from flask import current_app
+from ..extensions import db
+from ..models.user import User
+from ..models.cache_version import CacheVersion
+from .cache import TTLCache
+
+USERS_VERSION = 'users'
+
+
+class CachedUser:
+    """What authenticated endpoints need to know about a user"""
+    __slots__ = ('id', 'version', 'role', 'email', 'is_active', 'data')
+
+    def __init__(self, user):
+        self.id = user.id
+        self.version = user.version
+        self.role = user.role
+        self.email = user.email
+        self.is_active = user.is_active
+        self.data = user.to_dict()
+
+    def token_claims(self):
+        return {'role': self.role, 'email': self.email, 'user_version': self.version}
+
+
+class UserCache:
+    """TTL cache of CachedUser by id, cleared when the 'users' version moves"""
+
+    def __init__(self):
+        self._entries = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _cache(self):
+        config = current_app.config
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = TTLCache(
+                        maxsize=config.get('USER_CACHE_SIZE', 256),
+                        ttl=config.get('USER_CACHE_SECONDS', 60)
+                    )
+
+        interval = config.get('USER_CACHE_CHECK_SECONDS', 5)
+        if time.monotonic() - self._checked_at >= interval:
+            with self._lock:
+                if time.monotonic() - self._checked_at >= interval:
+                    version = CacheVersion.get(USERS_VERSION)
+                    if version != self._version:
+                        self._entries.clear()
+                        self._version = version
+                    self._checked_at = time.monotonic()
+        return self._entries
+
+    def get(self, user_id, version=None):
+        """
+        CachedUser for an id, loading it if needed; None if there is no such user.
+
+        With `version` (a token's `user_version` claim), a cached entry older
+        than the token is reloaded from the database.
+        """
+        cache = self._cache()
+        entry = cache.get(user_id)
+        if entry is not None and (version is None or entry.version >= version):
+            return entry
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            cache.pop(user_id)
+            return None
+        return self.store(user)
+
+    def store(self, user):
+        """Cache a freshly loaded or updated user"""
+        entry = CachedUser(user)
+        self._cache().set(user.id, entry)
+        return entry
+
+    def invalidate(self, user_id=None):
+        """Drop one user, or every user, from this worker's cache"""
+        if self._entries is None:
+            return
+        if user_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(user_id)
+
+    def reset(self):
+        """Force the next read to re-check the users version"""
+        self._checked_at = 0.0
+
+
+user_cache = UserCache()
+
+
+def users_changed(user_id=None):
+    """Record a user change so every worker drops its cached copy"""
+    CacheVersion.bump(USERS_VERSION)
+    user_cache.invalidate(user_id)
+    user_cache.reset()
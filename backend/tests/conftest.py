@@ -0,0 +1,97 @@
+"""
+FinanceClinics - Test Fixtures
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from app.config import TestingConfig  # noqa: E402
+from app.extensions import db  # noqa: E402
+
+
+class Config(TestingConfig):
+    RATELIMIT_ENABLED = False
+    METRICS_ENABLED = False
+    PROFILER_ENABLED = False
+    MAIL_SUPPRESS_SEND = False
+    MAIL_USE_TLS = False
+    MAIL_USERNAME = None
+    MAIL_PASSWORD = None
+
+
+def make_app(**overrides):
+    """App on an empty in-memory database, with config overrides"""
+    config = type('TestConfig', (Config,), overrides)
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+@pytest.fixture(autouse=True)
+def spam_filter(monkeypatch):
+    """A fresh spam filter per test: its duplicate memory lives for the whole process"""
+    from app.api import leads
+    from app.utils.spam import SpamFilter
+
+    fresh = SpamFilter()
+    monkeypatch.setattr(leads, 'spam_filter', fresh)
+    return fresh
+
+
+@pytest.fixture(autouse=True)
+def revocations():
+    """Each test's in-memory database starts without revocations; so does the worker's copy"""
+    from app.utils.token_revocation import revocation_list
+
+    revocation_list.reset()
+    yield revocation_list
+    revocation_list.reset()
+
+
+@pytest.fixture(autouse=True)
+def users():
+    """The per-worker user cache outlives each test's database; start it empty"""
+    from app.utils.user_cache import user_cache
+
+    user_cache.invalidate()
+    user_cache.reset()
+    yield user_cache
+    user_cache.invalidate()
+    user_cache.reset()
+
+
+@pytest.fixture
+def app():
+    app = make_app()
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def admin_headers(email='admin@financeclinics.example'):
+    """Create an admin in the current app's database and return its Authorization header"""
+    from flask_jwt_extended import create_access_token
+    from app.models import User
+
+    admin = User(email=email, name='Admin')
+    admin.set_password('correct horse battery staple')
+    db.session.add(admin)
+    db.session.commit()
+    token = create_access_token(identity=str(admin.id), additional_claims=admin.token_claims())
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def auth_headers(app):
+    return admin_headers()
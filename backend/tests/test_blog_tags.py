@@ -0,0 +1,50 @@
+"""
+Blog tags: the post_tags index follows BlogPost.tags, and tag filters ignore case
+"""
+
+from datetime import datetime
+
+from app.extensions import db
+from app.models.blogpost import BlogPost, PostTag
+
+
+def make_post(tags, **kwargs):
+    post = BlogPost(title=kwargs.pop('title', 'Hospital funding'), tags=tags,
+                    is_published=True, published_at=datetime.utcnow(), **kwargs)
+    post.sync_tags()
+    db.session.add(post)
+    db.session.commit()
+    return post
+
+
+def test_case_only_rename_updates_the_row_in_place(app):
+    post = make_post(['tax', 'Loans'])
+    row = next(r for r in post.tag_rows if r.tag == 'tax')
+
+    post.tags = ['Tax', 'loans', 'Grants']
+    post.sync_tags()
+    db.session.commit()
+
+    assert post.tags == ['Tax', 'loans', 'Grants']
+    assert sorted(r.tag for r in post.tag_rows) == ['Grants', 'Tax', 'loans']
+    assert any(r is row for r in post.tag_rows)
+    assert sorted(t for (t,) in db.session.query(PostTag.tag)) == ['Grants', 'Tax', 'loans']
+
+
+def test_read_model_tag_filter_ignores_case(app, client):
+    make_post(['Tax'], title='Tax planning')
+    make_post(['Loans'], title='Working capital')
+
+    for tag in ('Tax', 'tax', 'TAX'):
+        response = client.get('/api/blog', query_string={'tag': tag})
+        assert [p['title'] for p in response.get_json()['posts']] == ['Tax planning']
+
+
+def test_sql_tag_filter_ignores_case(app, client):
+    app.config['READ_MODEL_ENABLED'] = False
+    make_post(['Tax'], title='Tax planning')
+    make_post(['Loans'], title='Working capital')
+
+    for tag in ('Tax', 'tax', 'TAX'):
+        response = client.get('/api/blog', query_string={'tag': tag})
+        assert [p['title'] for p in response.get_json()['posts']] == ['Tax planning']
@@ -0,0 +1,35 @@
+"""
+Bulk publish and unpublish of blog posts
+"""
+
+from datetime import datetime
+
+from app.extensions import db
+from app.models.blogpost import BlogPost
+
+FIRST_PUBLISHED = datetime(2024, 1, 15, 9, 30)
+
+
+def test_publish_keeps_published_at_and_reports_unchanged(app, client, auth_headers):
+    live = BlogPost(title='Live', is_published=True, published_at=FIRST_PUBLISHED)
+    withdrawn = BlogPost(title='Withdrawn', is_published=False, published_at=FIRST_PUBLISHED)
+    draft = BlogPost(title='Draft', is_published=False)
+    db.session.add_all([live, withdrawn, draft])
+    db.session.commit()
+    ids = [live.id, withdrawn.id, draft.id, 9999]
+
+    response = client.post('/api/blog/admin/bulk', json={'action': 'publish', 'ids': ids}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert [r['result'] for r in response.get_json()['results']] == ['unchanged', 'updated', 'updated', 'not_found']
+    db.session.expire_all()
+    assert live.published_at == FIRST_PUBLISHED
+    assert withdrawn.is_published and withdrawn.published_at == FIRST_PUBLISHED
+    assert draft.is_published and draft.published_at is not None
+
+    response = client.post('/api/blog/admin/bulk', json={'action': 'unpublish', 'ids': [live.id, live.id]},
+                           headers=auth_headers)
+    assert [r['result'] for r in response.get_json()['results']] == ['updated']
+    response = client.post('/api/blog/admin/bulk', json={'action': 'unpublish', 'ids': [live.id]},
+                           headers=auth_headers)
+    assert [r['result'] for r in response.get_json()['results']] == ['unchanged']
@@ -0,0 +1,58 @@
+"""
+Lead deduplication: repeats of an open lead are folded into it
+"""
+
+from app.extensions import db
+from app.models import Lead
+
+
+def submit(client, **fields):
+    data = {'name': 'Asha Rao', 'email': 'asha@clinic.example', 'phone': '+91 98765 43210',
+            'privacy_accepted': True}
+    data.update(fields)
+    return client.post('/api/contact', json=data)
+
+
+def test_same_email_is_a_repeat(client):
+    first = submit(client, message='We need help with hospital funding.')
+    repeat = submit(client, email='Asha+web@clinic.example', phone='', message='Following up on funding.')
+
+    assert first.status_code == 201
+    assert repeat.status_code == 200
+    assert repeat.get_json()['lead_id'] == first.get_json()['lead_id']
+    assert Lead.query.one().submission_count == 2
+
+
+def test_same_phone_and_name_is_a_repeat(client):
+    first = submit(client, message='We need help with hospital funding.')
+    repeat = submit(client, name='  asha   RAO ', email='asha.rao@other.example',
+                    message='Writing from my other address.')
+
+    assert repeat.get_json()['lead_id'] == first.get_json()['lead_id']
+    assert Lead.query.count() == 1
+
+
+def test_shared_phone_with_another_name_is_a_new_lead(client):
+    first = submit(client, message='We need help with hospital funding.')
+    other = submit(client, name='Ravi Menon', email='ravi@clinic.example',
+                   message='Our clinic needs working capital.')
+
+    assert other.status_code == 201
+    assert other.get_json()['lead_id'] != first.get_json()['lead_id']
+    lead = db.session.get(Lead, other.get_json()['lead_id'])
+    assert (lead.name, lead.email, lead.submission_count) == ('Ravi Menon', 'ravi@clinic.example', 1)
+
+
+def test_repeat_is_kept_apart_from_admin_notes(client, auth_headers):
+    lead_id = submit(client, message='We need help with hospital funding.').get_json()['lead_id']
+    client.put(f'/api/contact/admin/{lead_id}', json={'notes': 'Called back on Monday'}, headers=auth_headers)
+
+    submit(client, name='Asha Rao', email='asha.rao@other.example', organization='City Clinic',
+           message='Writing from my other address.')
+
+    lead = client.get(f'/api/contact/admin/{lead_id}', headers=auth_headers).get_json()['lead']
+    assert lead['notes'] == 'Called back on Monday'
+    assert lead['submission_count'] == 2
+    assert [(s['email'], s['organization'], s['message']) for s in lead['submissions']] == [
+        ('asha.rao@other.example', 'City Clinic', 'Writing from my other address.'),
+    ]
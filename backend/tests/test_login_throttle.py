@@ -0,0 +1,161 @@
+"""
+Login throttle: failed-login windows per email and per client IP, lockouts,
+and the negative cache of unknown emails
+"""
+
+import pytest
+
+from app.utils.login_throttle import LoginThrottle
+from conftest import admin_headers, make_app
+
+PROXY = '10.0.0.2'
+
+
+@pytest.fixture
+def throttle(monkeypatch):
+    """A fresh throttle per test; the storage and caches live for the whole process"""
+    from app.api import admin, auth
+
+    fresh = LoginThrottle()
+    monkeypatch.setattr(auth, 'login_throttle', fresh)
+    monkeypatch.setattr(admin, 'login_throttle', fresh)
+    return fresh
+
+
+@pytest.fixture
+def throttled_app(throttle):
+    from app.extensions import db
+
+    app = make_app(LOGIN_EMAIL_LIMIT='3 per 15 minutes', LOGIN_IP_LIMIT='3 per 15 minutes')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def login(client, email, password='wrong password', client_ip='203.0.113.7'):
+    return client.post('/api/auth/login', json={'email': email, 'password': password},
+                       headers={'X-Forwarded-For': client_ip}, environ_base={'REMOTE_ADDR': PROXY})
+
+
+def test_ip_window_is_per_client_behind_the_proxy(throttled_app):
+    client = throttled_app.test_client()
+    for i in range(3):
+        assert login(client, f'guess{i}@example.com').status_code == 401
+
+    locked = login(client, 'guess9@example.com')
+    assert locked.status_code == 429
+    assert int(locked.headers['Retry-After']) > 0
+    # Another visitor behind the same nginx is not locked out
+    assert login(client, 'someone@example.com', client_ip='198.51.100.4').status_code == 401
+
+
+def test_unknown_email_cache_is_dropped_when_another_worker_approves(throttled_app, throttle, monkeypatch):
+    from app.api import admin
+    from app.extensions import db
+    from app.models import User
+
+    throttled_app.config['USER_CACHE_CHECK_SECONDS'] = 0
+    pending = User(email='new.admin@financeclinics.example', name='New Admin', is_active=False)
+    pending.set_password('correct horse battery staple')
+    db.session.add(pending)
+    db.session.commit()
+    client = throttled_app.test_client()
+
+    response = login(client, pending.email, 'correct horse battery staple')
+    assert response.status_code == 401
+    assert throttle.is_unknown(pending.email)
+
+    # The approval is handled by another worker, with its own throttle
+    monkeypatch.setattr(admin, 'login_throttle', LoginThrottle())
+    response = client.put(f'/api/admin/users/{pending.id}/approve', headers=admin_headers())
+    assert response.status_code == 200
+
+    assert login(client, pending.email, 'correct horse battery staple').status_code == 200
+
+
+def fail_until_locked(client, email, attempts=3):
+    # A new client IP per attempt, so only the email window fills
+    for i in range(attempts):
+        assert login(client, email, client_ip=f'198.51.100.{i + 10}').status_code == 401
+    return login(client, email, client_ip='198.51.100.99')
+
+
+def test_email_lockout_doubles_up_to_the_maximum(throttled_app, throttle):
+    throttled_app.config.update(LOGIN_LOCKOUT_SECONDS=60, LOGIN_LOCKOUT_MAX_SECONDS=150)
+    client = throttled_app.test_client()
+    email = 'target@financeclinics.example'
+
+    retry_afters = []
+    for _ in range(3):
+        locked = fail_until_locked(client, email)
+        assert locked.status_code == 429
+        retry_afters.append(int(locked.headers['Retry-After']))
+        # Lets the lockout run out without waiting for it
+        throttle._storage().clear(f'LIMITER/login-lock/email/{email}')
+
+    assert 59 <= retry_afters[0] <= 61
+    assert 119 <= retry_afters[1] <= 121
+    assert 149 <= retry_afters[2] <= 151
+
+
+def test_locked_out_logins_skip_password_hashing(throttled_app, throttle, monkeypatch):
+    client = throttled_app.test_client()
+    email = 'target@financeclinics.example'
+    assert fail_until_locked(client, email).status_code == 429
+
+    def no_hashing(password):
+        raise AssertionError('a locked-out login must not hash')
+    monkeypatch.setattr(throttle, 'dummy_check', no_hashing)
+
+    assert login(client, email, client_ip='198.51.100.200').status_code == 429
+
+
+def test_successful_login_clears_the_email_failures(throttled_app):
+    from app.extensions import db
+    from app.models import User
+
+    user = User(email='staff@financeclinics.example', name='Staff')
+    user.set_password('correct horse battery staple')
+    db.session.add(user)
+    db.session.commit()
+    client = throttled_app.test_client()
+
+    for i in range(2):
+        assert login(client, user.email, client_ip=f'198.51.100.{i + 10}').status_code == 401
+    assert login(client, user.email, 'correct horse battery staple', client_ip='198.51.100.20').status_code == 200
+
+    # Two more failures fit in the window again
+    for i in range(2):
+        assert login(client, user.email, client_ip=f'198.51.100.{i + 30}').status_code == 401
+    assert login(client, user.email, 'correct horse battery staple', client_ip='198.51.100.40').status_code == 200
+
+
+def test_unknown_emails_skip_the_user_query_but_not_the_hash(throttled_app, throttle, monkeypatch):
+    from app.extensions import db
+    from app.models import User
+    from app.utils.user_cache import users_changed
+
+    throttled_app.config['USER_CACHE_CHECK_SECONDS'] = 3600
+    client = throttled_app.test_client()
+    email = 'nobody@financeclinics.example'
+    checks = []
+    real_check = throttle.dummy_check
+    monkeypatch.setattr(throttle, 'dummy_check', lambda password: checks.append(password) or real_check(password))
+
+    assert login(client, email, client_ip='198.51.100.1').status_code == 401
+    assert throttle.is_unknown(email)
+
+    # Created behind the app's back, the account stays unknown to this worker's cache...
+    user = User(email=email, name='Nobody')
+    user.set_password('correct horse battery staple')
+    db.session.add(user)
+    db.session.commit()
+    assert login(client, email, 'correct horse battery staple', client_ip='198.51.100.2').status_code == 401
+    assert len(checks) == 2
+
+    # ...until the users version moves
+    throttled_app.config['USER_CACHE_CHECK_SECONDS'] = 0
+    users_changed()
+    assert login(client, email, 'correct horse battery staple', client_ip='198.51.100.3').status_code == 200
+    assert len(checks) == 2
@@ -0,0 +1,59 @@
+"""
+Memory guard on the MIS import and export endpoints
+"""
+
+import io
+import json
+
+from app.extensions import db
+from app.models import MISData, MISTemplate
+from app.utils.memory_guard import memory_reports
+
+
+def make_template(rows=0):
+    tpl = MISTemplate(name='Monthly', columns=json.dumps([{'key': 'month'}, {'key': 'revenue'}]))
+    db.session.add(tpl)
+    db.session.flush()
+    for i in range(rows):
+        db.session.add(MISData(template_id=tpl.id, data=json.dumps({'month': f'M{i}', 'revenue': i})))
+    db.session.commit()
+    return tpl
+
+
+def test_streamed_csv_export_is_not_reported(app, client, auth_headers):
+    tpl = make_template(rows=3)
+    before = len(memory_reports.recent())
+
+    response = client.get(f'/api/admin/mis/templates/{tpl.id}/export?format=csv', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).splitlines() == ['month,revenue', 'M0,0', 'M1,1', 'M2,2']
+    assert len(memory_reports.recent()) == before
+
+
+def test_unsupported_upload_is_501_not_413(app, client, auth_headers):
+    app.config['MEMORY_BUDGET_MB'] = 1
+    tpl = make_template()
+
+    response = client.post(
+        f'/api/admin/mis/templates/{tpl.id}/import',
+        data={'file': (io.BytesIO(b'x' * 512 * 1024), 'figures.txt')},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 501
+
+
+def test_csv_import_is_reported(app, client, auth_headers):
+    tpl = make_template()
+
+    response = client.post(
+        f'/api/admin/mis/templates/{tpl.id}/import',
+        data={'file': (io.BytesIO(b'month,revenue\nJan,10\nFeb,20\n'), 'figures.csv')},
+        headers=auth_headers,
+    )
+
+    assert response.get_json() == {'imported': 2}
+    report = memory_reports.recent()[0]
+    assert report['endpoint'] == 'admin.import_mis_data'
+    assert report['rejected'] is None
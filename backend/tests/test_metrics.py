@@ -0,0 +1,28 @@
+"""
+Rate limit rejection metric
+"""
+
+from app.utils.metrics import metrics
+from conftest import make_app
+
+
+def rejections():
+    return sum(v for (name, _), v in metrics._counters.items() if name == 'ratelimit_rejections_total')
+
+
+def test_counts_limiter_rejections_only(tmp_path):
+    app = make_app(RATELIMIT_ENABLED=True, METRICS_ENABLED=True, METRICS_DIR=str(tmp_path),
+                   LOGIN_EMAIL_LIMIT='1 per 15 minutes')
+    client = app.test_client()
+    before = rejections()
+
+    # Login throttle: its own 429, not a Flask-Limiter rejection
+    for _ in range(3):
+        response = client.post('/api/auth/login', json={'email': 'nobody@example.com', 'password': 'wrong'})
+    assert response.status_code == 429
+    assert rejections() == before
+
+    # Flask-Limiter: the contact form allows 5 per 10 minutes
+    statuses = [client.post('/api/contact', json={}).status_code for _ in range(6)]
+    assert statuses[-1] == 429
+    assert rejections() == before + 1
@@ -0,0 +1,150 @@
+"""
+Email outbox: contact submissions only queue emails, the worker delivers them
+to an SMTP server (aiosmtpd stands in for it), and failures back off until
+the email is dead-lettered.
+"""
+
+import socket
+from datetime import datetime, timedelta
+import pytest
+
+from app.extensions import db
+from app.models import EmailOutbox, Lead
+from app.utils import outbox
+from app.utils.email import smtp_pool
+from conftest import make_app
+
+controller_module = pytest.importorskip('aiosmtpd.controller')
+
+CONTACT = {
+    'name': 'Asha Rao',
+    'email': 'asha@clinic.example',
+    'message': 'We need help with hospital funding.',
+    'privacy_accepted': True,
+}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return '250 Message accepted'
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = controller_module.Controller(handler, hostname='127.0.0.1', port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture
+def mail_app(smtp_server):
+    controller, _ = smtp_server
+    app = make_app(MAIL_SERVER='127.0.0.1', MAIL_PORT=controller.port,
+                   ADMIN_EMAIL='admin@financeclinics.example')
+    with app.app_context():
+        yield app
+        smtp_pool.close()
+        db.session.remove()
+        db.drop_all()
+
+
+def test_contact_submission_queues_emails_without_smtp(mail_app, smtp_server, monkeypatch):
+    _, handler = smtp_server
+
+    def no_smtp(message):
+        raise AssertionError('the request must not talk to SMTP')
+    monkeypatch.setattr(smtp_pool, 'send', no_smtp)
+
+    response = mail_app.test_client().post('/api/contact', json=CONTACT)
+
+    assert response.status_code == 201
+    rows = EmailOutbox.query.order_by(EmailOutbox.id).all()
+    assert [(r.kind, r.status) for r in rows] == [
+        ('lead_notification', 'pending'),
+        ('lead_acknowledgment', 'pending'),
+    ]
+    assert all(r.attempts == 0 for r in rows)
+    assert handler.envelopes == []
+
+
+def test_worker_delivers_to_smtp_and_marks_lead(mail_app, smtp_server):
+    _, handler = smtp_server
+    mail_app.test_client().post('/api/contact', json=CONTACT)
+
+    sent, failed = outbox.deliver_pending()
+
+    assert (sent, failed) == (2, 0)
+    assert sorted(rcpt for e in handler.envelopes for rcpt in e.rcpt_tos) == \
+        ['admin@financeclinics.example', 'asha@clinic.example']
+    assert {r.status for r in EmailOutbox.query.all()} == {'sent'}
+    assert Lead.query.one().email_sent is True
+    assert outbox.deliver_pending() == (0, 0)
+
+
+def test_failing_smtp_backs_off_then_dead_letters():
+    app = make_app(MAIL_SERVER='127.0.0.1', MAIL_PORT=free_port(),
+                   EMAIL_OUTBOX_MAX_ATTEMPTS=3, EMAIL_OUTBOX_BACKOFF_SECONDS=30)
+    with app.app_context():
+        entry = outbox.queue_email('lead_acknowledgment', 'asha@clinic.example', 'Thanks', 'Body')
+        db.session.commit()
+
+        delays = []
+        for attempt in (1, 2):
+            before = datetime.utcnow()
+            assert outbox.deliver_pending() == (0, 1)
+            db.session.refresh(entry)
+            assert entry.status == 'pending'
+            assert entry.attempts == attempt
+            assert entry.last_error
+            delays.append((entry.next_attempt_at - before).total_seconds())
+            # Nothing is retried before the backoff has passed
+            assert outbox.deliver_pending() == (0, 0)
+            entry.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+            db.session.commit()
+
+        # 30s then 60s, each with up to 20% jitter
+        assert 24 <= delays[0] <= 36
+        assert 48 <= delays[1] <= 72
+
+        assert outbox.deliver_pending() == (0, 1)
+        db.session.refresh(entry)
+        assert entry.status == 'dead'
+        assert entry.attempts == 3
+        entry.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+        assert outbox.deliver_pending() == (0, 0)
+
+        smtp_pool.close()
+        db.session.remove()
+        db.drop_all()
+
+
+def test_retry_requeues_only_dead_emails(app, client, auth_headers):
+    pending = outbox.queue_email('lead_acknowledgment', 'a@clinic.example', 'Thanks', 'Body')
+    dead = outbox.queue_email('lead_acknowledgment', 'b@clinic.example', 'Thanks', 'Body')
+    db.session.flush()
+    dead.status, dead.attempts = 'dead', 5
+    db.session.commit()
+
+    response = client.post(f'/api/admin/outbox/{pending.id}/retry', headers=auth_headers)
+    assert response.status_code == 400
+
+    response = client.post(f'/api/admin/outbox/{dead.id}/retry', headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['email']['status'] == 'pending'
+    assert response.get_json()['email']['attempts'] == 0
+
+    response = client.post(f'/api/admin/outbox/{dead.id}/retry', headers=auth_headers)
+    assert response.status_code == 400
@@ -0,0 +1,50 @@
+"""
+SQL statements per request on the list endpoints stay constant as rows grow
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.extensions import db
+from app.models import BlogPost, Lead, User
+from app.utils.query_counter import assert_num_queries, count_endpoint_queries
+
+
+def add_rows(n):
+    """n posts, each by its own author, and n leads"""
+    for _ in range(n):
+        # Authors never log in: skip the deliberately slow password hash
+        author = User(email=f'author{User.query.count()}@financeclinics.example', name='Author',
+                      password_hash='!')
+        db.session.add(author)
+        db.session.flush()
+        db.session.add(BlogPost(title=f'Post by {author.id}', author_id=author.id, tags=['Tax'],
+                                is_published=True, published_at=datetime.utcnow()))
+        db.session.add(Lead(name='Asha Rao', email=f'lead{author.id}@clinic.example',
+                            message='We need help with hospital funding.'))
+    db.session.commit()
+
+
+@pytest.mark.parametrize('url, admin, expected', [
+    ('/api/blog', False, 2),                # page + count, authors joined
+    ('/api/admin/dashboard', True, 11),     # fixed set of aggregates
+    ('/api/contact/admin', True, 2),        # page + count
+])
+def test_statement_count_does_not_grow_with_rows(app, client, auth_headers, url, admin, expected):
+    app.config['READ_MODEL_ENABLED'] = False
+    # The revocation list reloads on a timer; keep it to the warm-up request
+    app.config['TOKEN_REVOCATION_CHECK_SECONDS'] = 3600
+    headers = auth_headers if admin else {}
+    add_rows(2)
+    # Warm the per-worker caches (user lookup, revocation list) first
+    response, _ = count_endpoint_queries(client, url, headers=headers)
+    assert response.status_code == 200
+
+    with assert_num_queries(expected):
+        client.get(url, headers=headers)
+
+    add_rows(8)
+    with assert_num_queries(expected):
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
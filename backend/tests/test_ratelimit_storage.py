@@ -0,0 +1,108 @@
+"""
+SQLite rate limit storage: fixed and moving windows, shared by every storage
+instance (and process) that opens the same file.
+"""
+
+import multiprocessing
+import time
+import pytest
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import MovingWindowRateLimiter
+
+from app.extensions import db
+from app.utils.ratelimit_storage import SQLiteStorage
+from conftest import make_app
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return f'sqlite:///{tmp_path}/ratelimit.db'
+
+
+def test_uri_selects_the_sqlite_storage(uri):
+    assert isinstance(storage_from_string(uri), SQLiteStorage)
+
+
+def test_fixed_window_counters(uri):
+    storage = SQLiteStorage(uri)
+
+    assert storage.get('k') == 0
+    assert storage.incr('k', 60) == 1
+    assert storage.incr('k', 60, amount=2) == 3
+    assert storage.get('k') == 3
+    assert time.time() + 58 <= storage.get_expiry('k') <= time.time() + 61
+
+    # Without elastic expiry a hit does not push the window out; with it, it does
+    storage.incr('k', 600)
+    assert storage.get_expiry('k') <= time.time() + 61
+    storage.incr('k', 600, elastic_expiry=True)
+    assert storage.get_expiry('k') >= time.time() + 598
+
+    storage.clear('k')
+    assert storage.get('k') == 0
+
+
+def test_expired_counter_starts_over(uri):
+    storage = SQLiteStorage(uri)
+    storage.incr('k', 0.05)
+    storage.incr('k', 0.05)
+    time.sleep(0.1)
+
+    assert storage.get('k') == 0
+    assert storage.incr('k', 60) == 1
+
+
+def test_moving_window_is_shared_between_instances(uri):
+    item = parse('3 per minute')
+    first = MovingWindowRateLimiter(SQLiteStorage(uri))
+    second = MovingWindowRateLimiter(SQLiteStorage(uri))
+
+    assert first.hit(item, 'login', '203.0.113.7')
+    assert second.hit(item, 'login', '203.0.113.7')
+    assert first.hit(item, 'login', '203.0.113.7')
+    assert not second.hit(item, 'login', '203.0.113.7')
+    assert first.hit(item, 'login', '198.51.100.4')
+
+    stats = second.get_window_stats(item, 'login', '203.0.113.7')
+    assert stats.remaining == 0
+    assert time.time() < stats.reset_time <= time.time() + 61
+
+    assert SQLiteStorage(uri).reset() == 4
+    assert first.hit(item, 'login', '203.0.113.7')
+
+
+def _hit_many(uri, attempts):
+    limiter = MovingWindowRateLimiter(SQLiteStorage(uri))
+    item = parse('15 per minute')
+    return sum(limiter.hit(item, 'contact', 'shared') for _ in range(attempts))
+
+
+def test_moving_window_holds_across_processes(uri):
+    # Spawned, not forked: the test process has threads of its own
+    with multiprocessing.get_context('spawn').Pool(4) as pool:
+        accepted = sum(pool.starmap(_hit_many, [(uri, 10)] * 4))
+
+    assert accepted == 15
+
+
+def contact(client, i):
+    return client.post('/api/contact', json={
+        'name': 'Asha Rao',
+        'email': f'asha{i}@clinic.example',
+        'message': f'We need help with hospital funding, request {i}.',
+        'privacy_accepted': True,
+    })
+
+
+def test_contact_limit_is_shared_by_workers_on_the_same_file(uri):
+    worker = make_app(RATELIMIT_ENABLED=True, RATELIMIT_STORAGE_URI=uri)
+    client = worker.test_client()
+    assert [contact(client, i).status_code for i in range(6)] == [201] * 5 + [429]
+
+    other_worker = make_app(RATELIMIT_ENABLED=True, RATELIMIT_STORAGE_URI=uri)
+    assert contact(other_worker.test_client(), 6).status_code == 429
+
+    for app in (worker, other_worker):
+        with app.app_context():
+            db.drop_all()
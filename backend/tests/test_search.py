@@ -0,0 +1,20 @@
+"""
+Site search
+"""
+
+from datetime import datetime
+
+from app.extensions import db
+from app.models import BlogPost
+
+
+def test_limit_is_clamped(app, client):
+    for i in range(3):
+        db.session.add(BlogPost(title=f'Hospital funding guide {i}', content='Funding for hospitals',
+                                is_published=True, published_at=datetime.utcnow()))
+    db.session.commit()
+
+    for limit, expected in (('-5', 1), ('0', 1), ('2', 2), ('500', 3)):
+        response = client.get('/api/search', query_string={'q': 'funding', 'limit': limit})
+        assert response.status_code == 200
+        assert response.get_json()['total'] == expected
@@ -0,0 +1,76 @@
+"""
+Contact form spam filter: shed submissions get a fake success and leave no
+lead, except token problems a real visitor can hit, which get a 400.
+"""
+
+from app.models import Lead
+
+CONTACT = {
+    'name': 'Asha Rao',
+    'email': 'asha@clinic.example',
+    'message': 'We need help with hospital funding.',
+    'privacy_accepted': True,
+}
+
+
+def submit(client, **fields):
+    return client.post('/api/contact', json=dict(CONTACT, **fields))
+
+
+def shed_reasons(client, auth_headers):
+    response = client.get('/api/contact/admin/spam-stats', headers=auth_headers)
+    assert response.status_code == 200
+    return response.get_json()['by_reason']
+
+
+def test_honeypot_gets_a_fake_success(app, client, auth_headers):
+    response = submit(client, website='http://spam.example')
+
+    assert response.status_code == 201
+    assert Lead.query.count() == 0
+    assert shed_reasons(client, auth_headers) == {'honeypot': 1}
+
+
+def test_form_token_checks(app, client, auth_headers):
+    app.config.update(CONTACT_REQUIRE_TOKEN=True, CONTACT_MIN_FILL_SECONDS=3)
+    token = client.get('/api/contact/token').get_json()['token']
+
+    assert submit(client).status_code == 400
+    assert submit(client, form_token=token + 'x').status_code == 400
+    # Sent back right away: no person typed that
+    assert submit(client, form_token=token).status_code == 201
+    assert Lead.query.count() == 0
+
+    app.config['CONTACT_TOKEN_MAX_AGE'] = -1
+    assert submit(client, form_token=token).status_code == 400
+
+    app.config.update(CONTACT_TOKEN_MAX_AGE=86400, CONTACT_MIN_FILL_SECONDS=0)
+    assert submit(client, form_token=token).status_code == 201
+    assert Lead.query.count() == 1
+
+    assert shed_reasons(client, auth_headers) == {
+        'no_token': 1, 'bad_token': 1, 'too_fast': 1, 'expired_token': 1,
+    }
+
+
+def test_links_and_rules(app, client, auth_headers):
+    links = ' '.join(f'https://site{i}.example' for i in range(3))
+    assert submit(client, message=f'Please visit {links}').status_code == 201
+    assert submit(client, message='Affordable SEO services for your clinic').status_code == 201
+    assert Lead.query.count() == 0
+    assert shed_reasons(client, auth_headers) == {'links': 1, 'rule': 1}
+
+
+def test_repeated_message_is_shed_after_the_limit(app, client, auth_headers):
+    app.config['CONTACT_DUPLICATE_LIMIT'] = 3
+    messages = [
+        'We need help with hospital funding.',
+        'we need help with   hospital funding.',
+        'WE NEED HELP WITH HOSPITAL FUNDING.',
+        ' We need help with hospital\nfunding. ',
+    ]
+    for i, message in enumerate(messages):
+        assert submit(client, email=f'sender{i}@clinic.example', message=message).status_code == 201
+
+    assert Lead.query.count() == 3
+    assert shed_reasons(client, auth_headers) == {'duplicate': 1}
@@ -0,0 +1,122 @@
+"""
+Token revocation: logout blocklists a token's jti, deactivating a user revokes
+every token issued so far, and other workers pick both up on their next
+refresh. Per-user cutoffs are kept in whole seconds, like the `iat` of the
+tokens they are compared with.
+"""
+
+from datetime import datetime, timezone
+from flask_jwt_extended import decode_token
+
+from app.extensions import db
+from app.models import RevokedToken, User
+from app.utils import token_revocation
+from app.utils.token_revocation import RevocationList, revocation_list, revoke_user_tokens
+
+PASSWORD = 'correct horse battery staple'
+
+
+class FrozenDatetime(datetime):
+    """datetime whose utcnow() is fixed, mid-second"""
+    now_value = datetime(2026, 3, 1, 12, 0, 0, 600000)
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now_value
+
+
+def epoch(dt):
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+
+def make_user(email):
+    user = User(email=email, name='Staff')
+    user.set_password(PASSWORD)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def login(client, email):
+    response = client.post('/api/auth/login', json={'email': email, 'password': PASSWORD})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_user_cutoff_covers_the_whole_revocation_second(app, monkeypatch):
+    monkeypatch.setattr(token_revocation, 'datetime', FrozenDatetime)
+    second = epoch(FrozenDatetime.now_value)
+
+    revoke_user_tokens(7)
+
+    row = RevokedToken.query.one()
+    assert row.revoked_before == datetime(2026, 3, 1, 12, 0, 1)
+
+    # Another worker loads the cutoff from the table and must agree with this one
+    other_worker = RevocationList()
+    for worker in (revocation_list, other_worker):
+        assert worker.is_revoked({'sub': '7', 'iat': second - 1})
+        assert worker.is_revoked({'sub': '7', 'iat': second})
+        assert not worker.is_revoked({'sub': '7', 'iat': second + 1})
+        assert not worker.is_revoked({'sub': '8', 'iat': second})
+
+
+def test_logout_revokes_access_and_refresh_tokens(app, client):
+    make_user('staff@financeclinics.example')
+    tokens = login(client, 'staff@financeclinics.example')
+    assert client.get('/api/auth/me', headers=bearer(tokens['access_token'])).status_code == 200
+
+    response = client.post('/api/auth/logout', headers=bearer(tokens['access_token']),
+                           json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200
+
+    assert client.get('/api/auth/me', headers=bearer(tokens['access_token'])).status_code == 401
+    assert client.post('/api/auth/refresh', headers=bearer(tokens['refresh_token'])).status_code == 401
+    assert RevokedToken.query.count() == 2
+
+    # Only those two tokens are revoked, not the user
+    fresh = login(client, 'staff@financeclinics.example')
+    assert client.get('/api/auth/me', headers=bearer(fresh['access_token'])).status_code == 200
+
+
+def test_other_workers_pick_up_revocations_on_refresh(app, client):
+    make_user('staff@financeclinics.example')
+    first = decode_token(login(client, 'staff@financeclinics.example')['access_token'])
+    tokens = login(client, 'staff@financeclinics.example')
+    second = decode_token(tokens['access_token'])
+
+    other_worker = RevocationList()
+    assert not other_worker.is_revoked(first)
+
+    token_revocation.revoke_token(first)
+
+    # Until its next check the other worker keeps its old copy...
+    app.config['TOKEN_REVOCATION_CHECK_SECONDS'] = 3600
+    assert not other_worker.is_revoked(first)
+
+    # ...then it loads the table
+    app.config['TOKEN_REVOCATION_CHECK_SECONDS'] = 0
+    assert other_worker.is_revoked(first)
+    assert not other_worker.is_revoked(second)
+
+    # and from then on only what was revoked after the last seq it saw
+    client.post('/api/auth/logout', headers=bearer(tokens['access_token']))
+    assert other_worker.is_revoked(second)
+
+
+def test_deactivating_a_user_revokes_their_tokens(app, client, auth_headers):
+    staff = make_user('staff@financeclinics.example')
+    tokens = login(client, 'staff@financeclinics.example')
+
+    response = client.put(f'/api/admin/users/{staff.id}', headers=auth_headers,
+                          json={'is_active': False})
+    assert response.status_code == 200
+
+    assert client.get('/api/auth/me', headers=bearer(tokens['access_token'])).status_code == 401
+    assert client.post('/api/auth/refresh', headers=bearer(tokens['refresh_token'])).status_code == 401
+    # The admin's own tokens are untouched
+    assert client.get('/api/auth/me', headers=auth_headers).status_code == 200
@@ -0,0 +1,62 @@
+"""
+User cache: `/me` is served from the worker's cache, and a change made by
+another worker reaches it either through a token carrying a newer
+`user_version` or through the 'users' CacheVersion on the next check.
+"""
+
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from app.models import CacheVersion, User
+from app.utils.user_cache import USERS_VERSION
+
+
+def bearer(user):
+    token = create_access_token(identity=str(user.id), additional_claims=user.token_claims())
+    return {'Authorization': f'Bearer {token}'}
+
+
+def rename_elsewhere(user, name):
+    """What another worker's update_user leaves behind: the row and the versions move, this cache does not"""
+    user.name = name
+    user.bump_version()
+    db.session.commit()
+    CacheVersion.bump(USERS_VERSION)
+
+
+def me(client, headers):
+    response = client.get('/api/auth/me', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()['user']
+
+
+def test_newer_token_reloads_a_stale_cached_user(app, client):
+    app.config['USER_CACHE_CHECK_SECONDS'] = 3600
+    user = User(email='staff@financeclinics.example', name='Before', password_hash='!')
+    db.session.add(user)
+    db.session.commit()
+    old_headers = bearer(user)
+    assert me(client, old_headers)['name'] == 'Before'
+
+    rename_elsewhere(user, 'After')
+
+    # The old token is still answered from the cache...
+    assert me(client, old_headers)['name'] == 'Before'
+    # ...but a token issued after the change carries its user_version and forces a reload
+    assert me(client, bearer(user))['name'] == 'After'
+    assert me(client, old_headers)['name'] == 'After'
+
+
+def test_users_version_check_drops_the_cache(app, client):
+    app.config['USER_CACHE_CHECK_SECONDS'] = 3600
+    user = User(email='staff@financeclinics.example', name='Before', password_hash='!')
+    db.session.add(user)
+    db.session.commit()
+    headers = bearer(user)
+    assert me(client, headers)['name'] == 'Before'
+
+    rename_elsewhere(user, 'After')
+    assert me(client, headers)['name'] == 'Before'
+
+    app.config['USER_CACHE_CHECK_SECONDS'] = 0
+    assert me(client, headers)['name'] == 'After'
@@ -32,6 +32,11 @@ from app import create_app
 # Create the application instance
 application = create_app()
 
+# Deliver queued emails from a background thread in this worker
+if application.config.get('EMAIL_OUTBOX_WORKER_THREAD'):
+    from app.utils.outbox import outbox_worker
+    outbox_worker.start(application)
+
 # BigRock/cPanel requires the WSGI callable to be named 'application'
 if __name__ == '__main__':
     application.run(debug=True, host='0.0.0.0', port=5000)
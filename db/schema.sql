@@ -15,6 +15,7 @@ CREATE TABLE IF NOT EXISTS users (
     name VARCHAR(100) NOT NULL,
     role VARCHAR(20) DEFAULT 'admin',
     is_active BOOLEAN DEFAULT TRUE,
+    version INT NOT NULL DEFAULT 1,
     last_login DATETIME,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
@@ -42,6 +43,7 @@ CREATE TABLE IF NOT EXISTS pages (
     created_by INT,
     INDEX idx_slug (slug),
     INDEX idx_published (is_published),
+    FULLTEXT INDEX ft_search (title, content),
     FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
@@ -66,7 +68,8 @@ CREATE TABLE IF NOT EXISTS services (
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_slug (slug),
     INDEX idx_featured (is_featured),
-    INDEX idx_published (is_published)
+    INDEX idx_published (is_published),
+    FULLTEXT INDEX ft_search (title, short_description, description)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- =============================================
@@ -93,9 +96,22 @@ CREATE TABLE IF NOT EXISTS blog_posts (
     INDEX idx_published (is_published),
     INDEX idx_category (category),
     INDEX idx_published_at (published_at),
+    FULLTEXT INDEX ft_search (title, excerpt, content),
     FOREIGN KEY (author_id) REFERENCES users(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- =============================================
+-- Post Tags (normalized index of blog_posts.tags)
+-- Existing databases: run `flask backfill-post-tags`
+-- =============================================
+CREATE TABLE IF NOT EXISTS post_tags (
+    post_id INT NOT NULL,
+    tag VARCHAR(100) NOT NULL,
+    PRIMARY KEY (post_id, tag),
+    INDEX idx_tag (tag),
+    FOREIGN KEY (post_id) REFERENCES blog_posts(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- =============================================
 -- Leads Table (Contact form submissions)
 -- =============================================
@@ -103,7 +119,9 @@ CREATE TABLE IF NOT EXISTS leads (
     id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(100) NOT NULL,
     email VARCHAR(120) NOT NULL,
+    email_normalized VARCHAR(120),
     phone VARCHAR(30),
+    phone_e164 VARCHAR(20),
     organization VARCHAR(200),
     message TEXT NOT NULL,
     preferred_contact_time VARCHAR(100),
@@ -115,13 +133,102 @@ CREATE TABLE IF NOT EXISTS leads (
     user_agent VARCHAR(500),
     privacy_accepted BOOLEAN DEFAULT TRUE,
     email_sent BOOLEAN DEFAULT FALSE,
+    submission_count INT NOT NULL DEFAULT 1,
+    last_submitted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_email (email),
+    INDEX idx_email_normalized (email_normalized),
+    INDEX idx_phone_e164 (phone_e164),
+    INDEX idx_name (name),
+    INDEX idx_phone (phone),
+    INDEX idx_status (status),
+    INDEX idx_created_at (created_at),
+    FULLTEXT INDEX ft_lead_search (organization, message)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =============================================
+-- Lead Submissions (repeat submissions folded into an open lead)
+-- No foreign key: the rows stay with the lead in leads_archive (same ids)
+-- =============================================
+CREATE TABLE IF NOT EXISTS lead_submissions (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    lead_id INT NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(120) NOT NULL,
+    phone VARCHAR(30),
+    organization VARCHAR(200),
+    message TEXT NOT NULL,
+    service_interest VARCHAR(100),
+    ip_address VARCHAR(50),
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_lead (lead_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =============================================
+-- Leads Archive (closed/converted leads moved out by `flask archive-leads`)
+-- =============================================
+CREATE TABLE IF NOT EXISTS leads_archive (
+    id INT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(120) NOT NULL,
+    email_normalized VARCHAR(120),
+    phone VARCHAR(30),
+    phone_e164 VARCHAR(20),
+    organization VARCHAR(200),
+    message TEXT NOT NULL,
+    preferred_contact_time VARCHAR(100),
+    service_interest VARCHAR(100),
+    source VARCHAR(50),
+    status VARCHAR(20),
+    notes TEXT,
+    ip_address VARCHAR(50),
+    user_agent VARCHAR(500),
+    privacy_accepted BOOLEAN,
+    email_sent BOOLEAN,
+    submission_count INT NOT NULL DEFAULT 1,
+    last_submitted_at DATETIME,
+    created_at DATETIME,
+    updated_at DATETIME,
+    archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_email (email),
     INDEX idx_status (status),
     INDEX idx_created_at (created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Archived lead counts per status and creation month (YYYY-MM)
+CREATE TABLE IF NOT EXISTS lead_archive_stats (
+    status VARCHAR(20) NOT NULL,
+    month CHAR(7) NOT NULL,
+    count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (status, month)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =============================================
+-- Email Outbox (queued emails, delivered by the outbox worker)
+-- =============================================
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    lead_id INT,
+    kind VARCHAR(50) NOT NULL,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(300) NOT NULL,
+    body TEXT,
+    html TEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    sent_at DATETIME,
+    digest_id INT,
+    INDEX idx_lead (lead_id),
+    INDEX idx_outbox_due (status, next_attempt_at),
+    INDEX idx_digest (digest_id),
+    FOREIGN KEY (lead_id) REFERENCES leads(id) ON DELETE CASCADE,
+    FOREIGN KEY (digest_id) REFERENCES email_outbox(id) ON DELETE SET NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- =============================================
 -- Settings Table
 -- =============================================
@@ -138,6 +245,31 @@ CREATE TABLE IF NOT EXISTS settings (
     INDEX idx_category (category)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- =============================================
+-- Cache Versions (bumped on writes; workers rebuild in-memory caches)
+-- =============================================
+CREATE TABLE IF NOT EXISTS cache_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- =============================================
+-- Revoked tokens (logout, deactivated users)
+-- =============================================
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    seq INT AUTO_INCREMENT PRIMARY KEY,
+    jti VARCHAR(36),
+    user_id INT,
+    token_type VARCHAR(10),
+    revoked_before DATETIME,
+    expires_at DATETIME NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_jti (jti),
+    INDEX idx_user (user_id),
+    INDEX idx_expires (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- =============================================
 -- MIS Templates and Data
 -- =============================================
@@ -36,6 +36,21 @@ INSERT INTO blog_posts (title, slug, excerpt, content, category, tags, is_publis
 ('How to Prepare Your Healthcare Startup for Series A Funding', 'prepare-healthcare-startup-series-a', 'Raising Series A funding requires thorough preparation. Learn the key steps to make your healthcare startup investor-ready.', '<h2>How to Prepare Your Healthcare Startup for Series A Funding</h2><p>Transitioning from seed to Series A is a critical milestone for healthcare startups. Here''s how to prepare.</p><h3>Build a Strong Foundation</h3><ul><li>Demonstrate product-market fit</li><li>Show consistent revenue growth</li><li>Build a strong management team</li></ul><h3>Financial Preparation</h3><p>Investors will scrutinize your financials. Ensure you have:</p><ul><li>Clean, audited financial statements</li><li>Clear unit economics</li><li>Realistic financial projections</li><li>Understanding of your burn rate</li></ul><h3>Craft Your Story</h3><p>Your pitch should clearly articulate the problem, solution, market opportunity, and why your team is best positioned to win.</p><h3>Due Diligence Ready</h3><p>Organize all legal, financial, and operational documents in a virtual data room.</p>', 'Fundraising', '["Series A", "startup funding", "healthcare startup", "venture capital"]', TRUE, NOW() - INTERVAL 3 DAY, 1),
 ('Cost Reduction Strategies That Don''t Compromise Patient Care', 'cost-reduction-strategies-patient-care', 'Learn how to implement effective cost reduction strategies while maintaining the quality of patient care.', '<h2>Cost Reduction Strategies That Don''t Compromise Patient Care</h2><p>The challenge in healthcare cost reduction is maintaining quality while improving efficiency. Here are strategies that work.</p><h3>Supply Chain Optimization</h3><p>Negotiate better contracts, standardize supplies, and implement inventory management systems.</p><h3>Technology Investment</h3><p>While counterintuitive, strategic technology investments can reduce long-term costs through automation and efficiency.</p><h3>Workforce Optimization</h3><p>Optimize staffing ratios based on patient acuity and implement flexible scheduling.</p><h3>Preventive Care Focus</h3><p>Investing in preventive care reduces costly emergency interventions.</p><h3>Revenue Cycle Management</h3><p>Improving billing accuracy and collection processes can significantly impact the bottom line.</p>', 'Operations', '["cost reduction", "healthcare efficiency", "patient care", "hospital operations"]', TRUE, NOW() - INTERVAL 7 DAY, 1);
 
+-- Tag index for the posts above
+INSERT INTO post_tags (post_id, tag)
+SELECT id, 'financial metrics' FROM blog_posts WHERE slug = '5-key-financial-metrics-healthcare'
+UNION ALL SELECT id, 'healthcare finance' FROM blog_posts WHERE slug = '5-key-financial-metrics-healthcare'
+UNION ALL SELECT id, 'KPIs' FROM blog_posts WHERE slug = '5-key-financial-metrics-healthcare'
+UNION ALL SELECT id, 'hospital management' FROM blog_posts WHERE slug = '5-key-financial-metrics-healthcare'
+UNION ALL SELECT id, 'Series A' FROM blog_posts WHERE slug = 'prepare-healthcare-startup-series-a'
+UNION ALL SELECT id, 'startup funding' FROM blog_posts WHERE slug = 'prepare-healthcare-startup-series-a'
+UNION ALL SELECT id, 'healthcare startup' FROM blog_posts WHERE slug = 'prepare-healthcare-startup-series-a'
+UNION ALL SELECT id, 'venture capital' FROM blog_posts WHERE slug = 'prepare-healthcare-startup-series-a'
+UNION ALL SELECT id, 'cost reduction' FROM blog_posts WHERE slug = 'cost-reduction-strategies-patient-care'
+UNION ALL SELECT id, 'healthcare efficiency' FROM blog_posts WHERE slug = 'cost-reduction-strategies-patient-care'
+UNION ALL SELECT id, 'patient care' FROM blog_posts WHERE slug = 'cost-reduction-strategies-patient-care'
+UNION ALL SELECT id, 'hospital operations' FROM blog_posts WHERE slug = 'cost-reduction-strategies-patient-care';
+
 -- =============================================
 -- Site Settings
 -- =============================================
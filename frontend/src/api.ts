@@ -121,8 +121,22 @@ export interface Lead {
   notes: string | null
   privacy_accepted: boolean
   email_sent: boolean
+  submission_count: number
+  last_submitted_at: string | null
   created_at: string
   updated_at: string
+  submissions?: LeadSubmission[]  // repeat submissions, on the single-lead endpoints
+}
+
+export interface LeadSubmission {
+  id: number
+  name: string
+  email: string
+  phone: string | null
+  organization: string | null
+  message: string
+  service_interest: string | null
+  created_at: string
 }
 
 export interface ContactFormData {
@@ -187,6 +201,16 @@ export interface CreateServiceData {
   meta_description?: string
 }
 
+// Bulk admin operations
+export interface BulkResult {
+  id: number
+  result: 'updated' | 'unchanged' | 'deleted' | 'not_found'
+}
+
+export type ContentBulkRequest =
+  | { action: 'publish' | 'unpublish' | 'delete'; ids: number[] }
+  | { action: 'set_sort_order'; items: { id: number; sort_order: number }[] }
+
 // Create Lead Data
 export interface CreateLeadData {
   name: string
@@ -195,6 +219,8 @@ export interface CreateLeadData {
   organization?: string
   message: string
   source?: string
+  form_token?: string
+  website?: string
 }
 
 // Auth API
@@ -207,8 +233,11 @@ export const authApi = {
     const response = await api.post('/auth/signup', data)
     return response.data
   },
-  logout: async () => {
-    const response = await api.post('/auth/logout')
+  logout: async (token?: string) => {
+    // The stored token may already be cleared; send the one being revoked
+    const response = await api.post('/auth/logout', {}, token ? {
+      headers: { Authorization: `Bearer ${token}` },
+    } : undefined)
     return response.data
   },
   me: async () => {
@@ -255,6 +284,10 @@ export const pagesApi = {
     const response = await api.delete(`/pages/admin/${id}`)
     return response.data
   },
+  bulk: async (request: ContentBulkRequest) => {
+    const response = await api.post('/pages/admin/bulk', request)
+    return response.data.results as BulkResult[]
+  },
 }
 
 // Services API
@@ -292,13 +325,18 @@ export const servicesApi = {
     const response = await api.delete(`/services/admin/${id}`)
     return response.data
   },
+  bulk: async (request: ContentBulkRequest) => {
+    const response = await api.post('/services/admin/bulk', request)
+    return response.data.results as BulkResult[]
+  },
 }
 
 // Blog API
 export const blogApi = {
-  getAll: async (page = 1, perPage = 10, category?: string) => {
+  getAll: async (page = 1, perPage = 10, category?: string, tag?: string) => {
     const params = new URLSearchParams({ page: String(page), per_page: String(perPage) })
     if (category) params.append('category', category)
+    if (tag) params.append('tag', tag)
     const response = await api.get(`/blog?${params}`)
     return response.data
   },
@@ -306,6 +344,10 @@ export const blogApi = {
     const response = await api.get('/blog/categories')
     return response.data.categories as string[]
   },
+  getTags: async () => {
+    const response = await api.get('/blog/tags')
+    return response.data.tags as { tag: string; count: number }[]
+  },
   getRecent: async (limit = 5) => {
     const response = await api.get(`/blog/recent?limit=${limit}`)
     return response.data.posts as BlogPost[]
@@ -335,10 +377,43 @@ export const blogApi = {
     const response = await api.delete(`/blog/admin/${id}`)
     return response.data
   },
+  bulk: async (request: ContentBulkRequest) => {
+    const response = await api.post('/blog/admin/bulk', request)
+    return response.data.results as BulkResult[]
+  },
+}
+
+// Search API
+export interface SearchResult {
+  type: 'page' | 'service' | 'post'
+  id: number
+  title: string
+  slug: string
+  url: string
+  snippet: string
+  score: number
+}
+
+export const searchApi = {
+  search: async (q: string, type?: SearchResult['type']) => {
+    const params = new URLSearchParams({ q })
+    if (type) params.append('type', type)
+    const response = await api.get(`/search?${params}`)
+    return response.data.results as SearchResult[]
+  },
+}
+
+export interface LeadSearchHit extends Lead {
+  match: 'email' | 'name' | 'phone' | 'text'
+  score: number | null
 }
 
 // Leads API
 export const leadsApi = {
+  getFormToken: async () => {
+    const response = await api.get('/contact/token')
+    return response.data.token as string
+  },
   submit: async (data: ContactFormData) => {
     const response = await api.post('/contact', data)
     return response.data
@@ -370,6 +445,10 @@ export const leadsApi = {
     const response = await api.delete(`/contact/admin/${id}`)
     return response.data
   },
+  bulk: async (request: { action: 'set_status'; ids: number[]; status: string } | { action: 'delete'; ids: number[] }) => {
+    const response = await api.post('/contact/admin/bulk', request)
+    return response.data.results as BulkResult[]
+  },
   export: async (status?: string) => {
     const params = status ? `?status=${status}` : ''
     const response = await api.get(`/contact/admin/export${params}`, {
@@ -387,6 +466,25 @@ export const leadsApi = {
     const response = await api.get('/contact/admin/stats')
     return response.data
   },
+  getArchived: async (page = 1, status?: string, email?: string) => {
+    const params = new URLSearchParams({ page: String(page), per_page: '20' })
+    if (status) params.append('status', status)
+    if (email) params.append('email', email)
+    const response = await api.get(`/contact/admin/archive?${params}`)
+    return response.data as {
+      leads: (Lead & { archived_at: string })[]
+      total: number
+      pages: number
+      current_page: number
+    }
+  },
+  search: async (q: string, cursor?: string, status?: string) => {
+    const params = new URLSearchParams({ q })
+    if (cursor) params.append('cursor', cursor)
+    if (status) params.append('status', status)
+    const response = await api.get(`/contact/admin/search?${params}`)
+    return response.data as { leads: LeadSearchHit[]; next_cursor: string | null }
+  },
 }
 
 // Admin API
@@ -58,11 +58,14 @@ export function AuthProvider({ children }: { children: ReactNode }) {
   }
 
   const logout = () => {
+    const currentToken = localStorage.getItem('token')
     localStorage.removeItem('token')
     localStorage.removeItem('user')
     setToken(null)
     setUser(null)
-    authApi.logout().catch(() => {})
+    if (currentToken) {
+      authApi.logout(currentToken).catch(() => {})
+    }
   }
 
   const isAdmin = user?.role === 'admin'
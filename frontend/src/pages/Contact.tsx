@@ -1,4 +1,4 @@
-import { useState } from 'react'
+import { useEffect, useState } from 'react'
 import { Link } from 'react-router-dom'
 import { Helmet } from 'react-helmet-async'
 import { useForm } from 'react-hook-form'
@@ -11,12 +11,20 @@ interface ContactFormData {
   phone: string
   organization: string
   message: string
+  website: string
 }
 
 export default function Contact() {
   const [loading, setLoading] = useState(false)
+  const [formToken, setFormToken] = useState<string>()
   const { register, handleSubmit, reset, formState: { errors } } = useForm<ContactFormData>()
 
+  const refreshFormToken = () => {
+    leadsApi.getFormToken().then(setFormToken).catch(() => setFormToken(undefined))
+  }
+
+  useEffect(refreshFormToken, [])
+
   const onSubmit = async (data: ContactFormData) => {
     setLoading(true)
     try {
@@ -27,10 +35,13 @@ export default function Contact() {
         organization: data.organization || undefined,
         message: data.message,
         source: 'contact_form',
+        form_token: formToken,
+        website: data.website || undefined,
       }
       await leadsApi.create(leadData)
       toast.success('Thank you! We\'ll get back to you within 24 hours.')
       reset()
+      refreshFormToken()
     } catch {
       toast.error('Something went wrong. Please try again.')
     } finally {
@@ -143,6 +154,12 @@ export default function Contact() {
                   {errors.message && <p className="mt-1 text-sm text-red-600">{errors.message.message}</p>}
                 </div>
 
+                {/* Honeypot: hidden from people, filled in by bots */}
+                <div className="hidden" aria-hidden="true">
+                  <label htmlFor="website">Website</label>
+                  <input type="text" id="website" tabIndex={-1} autoComplete="off" {...register('website')} />
+                </div>
+
                 <button
                   type="submit"
                   disabled={loading}